@@ -0,0 +1,632 @@
+"""The four analyses, independent of HTTP.
+
+app.py parses requests and calls these; batch.py runs them over CSV files
+in a process pool. Each function takes already-parsed numbers (a
+column.NumericColumn of the precision mode's dtype, as the parsers here
+return) and returns the result dict. Series echoed back for charting stay
+NumericColumns in the result; encode it with column.dumps (app.py's JSON
+provider does). Inputs that are well-formed numbers but unusable for the
+analysis raise `AnalysisError`, whose message is safe to show to the user.
+"""
+import csv
+import json
+import math
+from io import StringIO
+
+import numpy as np
+from scipy import stats
+
+from chi_square_engine import ChiSquareInputError, contingency_test, contingency_tests, p_values, sparse_goodness_of_fit
+from column import iter_tokens
+from kde import DEFAULT_GRID_SIZE, MAX_GRID_SIZE, MIN_GRID_SIZE, density_curve
+from precision import EXACT, PRECISION_MODES, get_precision
+from structured_log import get_logger
+from rank_correlation import rank_correlation
+from regression import CoMoments, LeastSquares
+from robust import DEFAULT_TRIM, robust_statistics
+
+ANALYSES = ('descriptive', 'ttest', 'chisquare', 'correlation')
+CORRELATION_METHODS = ('pearson', 'spearman', 'kendall')
+CORRELATION_LABELS = {'pearson': 'Pearson', 'spearman': 'Spearman', 'kendall': 'Kendall'}
+REGRESSION_BAND_POINTS = 50
+CHI_SQUARE_MODES = ('goodness', 'sparse', 'contingency', 'batch')
+TOP_CONTRIBUTIONS = 10
+
+log = get_logger('analyses')
+
+
+class AnalysisError(ValueError):
+    """Input that cannot be analysed; the message is returned as a 400."""
+
+
+# ===== CSV parsing =====
+
+def parse_csv_data(csv_content, precision=EXACT):
+    """Parse CSV content and return the numbers, stored as `precision` dictates"""
+    return precision.collect(iter_csv_numbers(csv_content))
+
+def iter_csv_rows(csv_content):
+    """Yield each CSV row as an iterable of fields
+
+    Files without quotes are split a slice at a time, so a row of a million
+    values never exists as a list of strings; anything else goes through
+    the csv module.
+    """
+    # Quotes and bare carriage-return line breaks need the csv module
+    if '"' in csv_content or csv_content.count('\r') != csv_content.count('\r\n'):
+        yield from csv.reader(StringIO(csv_content, newline=''))
+        return
+    for line in iter_tokens(csv_content, '\n'):
+        yield iter_tokens(line, ',')
+
+def iter_csv_numbers(csv_content):
+    """Yield every numeric value in CSV content"""
+    for row in iter_csv_rows(csv_content):
+        for value in row:
+            value = value.strip()
+            if value:  # Skip empty values
+                try:
+                    yield float(value)
+                except ValueError:
+                    # Skip non-numeric values (headers, etc.)
+                    continue
+
+def parse_csv_rows(csv_content, precision=EXACT):
+    """Parse CSV content into non-empty rows of numbers"""
+    rows = []
+    for row in iter_csv_rows(csv_content):
+        values = precision.collect(float(x.strip()) for x in row if x.strip())
+        if len(values):
+            rows.append(values)
+    return rows
+
+def parse_sparse_counts(line):
+    """'a:3, b:0, c:12' -> (labels, counts)"""
+    labels, counts = [], []
+    for token in line.split(','):
+        if not token.strip():
+            continue
+        label, separator, count = token.rpartition(':')
+        if not separator or not label.strip():
+            raise AnalysisError(f"Expected category:count, got '{token.strip()}'")
+        labels.append(label.strip())
+        counts.append(count)
+    return labels, np.array(counts, dtype=np.float64)
+
+def parse_tables(text):
+    """Tables of comma-separated counts, one row per line, separated by blank lines"""
+    tables, rows = [], []
+    for line in text.splitlines():
+        values = [float(x.strip()) for x in line.split(',') if x.strip()]
+        if values:
+            rows.append(values)
+        elif rows:
+            tables.append(rows)
+            rows = []
+    if rows:
+        tables.append(rows)
+
+    for i, table in enumerate(tables):
+        if len({len(row) for row in table}) > 1:
+            raise AnalysisError(f'Table {i + 1}: every row needs the same number of columns')
+    return tables
+
+def analyze_csv(analysis, csv_content, precision=EXACT, method='pearson', regression=False,
+                include_data=True, mode='goodness', categories=None, robust=False, trim=DEFAULT_TRIM,
+                density=False, grid_size=DEFAULT_GRID_SIZE):
+    """Run one analysis on CSV text laid out as for the upload endpoints"""
+    if analysis == 'descriptive':
+        return descriptive(parse_csv_data(csv_content, precision), precision, include_data,
+                           robust=robust, trim=trim, density=density, grid_size=grid_size)
+
+    if analysis == 'ttest':
+        all_numbers = parse_csv_data(csv_content, precision)
+        if len(all_numbers) < 2:
+            raise AnalysisError('CSV must contain sample data and population mean (last value)')
+        # Last value is population mean, rest is sample
+        return t_test(all_numbers[:-1], float(all_numbers[-1]), precision, include_data, density, grid_size)
+
+    if analysis == 'chisquare':
+        return chi_square_text(mode, csv_content, precision, categories, include_data)
+
+    if analysis == 'correlation':
+        rows = parse_csv_rows(csv_content, precision)
+        if len(rows) < 2:
+            raise AnalysisError('CSV must contain 2 rows: X values and Y values')
+        extra_predictors = rows[2:] if regression else []
+        return correlation(rows[0], rows[1], method, regression, extra_predictors, precision, include_data)
+
+    raise AnalysisError(f"Unknown analysis '{analysis}'. Use one of: {', '.join(ANALYSES)}")
+
+def analyze_text(analysis, text, precision=EXACT, method='pearson', regression=False,
+                 include_data=True, mode='goodness', categories=None, robust=False, trim=DEFAULT_TRIM,
+                 density=False, grid_size=DEFAULT_GRID_SIZE):
+    """Run one analysis on text laid out as for the JSON `data` field (one series per line)"""
+    if analysis == 'descriptive':
+        return descriptive(precision.parse(text), precision, include_data,
+                           robust=robust, trim=trim, density=density, grid_size=grid_size)
+
+    if analysis == 'chisquare' and mode != 'goodness':
+        return chi_square_text(mode, text, precision, categories, include_data)
+
+    # Split by newlines and filter empty lines
+    lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
+
+    if analysis == 'ttest':
+        if len(lines) < 2:
+            raise AnalysisError('Enter sample data (line 1) and population mean (line 2). '
+                                'Make sure to press Enter between lines.')
+        return t_test(precision.parse(lines[0]), float(lines[1]), precision, include_data, density, grid_size)
+
+    if analysis == 'chisquare':
+        if len(lines) < 2:
+            raise AnalysisError('Enter observed (line 1) and expected (line 2) frequencies. '
+                                'Make sure to press Enter between lines.')
+        return chi_square(precision.parse(lines[0]), precision.parse(lines[1]), precision, include_data)
+
+    if analysis == 'correlation':
+        if len(lines) < 2:
+            raise AnalysisError('Enter X values (line 1) and Y values (line 2). '
+                                'Make sure to press Enter between lines.')
+        # Extra lines are additional predictors for the regression fit
+        extra_predictors = [precision.parse(line) for line in lines[2:]] if regression else []
+        return correlation(precision.parse(lines[0]), precision.parse(lines[1]), method, regression,
+                           extra_predictors, precision, include_data)
+
+    raise AnalysisError(f"Unknown analysis '{analysis}'. Use one of: {', '.join(ANALYSES)}")
+
+
+# ===== Request options =====
+
+def parse_flag(value):
+    """Interpret a JSON boolean or a form field such as 'true'/'1'/'on'"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+def parse_precision(value):
+    """Precision mode named by a request option; blank or missing means the default"""
+    precision = get_precision(value)
+    if precision is None:
+        raise AnalysisError(f"Unknown precision '{str(value).strip().lower()}'. "
+                            f"Use one of: {', '.join(PRECISION_MODES)}")
+    return precision
+
+def request_options(analysis, options):
+    """Keyword arguments of analyze_text/analyze_csv from a request's JSON body or form fields"""
+    kwargs = {'precision': parse_precision(options.get('precision'))}
+    if analysis in ('descriptive', 'ttest'):
+        # includeData (default true), density and gridSize: what the response carries for charting
+        kwargs.update(include_data=parse_flag(options.get('includeData', True)),
+                      density=parse_flag(options.get('density', False)),
+                      grid_size=parse_grid_size(options.get('gridSize')))
+    if analysis == 'descriptive':
+        kwargs.update(robust=parse_flag(options.get('robust', False)), trim=parse_trim(options.get('trim')))
+    elif analysis == 'chisquare':
+        # goodness (default), sparse, contingency or batch; see chi_square_text
+        kwargs.update(mode=str(options.get('mode') or 'goodness').strip().lower(),
+                      categories=options.get('categories') or None)
+    elif analysis == 'correlation':
+        kwargs.update(method=options.get('method') or 'pearson',
+                      regression=parse_flag(options.get('regression', False)))
+    return kwargs
+
+def analyze_json(analysis, body):
+    """Decode a JSON request body and run the analysis on its `data` field
+
+    Returns (result, options), the options being the keyword arguments read
+    from the body. Decoding is part of the job so that in the pool serving
+    mode it runs in the compute pool, not in the request thread.
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise AnalysisError('Send a JSON object with the input in its "data" field')
+    options = request_options(analysis, payload)
+    return analyze_text(analysis, payload.get('data', ''), **options), options
+
+
+# ===== Analyses =====
+
+def descriptive(numbers, precision=EXACT, include_data=True, moments=None, robust=False, trim=DEFAULT_TRIM,
+                density=False, grid_size=DEFAULT_GRID_SIZE):
+    """Count, sum, mean, median, mode, variance, standard deviation and range
+
+    `moments` (with n, total, mean, min, max and variance()) can supply the
+    sums already accumulated elsewhere, e.g. chunk by chunk during an upload;
+    otherwise they are the column's cached moments. The median and mode
+    come from the column's sorted view. With `robust`, the result also has
+    a `robust` block (see robust_summary); with `density`, a `density`
+    curve for charting (see density_summary).
+    """
+    if len(numbers) == 0:
+        raise AnalysisError('Please enter valid numbers')
+
+    # Calculate statistics
+    n = len(numbers)
+    numbers = precision.column(numbers)
+    if moments is None:
+        moments = precision.moments(numbers)
+    median = precision.median(numbers)
+    total, mean = moments.total, moments.mean
+    # Variance and standard deviation
+    variance = moments.variance() if n > 1 else 0
+    std_dev = math.sqrt(variance)
+    minimum, maximum = moments.min, moments.max
+    data_range = maximum - minimum
+
+    # Mode (if exists)
+    try:
+        mode = precision.mode(numbers)
+    except ValueError:  # statistics.StatisticsError
+        mode = "No unique mode"
+
+    result = {
+        'count': n,
+        'sum': round(total, 4),
+        'mean': round(mean, 4),
+        'median': round(median, 4),
+        'mode': mode if isinstance(mode, str) else round(mode, 4),
+        'variance': round(variance, 4),
+        'stdDev': round(std_dev, 4),
+        'min': round(minimum, 4),
+        'max': round(maximum, 4),
+        'range': round(data_range, 4),
+        'precision': precision.name,
+    }
+    if robust:
+        result['robust'] = robust_summary(numbers, precision, trim)
+    if density:
+        result['density'] = density_summary(numbers, precision, grid_size)
+    if include_data:
+        result['rawData'] = numbers  # Include raw data for charting
+    return result
+
+def parse_trim(value):
+    """Trim proportion from a request option; blank or missing means the default"""
+    if value is None or str(value).strip() == '':
+        return DEFAULT_TRIM
+    try:
+        trim = float(value)
+    except (TypeError, ValueError):
+        trim = math.nan
+    if not 0 <= trim < 0.5:
+        raise AnalysisError(f"Invalid trim proportion '{value}': use a number from 0 up to (not including) 0.5")
+    return trim
+
+def robust_summary(numbers, precision=EXACT, trim=DEFAULT_TRIM):
+    """Quartiles, IQR, MAD, trimmed/winsorized means and Tukey/MAD outliers (see robust.py)"""
+    return round_floats(robust_statistics(numbers, precision, trim))
+
+def parse_grid_size(value):
+    """Density grid size from a request option; blank or missing means the default"""
+    if value is None or str(value).strip() == '':
+        return DEFAULT_GRID_SIZE
+    try:
+        grid_size = int(str(value).strip())
+    except ValueError:
+        grid_size = None
+    if grid_size is None or not MIN_GRID_SIZE <= grid_size <= MAX_GRID_SIZE:
+        raise AnalysisError(f"Invalid grid size '{value}': use a whole number from {MIN_GRID_SIZE} to {MAX_GRID_SIZE}")
+    return grid_size
+
+def density_summary(numbers, precision=EXACT, grid_size=DEFAULT_GRID_SIZE):
+    """Kernel density curve (x, density) on grid_size points, with its bandwidth (see kde.py)"""
+    try:
+        return round_floats(density_curve(numbers, precision, grid_size))
+    except ValueError as e:
+        raise AnalysisError(f'Cannot draw a density curve: {e}')
+
+def t_test(sample, population_mean, precision=EXACT, include_data=True, density=False,
+           grid_size=DEFAULT_GRID_SIZE):
+    """One-sample t-test of the sample mean against `population_mean`
+
+    With `density`, the result also has a `density` curve of the sample.
+    """
+    if len(sample) == 0:
+        raise AnalysisError('Sample data cannot be empty')
+
+    if len(sample) < 2:
+        raise AnalysisError('Need at least 2 data points for t-test')
+
+    n = len(sample)
+    moments = precision.moments(sample)
+    sample_mean = moments.mean
+    sample_std = math.sqrt(moments.variance())
+    std_error = sample_std / math.sqrt(n)
+    df = n - 1
+
+    # One-sample t-test from the (precision-dependent) mean and stdev
+    difference = sample_mean - population_mean
+    if std_error > 0:
+        t_statistic = difference / std_error
+    else:
+        t_statistic = math.copysign(math.inf, difference) if difference else math.nan
+    p_value = 2 * stats.t.sf(abs(t_statistic), df)
+
+    # Determine significance
+    significance = "Significant" if p_value < 0.05 else "Not Significant"
+
+    result = {
+        'sampleSize': n,
+        'sampleMean': round(sample_mean, 4),
+        'populationMean': round(population_mean, 4),
+        'sampleStdDev': round(sample_std, 4),
+        'standardError': round(std_error, 4),
+        'tStatistic': round(t_statistic, 4),
+        'pValue': round(p_value, 6),
+        'degreesOfFreedom': df,
+        'significance': significance,
+        'interpretation': f'At α=0.05: {significance} (p={round(p_value, 4)})',
+        'precision': precision.name,
+    }
+    if density:
+        result['density'] = density_summary(sample, precision, grid_size)
+    if include_data:
+        result['sampleData'] = precision.column(sample)  # Include for charting
+        result['popMean'] = population_mean  # Include for charting
+    return result
+
+def chi_square(observed, expected, precision=EXACT, include_data=True):
+    """Chi-square goodness of fit; expected counts are rescaled to the observed total"""
+    if len(observed) == 0:
+        raise AnalysisError('Observed frequencies cannot be empty')
+
+    if len(expected) == 0:
+        raise AnalysisError('Expected frequencies cannot be empty')
+
+    if len(observed) != len(expected):
+        raise AnalysisError(f'Observed ({len(observed)}) and expected ({len(expected)}) must have same length')
+
+    if precision.min(expected) <= 0:
+        raise AnalysisError('Expected frequencies must be positive values')
+
+    # Check if sums are approximately equal
+    sum_obs = precision.sum(observed)
+    sum_exp = precision.sum(expected)
+    log.debug('chi-square sums', observedSum=sum_obs, expectedSum=sum_exp, categories=len(observed))
+
+    # If sums don't match, normalize expected frequencies
+    if abs(sum_obs - sum_exp) > 1e-6:
+        # Normalize expected to match observed sum
+        expected = precision.as_array(expected) * sum_obs / sum_exp
+        log.debug('chi-square expected normalized', scale=sum_obs / sum_exp, expected=expected)
+
+    # Calculate chi-square manually for better control
+    observed_array = precision.as_array(observed)
+    expected_array = precision.as_array(expected)
+    chi_square_stat = precision.sum((observed_array - expected_array) ** 2 / expected_array)
+    df = len(observed) - 1
+
+    # Survival function, not 1 - cdf, so small p-values do not round to 0
+    p_value, log_p = p_values(chi_square_stat, df)
+    p_value = float(p_value)
+
+    # Determine significance
+    significance = "Significant" if p_value < 0.05 else "Not Significant"
+
+    result = {
+        'mode': 'goodness',
+        'chiSquareStatistic': round(chi_square_stat, 4),
+        'pValue': round(p_value, 6),
+        'log10PValue': round(float(log_p) / math.log(10), 4),
+        'degreesOfFreedom': df,
+        'categories': len(observed),
+        'significance': significance,
+        'observedSum': round(sum_obs, 2),
+        'expectedSum': round(precision.sum(expected), 2),
+        'interpretation': f'At α=0.05: {significance} (p={round(p_value, 4)})',
+        'precision': precision.name,
+    }
+    if include_data:
+        result['observed'] = precision.column(observed)  # Include for charting
+        result['expected'] = precision.column(expected)  # Include for charting
+    return result
+
+def chi_square_text(mode, text, precision=EXACT, categories=None, include_data=True):
+    """Any chi-square mode from CSV-style text input
+
+    Counts are integers, which float64 holds exactly, so the sparse,
+    contingency and batch modes always count in float64; `precision` only
+    changes goodness-of-fit results.
+    """
+    mode = str(mode or 'goodness').strip().lower()
+    if mode not in CHI_SQUARE_MODES:
+        raise AnalysisError(f"Unknown chi-square mode '{mode}'. Use one of: {', '.join(CHI_SQUARE_MODES)}")
+    if mode == 'goodness':
+        rows = parse_csv_rows(text, precision)
+        if len(rows) < 2:
+            raise AnalysisError('CSV must contain 2 rows: observed and expected frequencies')
+        return chi_square(rows[0], rows[1], precision, include_data)
+    try:
+        if mode == 'sparse':
+            return sparse_chi_square(text, precision, categories)
+        if mode == 'contingency':
+            tables = parse_tables(text)
+            if len(tables) != 1:
+                raise AnalysisError(f'Expected one contingency table, found {len(tables)}')
+            return contingency_chi_square(tables[0], precision, include_data)
+        return batch_chi_square(parse_tables(text), precision)
+    except ChiSquareInputError as e:
+        raise AnalysisError(str(e))
+
+def sparse_chi_square(text, precision=EXACT, categories=None):
+    """Goodness of fit on `category:count` pairs (line 1) and optional expected weights (line 2)"""
+    lines = [line for line in text.strip().splitlines() if line.strip(' ,')]
+    if not lines:
+        raise AnalysisError('Enter observed counts as category:count pairs')
+    labels, counts = parse_sparse_counts(lines[0])
+    expected_labels = expected_weights = None
+    if len(lines) > 1:
+        expected_labels, expected_weights = parse_sparse_counts(lines[1])
+    if categories is not None:
+        categories = int(categories)
+
+    fit = sparse_goodness_of_fit(labels, counts, expected_labels, expected_weights, categories)
+    top = np.argsort(fit['contributions'])[::-1][:TOP_CONTRIBUTIONS]
+    result = chi_square_summary(fit, precision)
+    result.update({
+        'mode': 'sparse',
+        'categories': fit['categories'],
+        'nonzeroCategories': fit['nonzeroCategories'],
+        'observedSum': round(fit['total'], 2),
+        'topContributions': [{
+            'category': str(fit['labels'][i]),
+            'observed': round(float(fit['observed'][i]), 4),
+            'expected': round(float(fit['expected'][i]), 4),
+            'contribution': round(float(fit['contributions'][i]), 4),
+        } for i in top],
+    })
+    return result
+
+def contingency_chi_square(table, precision=EXACT, include_data=True):
+    """Independence test on one R x C table of counts"""
+    fit = contingency_test(table)
+    result = chi_square_summary(fit, precision)
+    result.update({
+        'mode': 'contingency',
+        'rows': fit['rows'],
+        'columns': fit['columns'],
+        'total': round(fit['total'], 2),
+        'cramersV': round(fit['cramersV'], 4),
+    })
+    if include_data:
+        result['observed'] = fit['observed'].tolist()
+        result['expected'] = np.round(fit['expected'], 4).tolist()
+    return result
+
+def batch_chi_square(tables, precision=EXACT):
+    """Independence tests on many tables at once"""
+    if not tables:
+        raise AnalysisError('Enter at least one table (separate tables with a blank line)')
+    results = []
+    for index, fit in enumerate(contingency_tests(tables)):
+        if 'error' in fit:
+            results.append({'index': index, 'error': fit['error']})
+            continue
+        summary = chi_square_summary(fit, precision)
+        results.append({
+            'index': index,
+            'rows': fit['rows'],
+            'columns': fit['columns'],
+            'chiSquareStatistic': summary['chiSquareStatistic'],
+            'pValue': summary['pValue'],
+            'log10PValue': summary['log10PValue'],
+            'degreesOfFreedom': summary['degreesOfFreedom'],
+            'cramersV': round(fit['cramersV'], 4),
+            'significance': summary['significance'],
+        })
+    return {
+        'mode': 'batch',
+        'tableCount': len(results),
+        'significantCount': sum(1 for r in results if r.get('significance') == 'Significant'),
+        'failedCount': sum(1 for r in results if 'error' in r),
+        'precision': precision.name,
+        'tables': results,
+    }
+
+def chi_square_summary(fit, precision):
+    """Fields shared by every chi-square result"""
+    significance = "Significant" if fit['pValue'] < 0.05 else "Not Significant"
+    return {
+        'chiSquareStatistic': round(fit['statistic'], 4),
+        'pValue': round(fit['pValue'], 6),
+        'log10PValue': round(fit['logPValue'] / math.log(10), 4),
+        'degreesOfFreedom': fit['df'],
+        'significance': significance,
+        'interpretation': f"At α=0.05: {significance} (p={round(fit['pValue'], 4)})",
+        'precision': precision.name,
+    }
+
+def correlation(x_values, y_values, method='pearson', regression=False, extra_predictors=(),
+                precision=EXACT, include_data=True):
+    """Pearson/Spearman/Kendall correlation with an optional least-squares fit"""
+    method = str(method or 'pearson').strip().lower()
+    if method not in CORRELATION_METHODS:
+        raise AnalysisError(f"Unknown correlation method '{method}'. Use one of: {', '.join(CORRELATION_METHODS)}")
+
+    if len(x_values) == 0:
+        raise AnalysisError('X values cannot be empty')
+
+    if len(y_values) == 0:
+        raise AnalysisError('Y values cannot be empty')
+
+    if len(x_values) != len(y_values):
+        raise AnalysisError(f'X ({len(x_values)}) and Y ({len(y_values)}) must have same length')
+
+    if len(x_values) < 2:
+        raise AnalysisError('Need at least 2 data points for correlation')
+
+    for i, predictor in enumerate(extra_predictors):
+        if len(predictor) != len(x_values):
+            raise AnalysisError(f'Predictor {i + 2} ({len(predictor)}) and Y ({len(y_values)}) must have same length')
+
+    # One pass over the data gives Pearson's r and the regression line
+    moments = CoMoments.from_arrays(x_values, y_values, precision)
+
+    if method == 'pearson':
+        correlation_coef, p_value = moments.pearson()
+    else:
+        # Spearman/Kendall share one ranking pass (O(n log n))
+        correlation_coef, p_value = rank_correlation(x_values, y_values, method)
+
+    # Coefficient of determination
+    r_squared = correlation_coef ** 2
+
+    # Determine significance
+    significance = "Significant" if p_value < 0.05 else "Not Significant"
+
+    result = {
+        'n': moments.n,
+        'method': method,
+        'methodLabel': CORRELATION_LABELS[method],
+        'correlationCoefficient': round(correlation_coef, 4),
+        'pValue': round(p_value, 6),
+        'rSquared': round(r_squared, 4),
+        # The mode's own mean (exact: statistics.mean); co-moment means can be an ulp off
+        'meanX': round(precision.mean(x_values), 4),
+        'meanY': round(precision.mean(y_values), 4),
+        'significance': significance,
+        'interpretation': get_correlation_interpretation(correlation_coef, p_value),
+        'precision': precision.name,
+    }
+    if include_data:
+        result['xValues'] = precision.column(x_values)  # Include for charting
+        result['yValues'] = precision.column(y_values)  # Include for charting
+
+    if regression:
+        if extra_predictors:
+            fit = LeastSquares(1 + len(extra_predictors))
+            fit.update(np.column_stack([x_values, *extra_predictors]), y_values)
+            result['regression'] = round_floats(fit.solve())
+        else:
+            result['regression'] = round_floats(moments.linear_fit(band_points=REGRESSION_BAND_POINTS))
+
+    return result
+
+def round_floats(value, digits=4):
+    """Round every float in a (nested) result structure for display"""
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {k: round_floats(v, digits) for k, v in value.items()}
+    if isinstance(value, list):
+        return [round_floats(v, digits) for v in value]
+    return value
+
+def get_correlation_interpretation(r, p_value):
+    r_abs = abs(r)
+    if r_abs >= 0.9:
+        strength = "Very strong"
+    elif r_abs >= 0.7:
+        strength = "Strong"
+    elif r_abs >= 0.5:
+        strength = "Moderate"
+    elif r_abs >= 0.3:
+        strength = "Weak"
+    else:
+        strength = "Very weak"
+
+    direction = "positive" if r > 0 else "negative" if r < 0 else "no"
+    sig_text = "significant" if p_value < 0.05 else "not significant"
+
+    return f"{strength} {direction} correlation ({sig_text} at α=0.05, p={round(p_value, 4)})"
@@ -0,0 +1,315 @@
+"""Run the calculator's analyses over many CSV files without the web server.
+
+Files are laid out exactly as for the upload endpoints (see
+CSV_UPLOAD_GUIDE.md) and analysed by the same code as app.py (analyses.py)
+in a pool of worker processes. Results are streamed to the output as each
+file finishes, one record per file:
+
+    {"input": ..., "status": "ok" | "error", "bytes": ..., "seconds": ...,
+     "result": {...} | "error": "..."}
+
+Completed inputs are appended to a manifest (<output>.manifest by
+default). Re-running the same command skips files already in the manifest
+with the same size, modification time, analysis and options, and appends
+to the output, so an interrupted run resumes where it stopped; files
+analysed with another analysis or other options are analysed again. A record is written to the
+output before its manifest entry, so a crash between the two can repeat
+at most that record.
+
+Usage:
+    python batch.py data/ --analysis descriptive --workers 8 --output results.jsonl
+    python batch.py 'nightly/**/*.csv' --analysis correlation --method spearman --format csv --output results.csv
+    python batch.py data/ --analysis ttest --restart
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from analyses import ANALYSES, CORRELATION_METHODS, analyze_csv
+from precision import DEFAULT_PRECISION, PRECISION_MODES, get_precision
+from robust import DEFAULT_TRIM
+
+OUTPUT_FORMATS = ('jsonl', 'csv')
+RECORD_FIELDS = ['input', 'status', 'bytes', 'seconds', 'error']
+
+
+def discover_inputs(patterns):
+    """CSV files from directories (searched recursively) and glob patterns, sorted"""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '**', '*.csv'), recursive=True)
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        found.update(os.path.abspath(path) for path in matches if os.path.isfile(path))
+    return sorted(found)
+
+
+def run_file(path, analysis, options):
+    """Analyse one file; runs in a worker process and never raises"""
+    start = time.perf_counter()
+    record = {'input': path, 'bytes': os.path.getsize(path)}
+    try:
+        with open(path, encoding='utf-8') as f:
+            csv_content = f.read()
+        record['result'] = analyze_csv(analysis, csv_content, get_precision(options['precision']),
+                                       method=options['method'], regression=options['regression'],
+                                       robust=options['robust'], trim=options['trim'], include_data=False)
+        record['status'] = 'ok'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f'{type(e).__name__}: {e}'
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def options_signature(analysis, options):
+    """The analysis and its normalized options, as stored with each manifest entry"""
+    return json.dumps({'analysis': analysis,
+                       'precision': str(options['precision']).strip().lower(),
+                       'method': str(options['method']).strip().lower(),
+                       'regression': bool(options['regression']),
+                       'robust': bool(options['robust']),
+                       'trim': float(options['trim'])}, sort_keys=True)
+
+
+class Manifest:
+    """Append-only log of finished inputs, keyed by path, size and mtime, with the options used."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from an interrupted run
+                    self.entries[entry['input']] = entry
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def is_done(self, path, options, retry_errors=False):
+        """Whether path is unchanged since it was analysed with these options (see options_signature)"""
+        entry = self.entries.get(path)
+        if entry is None or entry.get('options') != options or (retry_errors and entry['status'] != 'ok'):
+            return False
+        return (entry['bytes'], entry['mtimeNs']) == self.signature(path)
+
+    def record(self, record, options):
+        entry = {'input': record['input'], 'status': record['status'], 'bytes': record['bytes'],
+                 'mtimeNs': self.signature(record['input'])[1], 'options': options}
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[entry['input']] = entry
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter:
+    """One JSON record per line."""
+
+    def __init__(self, path, append):
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record):
+        """Write a record; returns the records now on disk."""
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+        return [record]
+
+    def close(self):
+        self._file.close()
+        return []
+
+
+class CsvWriter:
+    """Flat table: one row per file, one column per scalar result field.
+
+    Nested fields become dotted columns (regression.slope); list fields are
+    left out. Columns are fixed by the first successful record, or by the
+    header of the file being appended to; failures seen before that are held
+    back until the header is known.
+    """
+
+    def __init__(self, path, append):
+        self.fields = None
+        if append and os.path.exists(path) and os.path.getsize(path):
+            with open(path, newline='', encoding='utf-8') as f:
+                self.fields = next(csv.reader(f), None)
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = None
+        self._held = []
+
+    def write(self, record):
+        """Write a record; returns the records now on disk."""
+        if self._writer is None:
+            if self.fields is None and 'result' not in record:
+                self._held.append(record)
+                return []
+            self._start(self.fields or self.row_fields(record))
+        written = self._held + [record]
+        self._held = []
+        for item in written:
+            self._writer.writerow(self.row(item))
+        self._file.flush()
+        return written
+
+    def close(self):
+        """Flush held-back failures (with a minimal header) and close."""
+        if self._held:
+            if self._writer is None:
+                self._start(self.fields or RECORD_FIELDS)
+            for item in self._held:
+                self._writer.writerow(self.row(item))
+        self._file.close()
+        return self._held
+
+    def _start(self, fields):
+        write_header = self.fields is None
+        self.fields = fields
+        self._writer = csv.DictWriter(self._file, fields, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+
+    @staticmethod
+    def row(record):
+        row = {key: record.get(key) for key in RECORD_FIELDS}
+        row.update(flatten(record.get('result', {})))
+        return row
+
+    def row_fields(self, record):
+        return RECORD_FIELDS + [key for key in self.row(record) if key not in RECORD_FIELDS]
+
+
+def flatten(value, prefix=''):
+    """Scalar leaves of a nested dict as {'a.b': value}"""
+    flat = {}
+    for key, item in value.items():
+        name = f'{prefix}{key}'
+        if isinstance(item, dict):
+            flat.update(flatten(item, name + '.'))
+        elif not isinstance(item, list):
+            flat[name] = item
+    return flat
+
+
+def run_batch(inputs, analysis, output, output_format='jsonl', manifest_path=None, workers=None,
+              options=None, restart=False, retry_errors=False, progress_seconds=5.0, log=sys.stderr):
+    """Analyse `inputs` in a process pool, streaming records to `output`.
+
+    Returns a summary dict with counts and throughput.
+    """
+    options = {'precision': DEFAULT_PRECISION, 'method': 'pearson', 'regression': False,
+               'robust': False, 'trim': DEFAULT_TRIM, **(options or {})}
+    manifest_path = manifest_path or output + '.manifest'
+    if restart and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    manifest = Manifest(manifest_path)
+    signature = options_signature(analysis, options)
+    pending = [path for path in inputs if not manifest.is_done(path, signature, retry_errors)]
+    append = bool(manifest.entries)
+    writer = (CsvWriter if output_format == 'csv' else JsonlWriter)(output, append)
+
+    workers = workers or os.cpu_count() or 1
+    summary = {'inputs': len(inputs), 'skipped': len(inputs) - len(pending), 'processed': 0,
+               'failed': 0, 'bytes': 0}
+    start = last_report = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            queue = iter(pending)
+            running = set()
+            while True:
+                # Keep a bounded window of submitted files so results stream out
+                for path in queue:
+                    running.add(pool.submit(run_file, path, analysis, options))
+                    if len(running) >= workers * 4:
+                        break
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    for written in writer.write(record):
+                        manifest.record(written, signature)
+                    summary['processed'] += 1
+                    summary['failed'] += record['status'] != 'ok'
+                    summary['bytes'] += record['bytes']
+
+                now = time.perf_counter()
+                if log and now - last_report >= progress_seconds:
+                    last_report = now
+                    print(format_progress(summary, now - start, len(pending)), file=log)
+    finally:
+        for written in writer.close():
+            manifest.record(written, signature)
+        manifest.close()
+
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = round(elapsed, 3)
+    summary['filesPerSecond'] = round(summary['processed'] / elapsed, 2) if elapsed > 0 else 0.0
+    summary['mbPerSecond'] = round(summary['bytes'] / 1e6 / elapsed, 3) if elapsed > 0 else 0.0
+    return summary
+
+
+def format_progress(summary, elapsed, total):
+    rate = summary['processed'] / elapsed if elapsed > 0 else 0.0
+    mb_rate = summary['bytes'] / 1e6 / elapsed if elapsed > 0 else 0.0
+    return (f"{summary['processed']}/{total} files, {summary['failed']} failed, "
+            f"{rate:.1f} files/s, {mb_rate:.2f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an analysis over many CSV files.')
+    parser.add_argument('inputs', nargs='+', help='directories or glob patterns of CSV files')
+    parser.add_argument('--analysis', required=True, choices=ANALYSES)
+    parser.add_argument('--method', default='pearson', choices=CORRELATION_METHODS,
+                        help='correlation method')
+    parser.add_argument('--regression', action='store_true', help='include the regression fit (correlation)')
+    parser.add_argument('--robust', action='store_true',
+                        help='add quartiles, MAD, trimmed means and outlier counts (descriptive)')
+    parser.add_argument('--trim', type=float, default=DEFAULT_TRIM,
+                        help=f'proportion trimmed from each end for the trimmed means (default {DEFAULT_TRIM})')
+    parser.add_argument('--precision', default=DEFAULT_PRECISION, choices=PRECISION_MODES)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--output', default=None, help='output file (default: results.<format>)')
+    parser.add_argument('--format', default='jsonl', choices=OUTPUT_FORMATS)
+    parser.add_argument('--manifest', default=None, help='manifest of finished inputs (default: <output>.manifest)')
+    parser.add_argument('--restart', action='store_true', help='ignore the manifest and start over')
+    parser.add_argument('--retry-errors', action='store_true', help='re-run inputs that failed last time')
+    parser.add_argument('--progress-seconds', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.trim < 0.5:
+        parser.error('--trim must be at least 0 and less than 0.5')
+    inputs = discover_inputs(args.inputs)
+    if not inputs:
+        parser.error('no CSV files matched')
+    output = args.output or f'results.{args.format}'
+
+    summary = run_batch(inputs, args.analysis, output, args.format, args.manifest, args.workers,
+                        {'precision': args.precision, 'method': args.method, 'regression': args.regression,
+                         'robust': args.robust, 'trim': args.trim},
+                        restart=args.restart, retry_errors=args.retry_errors,
+                        progress_seconds=args.progress_seconds)
+    print(f"{summary['processed']} files analysed ({summary['skipped']} already done, "
+          f"{summary['failed']} failed) in {summary['seconds']}s: "
+          f"{summary['filesPerSecond']} files/s, {summary['mbPerSecond']} MB/s -> {output}", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Scaling benchmark for Pearson, Spearman and Kendall correlation.
+
+Times each method at increasing n and reports the empirical growth
+exponent between successive sizes (1.0 = linear, ~1.1 = n log n,
+2.0 = quadratic).
+
+Usage:
+    python benchmarks/bench_rank_correlation.py
+    python benchmarks/bench_rank_correlation.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import stats
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rank_correlation import rank_correlation  # noqa: E402
+
+METHODS = {
+    'pearson': lambda x, y: stats.pearsonr(x, y),
+    'spearman': lambda x, y: rank_correlation(x, y, 'spearman'),
+    'kendall': lambda x, y: rank_correlation(x, y, 'kendall'),
+}
+
+
+def time_call(fn, x, y, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(x, y)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--ties', action='store_true',
+                        help='round inputs so that many values are tied')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'method':<10}{'n':>10}{'seconds':>12}{'exponent':>10}")
+    for name, fn in METHODS.items():
+        previous = None
+        for n in args.sizes:
+            x = rng.lognormal(size=n)
+            y = x + rng.lognormal(size=n)
+            if args.ties:
+                x = np.round(x, 1)
+                y = np.round(y, 1)
+            seconds = time_call(fn, x, y, args.repeat)
+            exponent = ''
+            if previous is not None:
+                exponent = f"{math.log(seconds / previous[1]) / math.log(n / previous[0]):.2f}"
+            print(f"{name:<10}{n:>10}{seconds:>12.4f}{exponent:>10}")
+            previous = (n, seconds)
+
+
+if __name__ == '__main__':
+    main()
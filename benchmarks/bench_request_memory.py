@@ -0,0 +1,123 @@
+"""Per-request peak memory of the analysis endpoints.
+
+Posts each analysis through the Flask test client (no server, no cache
+hits) and records the tracemalloc peak while the request is handled:
+parsing, the analysis and encoding the JSON response. Python objects and
+numpy buffers are both traced, so this is the memory a request needs on
+top of what the worker already holds; the request body itself (built
+before tracing starts) is not counted.
+
+Usage:
+    python benchmarks/bench_request_memory.py
+    python benchmarks/bench_request_memory.py --sizes 10000 1000000 --output after.json
+    python benchmarks/bench_request_memory.py --compare before.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http_cache  # noqa: E402
+from app import app  # noqa: E402
+
+ENDPOINTS = {
+    'descriptive': '/api/descriptive-stats',
+    'ttest': '/api/t-test',
+    'chisquare': '/api/chi-square',
+    'correlation': '/api/correlation',
+}
+
+
+def payload_text(analysis, n, rng):
+    """The form's text input for an analysis with n values per row"""
+    values = np.round(rng.normal(50, 10, n), 3)
+    line = ', '.join(map(str, values.tolist()))
+    if analysis == 'descriptive':
+        return line
+    if analysis == 'ttest':
+        return f'{line}\n50'
+    expected = ', '.join(map(str, np.round(rng.normal(50, 10, n), 3).tolist()))
+    return f'{line}\n{expected}'
+
+
+def measure(client, analysis, source, text, precision):
+    """(peak bytes, seconds) for one uncached request"""
+    http_cache.result_cache.clear()
+    if source == 'json':
+        kwargs = {'json': {'data': text, 'precision': precision}}
+    else:
+        body = text.replace(', ', ',').encode('utf-8')
+        kwargs = {'data': {'file': (BytesIO(body), 'data.csv'), 'precision': precision},
+                  'content_type': 'multipart/form-data'}
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.post(ENDPOINTS[analysis], **kwargs)
+    response.get_data()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if response.status_code != 200:
+        raise RuntimeError(f'{analysis}/{source}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}')
+    return peak, seconds
+
+
+def run(sizes, analyses, sources, precisions):
+    app.config['TESTING'] = True
+    client = app.test_client()
+    rng = np.random.default_rng(7)
+    results = []
+    for n in sizes:
+        for analysis in analyses:
+            text = payload_text(analysis, n, rng)
+            for source in sources:
+                for precision in precisions:
+                    peak, seconds = measure(client, analysis, source, text, precision)
+                    results.append({'analysis': analysis, 'source': source, 'precision': precision,
+                                    'n': n, 'peakBytes': peak, 'bytesPerValue': round(peak / n, 1),
+                                    'seconds': round(seconds, 4)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--analyses', nargs='+', default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument('--sources', nargs='+', default=['json', 'csv'], choices=['json', 'csv'])
+    parser.add_argument('--precisions', nargs='+', default=['exact', 'float64'])
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--compare', help='results JSON of an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.analyses, args.sources, args.precisions)
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = {(r['analysis'], r['source'], r['precision'], r['n']): r for r in json.load(f)}
+
+    print(f"{'analysis':<13}{'source':<7}{'precision':<10}{'n':>9}{'peak MB':>10}{'B/value':>9}{'seconds':>9}"
+          + (f"{'before MB':>11}{'change':>9}" if baseline else ''))
+    for r in results:
+        line = (f"{r['analysis']:<13}{r['source']:<7}{r['precision']:<10}{r['n']:>9}"
+                f"{r['peakBytes'] / 1e6:>10.1f}{r['bytesPerValue']:>9.1f}{r['seconds']:>9.3f}")
+        before = baseline.get((r['analysis'], r['source'], r['precision'], r['n']))
+        if before:
+            change = (r['peakBytes'] - before['peakBytes']) / before['peakBytes'] * 100
+            line += f"{before['peakBytes'] / 1e6:>11.1f}{change:>+8.0f}%"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Scaling benchmark for robust statistics (selection vs sorting).
+
+Times robust.robust_statistics, which selects order statistics by
+partitioning, against the same summary computed from a full sort, at
+increasing n, and reports the growth exponent between sizes
+(1.0 = linear).
+
+Usage:
+    python benchmarks/bench_robust.py
+    python benchmarks/bench_robust.py --sizes 100000 1000000 10000000 --precision float32
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from column import NumericColumn  # noqa: E402
+from precision import PRECISION_MODES, get_precision  # noqa: E402
+from robust import robust_statistics  # noqa: E402
+
+
+def selection(values, precision):
+    return robust_statistics(NumericColumn(values), precision)
+
+
+def sorting(values, precision):
+    column = NumericColumn(values)
+    column.sorted()
+    return robust_statistics(column, precision)
+
+
+METHODS = {'selection': selection, 'sort': sorting}
+
+
+def time_call(fn, values, precision, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(values, precision)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000, 10000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--precision', default='float64', choices=PRECISION_MODES)
+    args = parser.parse_args()
+
+    precision = get_precision(args.precision)
+    rng = np.random.default_rng(42)
+    print(f"{'method':<10}{'n':>10}{'seconds':>12}{'exponent':>10}")
+    for name, fn in METHODS.items():
+        previous = None
+        for n in args.sizes:
+            values = rng.standard_t(3, size=n).astype(precision.dtype)
+            seconds = time_call(fn, values, precision, args.repeat)
+            exponent = ''
+            if previous is not None:
+                exponent = f"{math.log(seconds / previous[1]) / math.log(n / previous[0]):.2f}"
+            print(f"{name:<10}{n:>10}{seconds:>12.4f}{exponent:>10}")
+            previous = (n, seconds)
+
+
+if __name__ == '__main__':
+    main()
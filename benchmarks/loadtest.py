@@ -0,0 +1,548 @@
+"""End-to-end HTTP load test for the calculator.
+
+Starts the app under gunicorn (or targets an already running server),
+replays a weighted mix of requests against the four analysis endpoints
+(JSON vs CSV upload, small vs large payloads) from concurrent clients,
+and writes a machine-readable JSON report with throughput, latency
+percentiles, error rate and per-worker RSS. Only the standard library and
+gunicorn are needed.
+
+Usage:
+    python benchmarks/loadtest.py --workers 4 --worker-class sync --duration 30
+    python benchmarks/loadtest.py --worker-class gthread --threads 8 --output gthread.json
+    python benchmarks/loadtest.py --worker-class gthread --threads 16 --serving-mode pool --pool-workers 3
+    python benchmarks/loadtest.py --target http://127.0.0.1:5000 --duration 10
+    python benchmarks/loadtest.py --compare baseline.json --slo p95=250,p99=800,error_rate=0.01
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ENDPOINTS = {
+    'descriptive': '/api/descriptive-stats',
+    'ttest': '/api/t-test',
+    'chisquare': '/api/chi-square',
+    'correlation': '/api/correlation',
+}
+SIZES = {'small': 50, 'large': 20000}
+
+# Default mix: mostly small interactive JSON requests, some uploads and large inputs
+DEFAULT_MIX = {
+    'descriptive/json/small': 20,
+    'ttest/json/small': 15,
+    'chisquare/json/small': 10,
+    'correlation/json/small': 15,
+    'descriptive/csv/small': 5,
+    'correlation/csv/small': 5,
+    'descriptive/json/large': 8,
+    'ttest/csv/large': 5,
+    'chisquare/json/large': 4,
+    'correlation/json/large': 8,
+    'correlation/csv/large': 5,
+}
+
+
+# ===== Payloads =====
+
+def make_rows(analysis, size, rng):
+    """Rows of numbers in the layout each endpoint expects."""
+    if analysis == 'descriptive':
+        return [[round(rng.gauss(100, 15), 3) for _ in range(size)]]
+    if analysis == 'ttest':
+        return [[round(rng.gauss(100, 15), 3) for _ in range(size)], [100.0]]
+    if analysis == 'chisquare':
+        categories = max(2, min(size, 500))
+        observed = [rng.randint(5, 50) for _ in range(categories)]
+        return [observed, [1.0] * categories]
+    xs = [round(rng.uniform(0, 100), 3) for _ in range(size)]
+    return [xs, [round(2 * x + rng.gauss(0, 10), 3) for x in xs]]
+
+
+def encode_request(analysis, fmt, rows):
+    """(path, body, content_type) for one request."""
+    path = ENDPOINTS[analysis]
+    if fmt == 'json':
+        if analysis == 'ttest':
+            # T-test CSV layout is "sample..., mean"; JSON layout is two lines
+            text = ', '.join(map(str, rows[0])) + '\n' + str(rows[1][0])
+        else:
+            text = '\n'.join(', '.join(map(str, row)) for row in rows)
+        return path, json.dumps({'data': text}).encode('utf-8'), 'application/json'
+
+    if analysis == 'ttest':
+        csv_text = ','.join(map(str, rows[0] + rows[1]))
+    else:
+        csv_text = '\n'.join(','.join(map(str, row)) for row in rows)
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="data.csv"\r\n'
+            f'Content-Type: text/csv\r\n\r\n{csv_text}\r\n'
+            f'--{boundary}--\r\n').encode('utf-8')
+    return path, body, f'multipart/form-data; boundary={boundary}'
+
+
+def build_payload_pool(mix, distinct, seed):
+    """Pre-generate `distinct` different payloads per scenario.
+
+    Distinct payloads keep the result cache and request coalescing from
+    turning the whole run into cache hits; use --distinct 1 to measure
+    the fully cached path instead.
+    """
+    rng = random.Random(seed)
+    pool = {}
+    for scenario in mix:
+        analysis, fmt, size = parse_scenario(scenario)
+        pool[scenario] = [encode_request(analysis, fmt, make_rows(analysis, SIZES[size], rng))
+                          for _ in range(distinct)]
+    return pool
+
+
+def parse_scenario(scenario):
+    analysis, fmt, size = scenario.split('/')
+    if analysis not in ENDPOINTS or fmt not in ('json', 'csv') or size not in SIZES:
+        raise ValueError(f"Bad scenario '{scenario}' (expected <analysis>/<json|csv>/<small|large>)")
+    return analysis, fmt, size
+
+
+def parse_mix(text):
+    """'descriptive/json/small=5,correlation/csv/large=1' or a JSON file path."""
+    if text is None:
+        return dict(DEFAULT_MIX)
+    if os.path.isfile(text):
+        with open(text, encoding='utf-8') as f:
+            mix = json.load(f)
+    else:
+        mix = {}
+        for part in text.split(','):
+            scenario, _, weight = part.partition('=')
+            mix[scenario.strip()] = float(weight or 1)
+    for scenario in mix:
+        parse_scenario(scenario)
+    return mix
+
+
+# ===== Statistics =====
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, elapsed):
+    """Aggregate (latency_seconds, ok[, rejected]) samples into report fields.
+
+    Requests rejected by admission control (429) are errors, and are also
+    counted on their own.
+    """
+    latencies = sorted(sample[0] * 1000.0 for sample in samples)
+    errors = sum(1 for sample in samples if not sample[1])
+    rejected = sum(1 for sample in samples if len(sample) > 2 and sample[2])
+    count = len(samples)
+    return {
+        'requests': count,
+        'errors': errors,
+        'errorRate': round(errors / count, 6) if count else 0.0,
+        'rejected': rejected,
+        'rejectRate': round(rejected / count, 6) if count else 0.0,
+        'throughputRps': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        'latencyMs': {
+            'mean': round(sum(latencies) / count, 3) if count else None,
+            'p50': _round(percentile(latencies, 50)),
+            'p95': _round(percentile(latencies, 95)),
+            'p99': _round(percentile(latencies, 99)),
+            'max': _round(latencies[-1] if latencies else None),
+        },
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def parse_slo(text):
+    """'p95=250,p99=800,error_rate=0.01' -> dict of limits."""
+    limits = {}
+    if not text:
+        return limits
+    for part in text.split(','):
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name not in ('p50', 'p95', 'p99', 'error_rate'):
+            raise ValueError(f"Unknown SLO '{name}' (use p50, p95, p99, error_rate)")
+        limits[name] = float(value)
+    return limits
+
+
+def evaluate_slo(overall, limits):
+    """Compare the overall summary against SLO limits."""
+    checks = {}
+    for name, limit in limits.items():
+        actual = overall['errorRate'] if name == 'error_rate' else overall['latencyMs'][name]
+        checks[name] = {'limit': limit, 'actual': actual,
+                        'passed': actual is not None and actual <= limit}
+    return {'passed': all(c['passed'] for c in checks.values()), 'checks': checks}
+
+
+# ===== Server management =====
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port, log_file):
+    """Start gunicorn on port, with its stderr (including the app's log records) written to log_file.
+
+    A pipe would be read only at startup: once full, it would block the
+    app's log writer for the rest of the run.
+    """
+    command = [sys.executable, '-m', 'gunicorn', 'wsgi:app',
+               '--bind', f'127.0.0.1:{port}',
+               '--workers', str(args.workers),
+               '--worker-class', args.worker_class,
+               '--threads', str(args.threads),
+               '--timeout', str(args.server_timeout),
+               '--log-level', 'warning']
+    env = dict(os.environ, SERVING_MODE=args.serving_mode)
+    if args.pool_workers:
+        env['POOL_WORKERS'] = str(args.pool_workers)
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log_file)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log_file.seek(0)
+            raise RuntimeError('gunicorn exited: ' + log_file.read().decode('utf-8', 'replace')[-4000:])
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start listening within 30s')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def process_parents():
+    """Parent pid of every process (Linux /proc)."""
+    parents = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            parents[int(entry)] = int(fields[1])
+    except OSError:
+        pass
+    return parents
+
+
+def child_pids(pid, parents=None):
+    """Direct children of pid: the workers of a gunicorn master."""
+    parents = process_parents() if parents is None else parents
+    return sorted(child for child, parent in parents.items() if parent == pid)
+
+
+def descendant_pids(pid, parents=None):
+    """Every process below pid (children, grandchildren, ...)."""
+    parents = process_parents() if parents is None else parents
+    found, frontier = [], [pid]
+    while frontier:
+        children = [child for child, parent in parents.items() if parent in frontier]
+        found.extend(children)
+        frontier = children
+    return sorted(found)
+
+
+def rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler(threading.Thread):
+    """Samples the RSS of every gunicorn worker while the test runs.
+
+    Processes below the workers (the forkserver and compute-pool processes
+    of the pool serving mode) are sampled too and reported as `pool`.
+    """
+
+    def __init__(self, master_pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peak = {}
+        self.last = {}
+        self.pool_pids = set()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+        self.sample()
+
+    def sample(self):
+        parents = process_parents()
+        workers = child_pids(self.master_pid, parents)
+        pool = [pid for worker in workers for pid in descendant_pids(worker, parents)]
+        self.pool_pids.update(pool)
+        for pid in workers + pool:
+            value = rss_kb(pid)
+            if value is not None:
+                self.last[pid] = value
+                self.peak[pid] = max(value, self.peak.get(pid, 0))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def report(self):
+        if not self.peak:
+            return {'available': False}
+        entries = {pid: {'pid': pid, 'peakRssMb': round(self.peak[pid] / 1024, 1),
+                         'finalRssMb': round(self.last[pid] / 1024, 1)} for pid in sorted(self.peak)}
+        workers = [entry for pid, entry in entries.items() if pid not in self.pool_pids]
+        pool = [entry for pid, entry in entries.items() if pid in self.pool_pids]
+        report = {
+            'available': True,
+            'workers': workers,
+            'maxPeakRssMb': max((w['peakRssMb'] for w in workers), default=None),
+            'totalFinalRssMb': round(sum(w['finalRssMb'] for w in workers), 1),
+        }
+        if pool:
+            report['pool'] = {
+                'processes': pool,
+                'maxPeakRssMb': max(p['peakRssMb'] for p in pool),
+                'totalFinalRssMb': round(sum(p['finalRssMb'] for p in pool), 1),
+            }
+        return report
+
+
+# ===== Load generation =====
+
+def run_load(host, port, pool, mix, concurrency, duration, max_requests, timeout, seed):
+    """Drive the server with `concurrency` keep-alive clients."""
+    scenarios = list(mix)
+    weights = [mix[s] for s in scenarios]
+    samples = {scenario: [] for scenario in scenarios}
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.monotonic() + duration
+
+    def take_ticket():
+        with lock:
+            if max_requests and issued[0] >= max_requests:
+                return False
+            issued[0] += 1
+            return True
+
+    def client(index):
+        rng = random.Random(seed + index)
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        local = {scenario: [] for scenario in scenarios}
+        while time.monotonic() < deadline and take_ticket():
+            scenario = rng.choices(scenarios, weights)[0]
+            path, body, content_type = rng.choice(pool[scenario])
+            start = time.perf_counter()
+            ok = rejected = False
+            try:
+                connection.request('POST', path, body=body,
+                                   headers={'Content-Type': content_type, 'Accept-Encoding': 'identity'})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+                rejected = response.status == 429
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=timeout)
+            local[scenario].append((time.perf_counter() - start, ok, rejected))
+        connection.close()
+        with lock:
+            for scenario, values in local.items():
+                samples[scenario].extend(values)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def compare_reports(current, baseline):
+    """Relative change of the headline numbers against a previous report."""
+    def delta(new, old):
+        if new is None or old in (None, 0):
+            return None
+        return round((new - old) / old * 100.0, 1)
+
+    now, before = current['overall'], baseline['overall']
+    return {
+        'baselineConfig': baseline.get('config'),
+        'throughputRpsChangePct': delta(now['throughputRps'], before['throughputRps']),
+        'p50ChangePct': delta(now['latencyMs']['p50'], before['latencyMs']['p50']),
+        'p95ChangePct': delta(now['latencyMs']['p95'], before['latencyMs']['p95']),
+        'p99ChangePct': delta(now['latencyMs']['p99'], before['latencyMs']['p99']),
+        'errorRateChange': round(now['errorRate'] - before['errorRate'], 6),
+    }
+
+
+def print_summary(report):
+    overall = report['overall']
+    lat = overall['latencyMs']
+    print(f"{'scenario':<26}{'reqs':>7}{'err%':>7}{'429%':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = list(report['scenarios'].items()) + [('OVERALL', overall)]
+    for name, s in rows:
+        ms = s['latencyMs']
+        print(f"{name:<26}{s['requests']:>7}{s['errorRate'] * 100:>7.2f}{s['rejectRate'] * 100:>7.2f}"
+              f"{_fmt(ms['p50']):>9}{_fmt(ms['p95']):>9}{_fmt(ms['p99']):>9}")
+    print(f"\nthroughput: {overall['throughputRps']} req/s   p50/p95/p99: "
+          f"{_fmt(lat['p50'])}/{_fmt(lat['p95'])}/{_fmt(lat['p99'])} ms   errors: {overall['errorRate'] * 100:.2f}%")
+    memory = report['memory']
+    if memory.get('available'):
+        print(f"workers: {len(memory['workers'])}   max peak RSS: {memory['maxPeakRssMb']} MB")
+        if 'pool' in memory:
+            pool = memory['pool']
+            print(f"pool processes: {len(pool['processes'])}   max peak RSS: {pool['maxPeakRssMb']} MB"
+                  f"   total final RSS: {pool['totalFinalRssMb']} MB")
+    if 'slo' in report:
+        print('SLO: ' + ('PASS' if report['slo']['passed'] else 'FAIL'))
+    if 'comparison' in report:
+        c = report['comparison']
+        print(f"vs baseline: throughput {c['throughputRpsChangePct']}%  p95 {c['p95ChangePct']}%  p99 {c['p99ChangePct']}%")
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', help='URL of a running server (skips starting gunicorn)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class (sync, gthread, ...)')
+    parser.add_argument('--threads', type=int, default=1, help='threads per worker (gthread)')
+    parser.add_argument('--server-timeout', type=int, default=120)
+    parser.add_argument('--serving-mode', default='inline', choices=('inline', 'pool'),
+                        help='SERVING_MODE of the started server (see serving.py)')
+    parser.add_argument('--pool-workers', type=int, default=0, help='POOL_WORKERS for the pool mode (0 = default)')
+    parser.add_argument('--server-log', help="file for the started server's stderr and log records (default: discarded)")
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent client connections')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='stop after this many requests (0 = no limit)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request client timeout')
+    parser.add_argument('--mix', help="weights like 'descriptive/json/small=5,correlation/csv/large=1' or a JSON file")
+    parser.add_argument('--distinct', type=int, default=50, help='distinct payloads per scenario')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--slo', help="limits like 'p95=250,p99=800,error_rate=0.01' (ms / fraction)")
+    parser.add_argument('--compare', help='previous JSON report to compare against')
+    parser.add_argument('--output', default='loadtest-report.json')
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    slo = parse_slo(args.slo)
+    pool = build_payload_pool(mix, max(1, args.distinct), args.seed)
+
+    process = None
+    sampler = None
+    server_log = None
+    if args.target:
+        parts = urlsplit(args.target)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        server_log = open(args.server_log, 'w+b') if args.server_log else tempfile.TemporaryFile()
+        try:
+            process = start_server(args, port, server_log)
+        except BaseException:
+            server_log.close()
+            raise
+        sampler = RssSampler(process.pid)
+        sampler.start()
+
+    try:
+        samples, elapsed = run_load(host, port, pool, mix, args.concurrency, args.duration,
+                                    args.requests, args.timeout, args.seed)
+    finally:
+        if sampler:
+            sampler.stop()
+        if process:
+            stop_server(process)
+        if server_log:
+            server_log.close()
+
+    all_samples = [sample for values in samples.values() for sample in values]
+    report = {
+        'config': {
+            'target': args.target,
+            'workers': None if args.target else args.workers,
+            'workerClass': None if args.target else args.worker_class,
+            'threads': None if args.target else args.threads,
+            'servingMode': None if args.target else args.serving_mode,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'distinctPayloads': args.distinct,
+            'mix': mix,
+            'sizes': SIZES,
+            'seed': args.seed,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        'elapsedSeconds': round(elapsed, 3),
+        'overall': summarize(all_samples, elapsed),
+        'scenarios': {scenario: summarize(values, elapsed) for scenario, values in samples.items()},
+        'memory': sampler.report() if sampler else {'available': False},
+    }
+    if slo:
+        report['slo'] = evaluate_slo(report['overall'], slo)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['comparison'] = compare_reports(report, json.load(f))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print_summary(report)
+    print(f'\nreport written to {args.output}')
+    return 0 if report.get('slo', {}).get('passed', True) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Fingerprint and precompress static assets.
+
+Copies every .js/.css file in static/ to static/dist/ as
+<name>.<contenthash>.<ext>, writes gzip (and brotli, when the `brotli`
+package is installed) variants next to it, and records the mapping in
+static/dist/manifest.json for `asset_url()` in the templates.
+
+Run once per deploy, before starting the server:
+    python build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants are always produced
+    brotli = None
+
+from http_cache import DIST_DIR, MANIFEST_NAME
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_EXTENSIONS = ('.js', '.css')
+HASH_LENGTH = 12
+
+
+def fingerprint(content):
+    return hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+
+
+def build(static_folder=STATIC_FOLDER):
+    """Build static/dist and return the manifest dict."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    os.makedirs(dist)
+
+    manifest = {}
+    for name in sorted(os.listdir(static_folder)):
+        source = os.path.join(static_folder, name)
+        if not os.path.isfile(source) or not name.endswith(ASSET_EXTENSIONS):
+            continue
+
+        with open(source, 'rb') as f:
+            content = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{fingerprint(content)}{ext}'
+
+        with open(os.path.join(dist, hashed), 'wb') as f:
+            f.write(content)
+        # mtime=0 keeps the gzip output byte-for-byte reproducible
+        with open(os.path.join(dist, hashed + '.gz'), 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(os.path.join(dist, hashed + '.br'), 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+
+        manifest[name] = {'file': hashed, 'size': len(content)}
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == '__main__':
+    built = build()
+    for logical, entry in built.items():
+        print(f"{logical} -> {DIST_DIR}/{entry['file']}")
+    if brotli is None:
+        print('brotli not installed: only gzip variants were written', file=sys.stderr)
@@ -0,0 +1,197 @@
+"""Vectorized chi-square tests: sparse goodness of fit and contingency tables.
+
+* Sparse goodness of fit takes `category:count` pairs. Categories that are
+  not listed have a zero count, so a distribution over 1e6 categories with
+  a handful of non-zero counts costs only the listed entries: with uniform
+  expected counts e, every unlisted category contributes exactly e to the
+  statistic.
+* Contingency tables (R x C independence tests) compute the expected
+  counts from the margins as an outer product.
+* Many tables can be tested at once: tables of the same shape are stacked
+  into one (T, R, C) array so margins, expected counts, statistics and
+  p-values are single array operations per shape.
+
+p-values come from the survival function (chi2.sf) rather than
+1 - chi2.cdf, which rounds to 0 once the cdf is within 1e-16 of 1. The
+natural log of the p-value is reported too; where even chi2.logsf
+underflows it is evaluated from the continued fraction for the upper
+incomplete gamma function, so it stays finite.
+"""
+import math
+
+import numpy as np
+from scipy import special, stats
+
+# Continued-fraction settings for log_upper_gamma_q
+CF_MAX_ITERATIONS = 100000
+CF_TOLERANCE = 1e-15
+CF_TINY = 1e-300
+
+
+class ChiSquareInputError(ValueError):
+    """Counts that cannot be tested (bad shape, zero margins, ...)."""
+
+
+def p_values(statistic, df):
+    """Survival-function p-values and their natural logs (vectorized)."""
+    statistic, df = np.broadcast_arrays(np.asarray(statistic, dtype=np.float64), df)
+    log_p = np.array(stats.chi2.logsf(statistic, df), dtype=np.float64)
+    tail = np.isneginf(log_p) & np.isfinite(statistic)
+    for index in np.argwhere(tail):
+        index = tuple(index)
+        log_p[index] = log_upper_gamma_q(df[index] / 2.0, statistic[index] / 2.0)
+    return stats.chi2.sf(statistic, df), log_p
+
+
+def log_upper_gamma_q(a, x):
+    """log Q(a, x) by the Lentz continued fraction; accurate for x > a + 1."""
+    b = x + 1.0 - a
+    c = 1.0 / CF_TINY
+    d = 1.0 / b
+    h = d
+    for i in range(1, CF_MAX_ITERATIONS):
+        an = -i * (i - a)
+        b += 2.0
+        d = an * d + b
+        d = d if abs(d) > CF_TINY else CF_TINY
+        c = b + an / c
+        c = c if abs(c) > CF_TINY else CF_TINY
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < CF_TOLERANCE:
+            break
+    return -x + a * math.log(x) - special.gammaln(a) + math.log(h)
+
+
+def aggregate_counts(labels, counts):
+    """Sum counts per distinct label; returns (sorted labels, totals)."""
+    labels = np.asarray(labels)
+    categories, inverse = np.unique(labels, return_inverse=True)
+    return categories, np.bincount(inverse, weights=counts, minlength=categories.size)
+
+
+def sparse_goodness_of_fit(labels, counts, expected_labels=None, expected_weights=None, categories=None):
+    """Goodness of fit for sparse `category:count` data.
+
+    Without expected weights every one of the `categories` (default: the
+    distinct listed labels) is equally likely. Expected weights, when
+    given, are relative (rescaled to the observed total) and must cover
+    every category with a non-zero count.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    if counts.size and counts.min() < 0:
+        raise ChiSquareInputError('Counts cannot be negative')
+    observed_labels, observed = aggregate_counts(labels, counts)
+    total = float(observed.sum())
+    if total <= 0:
+        raise ChiSquareInputError('Observed counts must include a positive value')
+
+    if expected_labels is None:
+        k = max(int(categories or 0), observed_labels.size)
+        if k < 2:
+            raise ChiSquareInputError('Need at least 2 categories')
+        expected_count = total / k
+        terms = (observed - expected_count) ** 2 / expected_count
+        # Unlisted categories have o = 0, so each contributes (0 - e)^2 / e = e
+        statistic = float(terms.sum()) + (k - observed_labels.size) * expected_count
+        expected = np.full(observed.size, expected_count)
+        listed_labels, listed_observed = observed_labels, observed
+    else:
+        expected_labels, weights = aggregate_counts(expected_labels, np.asarray(expected_weights, dtype=np.float64))
+        if weights.min() <= 0:
+            raise ChiSquareInputError('Expected weights must be positive values')
+        k = expected_labels.size
+        if categories and int(categories) > k:
+            raise ChiSquareInputError(f'Expected weights cover {k} of {int(categories)} categories')
+        if k < 2:
+            raise ChiSquareInputError('Need at least 2 categories')
+
+        position = np.searchsorted(expected_labels, observed_labels)
+        position = np.minimum(position, k - 1)
+        known = expected_labels[position] == observed_labels
+        unknown = observed_labels[~known & (observed > 0)]
+        if unknown.size:
+            raise ChiSquareInputError(f"No expected weight for category '{unknown[0]}'")
+
+        listed_labels = expected_labels
+        listed_observed = np.zeros(k)
+        np.add.at(listed_observed, position[known], observed[known])
+        expected = weights * (total / weights.sum())
+        terms = (listed_observed - expected) ** 2 / expected
+        statistic = float(terms.sum())
+
+    df = k - 1
+    p_value, log_p = p_values(statistic, df)
+    return {
+        'statistic': statistic,
+        'df': df,
+        'pValue': float(p_value),
+        'logPValue': float(log_p),
+        'categories': k,
+        'nonzeroCategories': int(np.count_nonzero(listed_observed)),
+        'total': total,
+        'labels': listed_labels,
+        'observed': listed_observed,
+        'expected': expected,
+        'contributions': terms,
+    }
+
+
+def contingency_tests(tables):
+    """Independence tests for many R x C tables.
+
+    Tables of equal shape are evaluated together. Returns one dict per
+    table, in input order; a table that cannot be tested gets an 'error'.
+    """
+    tables = [np.asarray(table, dtype=np.float64) for table in tables]
+    results = [None] * len(tables)
+
+    by_shape = {}
+    for index, table in enumerate(tables):
+        if table.ndim != 2 or min(table.shape) < 2:
+            results[index] = {'error': 'A contingency table needs at least 2 rows and 2 columns'}
+        elif table.min() < 0:
+            results[index] = {'error': 'Counts cannot be negative'}
+        else:
+            by_shape.setdefault(table.shape, []).append(index)
+
+    for (rows, columns), indices in by_shape.items():
+        observed = np.stack([tables[i] for i in indices])           # (T, R, C)
+        row_totals = observed.sum(axis=2)                            # (T, R)
+        column_totals = observed.sum(axis=1)                         # (T, C)
+        totals = row_totals.sum(axis=1)                              # (T,)
+        valid = (row_totals > 0).all(axis=1) & (column_totals > 0).all(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected = row_totals[:, :, None] * column_totals[:, None, :] / totals[:, None, None]
+            statistic = ((observed - expected) ** 2 / expected).sum(axis=(1, 2))
+            df = (rows - 1) * (columns - 1)
+            p_value, log_p = p_values(statistic, df)
+            cramers_v = np.sqrt(statistic / (totals * (min(rows, columns) - 1)))
+
+        for position, index in enumerate(indices):
+            if not valid[position]:
+                results[index] = {'error': 'Every row and column needs a non-zero total'}
+                continue
+            results[index] = {
+                'statistic': float(statistic[position]),
+                'df': df,
+                'pValue': float(p_value[position]),
+                'logPValue': float(log_p[position]),
+                'cramersV': float(cramers_v[position]),
+                'rows': rows,
+                'columns': columns,
+                'total': float(totals[position]),
+                'observed': observed[position],
+                'expected': expected[position],
+            }
+    return results
+
+
+def contingency_test(table):
+    """Independence test for a single R x C table."""
+    result = contingency_tests([table])[0]
+    if 'error' in result:
+        raise ChiSquareInputError(result['error'])
+    return result
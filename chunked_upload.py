@@ -0,0 +1,340 @@
+"""Resumable chunked uploads for descriptive statistics on large CSV files.
+
+Protocol (all responses are JSON):
+
+    POST   /api/uploads                   {"precision": "float64", "robust": true, "density": true}   (optional body)
+           -> 201 {"uploadId", "offset": 0, "expiresAt"}
+    PUT    /api/uploads/<id>?offset=<n>   raw bytes of the file from byte n
+           -> 200 {"offset": n + len(chunk), "count"}
+           -> 409 {"error", "offset"} if n is not the next expected byte
+    GET    /api/uploads/<id>              -> {"offset", "count", "finalized", "expiresAt"}
+    POST   /api/uploads/<id>/finalize     -> the /api/descriptive-stats result
+    DELETE /api/uploads/<id>              -> 204
+
+Each chunk is parsed as soon as it arrives (the bytes after the last comma
+or newline are carried over to the next chunk) and folded into running
+moments, so finalizing only has to find the median and mode. Parsed values
+are appended to a binary buffer on disk for that. A client whose connection
+drops asks for the upload's `offset` and continues from there; a chunk
+re-sent after its acknowledgement was lost gets a 409 with the offset to
+continue from.
+
+State lives under UPLOAD_DIR/<id>/ and is removed UPLOAD_TTL seconds after
+the last chunk. Chunked uploads default to float64 precision; `exact`
+works too but recomputes everything with the statistics module at
+finalize time.
+"""
+import base64
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+from flask import jsonify, request, url_for
+
+from analyses import AnalysisError, descriptive, iter_csv_numbers, parse_grid_size, parse_trim
+from column import NumericColumn, dumps
+from precision import EXACT, PRECISION_MODES, get_precision
+from kde import DEFAULT_GRID_SIZE
+from robust import DEFAULT_TRIM
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks for one upload must not arrive concurrently
+    fcntl = None
+
+DEFAULT_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'statcalc-uploads')
+DEFAULT_UPLOAD_TTL = 24 * 60 * 60
+DEFAULT_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+DEFAULT_PRECISION = 'float64'
+
+# Longest run of bytes without a separator that is carried between chunks
+MAX_CARRY_BYTES = 1024 * 1024
+
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """A protocol error, returned to the client with `status`."""
+
+    def __init__(self, message, status=400, **fields):
+        super().__init__(message)
+        self.status = status
+        self.fields = fields
+
+
+class RunningMoments:
+    """Count, sum, mean, M2, min and max merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self, n=0, total=0.0, mean=0.0, m2=0.0, min=float('inf'), max=float('-inf')):
+        self.n = n
+        self.total = total
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    def update(self, values, precision):
+        """Fold a chunk of values (stored in precision.dtype) into the totals."""
+        n = len(values)
+        if n == 0:
+            return self
+        values = precision.as_array(values)
+        total = precision.sum(values)
+        mean = total / n
+        deviations = values - values.dtype.type(mean)
+        drift = precision.sum(deviations)
+        m2 = max(precision.sum(deviations * deviations) - drift * drift / n, 0.0)
+
+        combined = self.n + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.n * n / combined
+        self.mean += delta * n / combined
+        self.total += total
+        self.n = combined
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class UploadStore:
+    """Upload state on local disk: state.json plus a buffer of parsed values."""
+
+    def __init__(self, directory=DEFAULT_UPLOAD_DIR, ttl=DEFAULT_UPLOAD_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, upload_id, name=''):
+        if not UPLOAD_ID.match(upload_id):
+            raise UploadError('Upload not found or expired', 404)
+        return os.path.join(self.directory, upload_id, name)
+
+    def create(self, precision, robust=False, trim=DEFAULT_TRIM, density=False, grid_size=DEFAULT_GRID_SIZE):
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._path(upload_id))
+        state = {'precision': precision.name, 'offset': 0, 'carry': '', 'valuesBytes': 0,
+                 'moments': RunningMoments().to_dict(), 'result': None, 'robust': robust, 'trim': trim,
+                 'density': density, 'gridSize': grid_size}
+        self._save(upload_id, state)
+        return upload_id, state
+
+    @contextmanager
+    def locked(self, upload_id):
+        """Load an upload's state with an exclusive lock held."""
+        lock_path = self._path(upload_id, 'lock')
+        try:
+            lock_file = open(lock_path, 'a+b')
+        except FileNotFoundError:
+            raise UploadError('Upload not found or expired', 404)
+        with lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield self.load(upload_id)
+
+    def load(self, upload_id):
+        try:
+            with open(self._path(upload_id, 'state.json'), encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            raise UploadError('Upload not found or expired', 404)
+        if self.expires_at(upload_id) < time.time():
+            self.delete(upload_id)
+            raise UploadError('Upload not found or expired', 404)
+        return state
+
+    def _save(self, upload_id, state):
+        path = self._path(upload_id, 'state.json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(dumps(state))  # the stored result may hold columns (density curve)
+        os.replace(tmp_path, path)
+
+    def expires_at(self, upload_id):
+        try:
+            return os.path.getmtime(self._path(upload_id, 'state.json')) + self.ttl
+        except OSError:
+            return 0.0
+
+    def append(self, upload_id, state, offset, chunk):
+        """Parse a chunk at `offset`, fold it in and persist the new state."""
+        if state['result'] is not None:
+            raise UploadError('Upload is already finalized', 409, offset=state['offset'])
+        if offset != state['offset']:
+            raise UploadError(f"Expected offset {state['offset']}, got {offset}", 409, offset=state['offset'])
+
+        data = base64.b64decode(state['carry']) + chunk
+        cut = max(data.rfind(b','), data.rfind(b'\n')) + 1
+        if len(data) - cut > MAX_CARRY_BYTES:
+            raise UploadError('Value too long: no comma or newline in the last 1 MB', 400)
+
+        self._fold(upload_id, state, data[:cut])
+        state['carry'] = base64.b64encode(data[cut:]).decode('ascii')
+        state['offset'] += len(chunk)
+        self._save(upload_id, state)
+        return state
+
+    def _fold(self, upload_id, state, data):
+        precision = get_precision(state['precision'])
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise UploadError(f'Invalid input format: {e}', 400)
+        values = precision.as_array(precision.collect(iter_csv_numbers(text)))
+
+        # Values are appended before the state that counts them is saved;
+        # anything past valuesBytes is left over from an interrupted chunk.
+        values_path = self._path(upload_id, 'values.bin')
+        with open(values_path, 'ab') as f:
+            f.truncate(state['valuesBytes'])
+            f.seek(state['valuesBytes'])
+            values.tofile(f)
+        state['valuesBytes'] += values.nbytes
+
+        moments = RunningMoments(**state['moments']).update(values, precision)
+        state['moments'] = moments.to_dict()
+
+    def finalize(self, upload_id, state):
+        """Fold in the trailing value and compute the full result (once)."""
+        if state['result'] is not None:
+            return state['result']
+
+        self._fold(upload_id, state, base64.b64decode(state['carry']))
+        state['carry'] = ''
+        precision = get_precision(state['precision'])
+        values = np.fromfile(self._path(upload_id, 'values.bin'), dtype=precision.dtype,
+                             count=state['valuesBytes'] // np.dtype(precision.dtype).itemsize)
+        options = {'robust': state.get('robust', False), 'trim': state.get('trim', DEFAULT_TRIM),
+                   'density': state.get('density', False), 'grid_size': state.get('gridSize', DEFAULT_GRID_SIZE)}
+        if precision is EXACT:
+            result = descriptive(NumericColumn(values), EXACT, include_data=False, **options)
+        else:
+            moments = RunningMoments(**state['moments'])
+            result = descriptive(NumericColumn(values), precision, include_data=False, moments=moments, **options)
+
+        # Keep the result (so a retried finalize gets it) but free the buffer
+        state['result'] = result
+        state['valuesBytes'] = 0
+        self._save(upload_id, state)
+        os.remove(self._path(upload_id, 'values.bin'))
+        return result
+
+    def delete(self, upload_id):
+        shutil.rmtree(self._path(upload_id), ignore_errors=True)
+
+    def expire(self):
+        """Remove uploads idle for longer than the TTL."""
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return
+        for upload_id in entries:
+            if UPLOAD_ID.match(upload_id) and self.expires_at(upload_id) < time.time():
+                self.delete(upload_id)
+
+
+upload_store = UploadStore()
+
+
+def status(upload_id, state):
+    return {
+        'uploadId': upload_id,
+        'offset': state['offset'],
+        'count': state['moments']['n'],
+        'precision': state['precision'],
+        'finalized': state['result'] is not None,
+        'expiresAt': int(upload_store.expires_at(upload_id)),
+    }
+
+
+def read_limited(stream, limit):
+    """Read `stream` to the end, or return None once it exceeds `limit` bytes."""
+    parts = []
+    size = 0
+    while size <= limit:
+        part = stream.read(limit + 1 - size)
+        if not part:
+            return b''.join(parts)
+        parts.append(part)
+        size += len(part)
+    return None
+
+
+def init_app(app):
+    """Register the chunked upload routes."""
+    upload_store.directory = app.config.get('UPLOAD_DIR', upload_store.directory)
+    upload_store.ttl = app.config.get('UPLOAD_TTL', upload_store.ttl)
+    max_chunk_bytes = app.config.get('MAX_CHUNK_BYTES', DEFAULT_MAX_CHUNK_BYTES)
+
+    @app.errorhandler(UploadError)
+    def upload_error(error):
+        return jsonify({'error': str(error), **error.fields}), error.status
+
+    @app.route('/api/uploads', methods=['POST'])
+    def create_upload():
+        options = request.get_json(silent=True) or {}
+        precision = get_precision(options.get('precision') or DEFAULT_PRECISION)
+        if precision is None:
+            return jsonify({'error': f"Unknown precision '{options.get('precision')}'. "
+                                     f"Use one of: {', '.join(PRECISION_MODES)}"}), 400
+        if options.get('analysis', 'descriptive') != 'descriptive':
+            return jsonify({'error': 'Chunked uploads support the descriptive analysis only'}), 400
+        try:
+            trim = parse_trim(options.get('trim'))
+            grid_size = parse_grid_size(options.get('gridSize'))
+        except AnalysisError as e:
+            return jsonify({'error': str(e)}), 400
+
+        upload_id, state = upload_store.create(precision, bool(options.get('robust', False)), trim,
+                                               bool(options.get('density', False)), grid_size)
+        response = jsonify(status(upload_id, state))
+        response.status_code = 201
+        response.headers['Location'] = url_for('upload_status', upload_id=upload_id)
+        return response
+
+    @app.route('/api/uploads/<upload_id>', methods=['GET'])
+    def upload_status(upload_id):
+        return jsonify(status(upload_id, upload_store.load(upload_id)))
+
+    @app.route('/api/uploads/<upload_id>', methods=['PUT'])
+    def append_chunk(upload_id):
+        try:
+            offset = int(request.args.get('offset', request.headers.get('Upload-Offset', '')))
+        except ValueError:
+            return jsonify({'error': 'Missing or invalid offset'}), 400
+        if request.content_length is not None and request.content_length > max_chunk_bytes:
+            return jsonify({'error': f'Chunks are limited to {max_chunk_bytes} bytes'}), 413
+
+        # A body without Content-Length (Transfer-Encoding: chunked) is only
+        # known to be too large once max_chunk_bytes + 1 bytes have arrived
+        chunk = read_limited(request.stream, max_chunk_bytes)
+        if chunk is None:
+            return jsonify({'error': f'Chunks are limited to {max_chunk_bytes} bytes'}), 413
+        with upload_store.locked(upload_id) as state:
+            state = upload_store.append(upload_id, state, offset, chunk)
+        return jsonify(status(upload_id, state))
+
+    @app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+    def finalize_upload(upload_id):
+        try:
+            with upload_store.locked(upload_id) as state:
+                return jsonify(upload_store.finalize(upload_id, state))
+        except AnalysisError as e:
+            return jsonify({'error': str(e)}), 400
+
+    @app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+    def delete_upload(upload_id):
+        with upload_store.locked(upload_id):
+            upload_store.delete(upload_id)
+        return '', 204
@@ -0,0 +1,231 @@
+"""Compact numeric columns: one contiguous buffer per parsed series.
+
+A list of Python floats costs a pointer plus a 24-byte float object per
+value, and parsing one from text briefly holds a str object per token on
+top of that. A NumericColumn keeps the values in one contiguous numpy
+buffer (8 bytes each in float64, 4 in float32) and is built from the text
+in bounded slices, so no per-value Python objects exist for the whole
+series at any point:
+
+* parsers (`from_text`, `from_iterable`) fill the buffer directly;
+* analyses take `np.asarray(column)`, which is the buffer itself, and the
+  statistics that need sorted data or moments ask the column, which
+  computes them once and caches them (the sorted view serves median, min,
+  max and mode; moments are cached per precision mode);
+* `dumps` writes columns into JSON from the buffer, a slice at a time.
+
+Columns are treated as immutable once built. An optional boolean mask
+marks missing entries; they are left out of len(), iteration, the
+statistics and the JSON output.
+"""
+import json
+import secrets
+import statistics
+
+import numpy as np
+
+# Values converted to Python objects at a time when iterating or encoding
+SLICE_VALUES = 16384
+# Characters of text split into tokens at a time when parsing
+SLICE_CHARS = 65536
+
+
+class Moments:
+    """n, sum, mean, min, max and sample variance of a column."""
+
+    def __init__(self, n, total, mean, minimum, maximum, variance):
+        self.n = n
+        self.total = total
+        self.mean = mean
+        self.min = minimum
+        self.max = maximum
+        self._variance = variance
+
+    def variance(self):
+        return self._variance
+
+
+class NumericColumn:
+    """A float64 (or float32) buffer with an optional missing-value mask."""
+
+    __slots__ = ('buffer', 'mask', '_values', '_cache')
+
+    def __init__(self, buffer, mask=None):
+        buffer = np.ascontiguousarray(buffer)
+        if buffer.dtype.kind != 'f':
+            buffer = buffer.astype(np.float64)
+        if buffer.ndim != 1:
+            raise ValueError('A column holds a one-dimensional series')
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            if mask.shape != buffer.shape:
+                raise ValueError('The mask must have one entry per value')
+        self.buffer = buffer
+        self.mask = mask
+        self._values = None
+        self._cache = {}
+
+    @classmethod
+    def from_iterable(cls, values, dtype=np.float64):
+        """Column of an iterable of numbers, without building a list first."""
+        return cls(np.fromiter(values, dtype=dtype))
+
+    @classmethod
+    def from_text(cls, text, dtype=np.float64, separator=','):
+        """Column of separator-delimited numbers; blank tokens are skipped.
+
+        Raises ValueError (from float()) on a token that is not a number.
+        """
+        tokens = map(str.strip, iter_tokens(text, separator))
+        return cls.from_iterable((float(token) for token in tokens if token), dtype)
+
+    @property
+    def dtype(self):
+        return self.buffer.dtype
+
+    @property
+    def values(self):
+        """The present values; the buffer itself unless something is masked."""
+        if self._values is None:
+            self._values = self.buffer if self.mask is None else self.buffer[~self.mask]
+        return self._values
+
+    def __len__(self):
+        return self.values.size
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.values
+        if dtype is not None and values.dtype != dtype:
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return NumericColumn(self.values[index])
+        return float(self.values[index])
+
+    def __iter__(self):
+        """Python floats, converted a slice at a time."""
+        values = self.values
+        for start in range(0, values.size, SLICE_VALUES):
+            yield from values[start:start + SLICE_VALUES].tolist()
+
+    def __repr__(self):
+        return f'NumericColumn(n={len(self)}, dtype={self.dtype.name})'
+
+    def __reduce__(self):
+        """Pickle the buffer and mask only; cached views are rebuilt on demand."""
+        return NumericColumn, (self.buffer, self.mask)
+
+    def tolist(self):
+        return self.values.tolist()
+
+    def cached(self, key, compute):
+        """compute(self), evaluated once per key for the life of the column."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = compute(self)
+            return value
+
+    def peek(self, key):
+        """The value cached under key, or None if it has not been computed."""
+        return self._cache.get(key)
+
+    def sorted(self):
+        """Ascending copy of the values, sorted once."""
+        return self.cached('sorted', lambda column: np.sort(column.values))
+
+    def min(self):
+        return float(self.sorted()[0]) if 'sorted' in self._cache else float(self.values.min())
+
+    def max(self):
+        return float(self.sorted()[-1]) if 'sorted' in self._cache else float(self.values.max())
+
+    def median(self):
+        """Middle value, or the mean of the middle two (as statistics.median)."""
+        ordered = self.sorted()
+        n = ordered.size
+        if n == 0:
+            raise statistics.StatisticsError('no median for empty data')
+        middle = n // 2
+        if n % 2:
+            return float(ordered[middle])
+        return float((ordered[middle - 1] + ordered[middle]) / 2)
+
+    def mode(self):
+        """Most common value; ties go to the one seen first, like statistics.mode."""
+        ordered = self.sorted()
+        if ordered.size == 0:
+            raise statistics.StatisticsError('no mode for empty data')
+        starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+        counts = np.diff(np.append(starts, ordered.size))
+        best = ordered[starts[counts == counts.max()]]
+        if best.size == 1:
+            return float(best[0])
+        return float(self.values[np.isin(self.values, best)][0])
+
+    def json_parts(self, separator=','):
+        """The present values as JSON array text, in pieces formatted a slice at a time."""
+        values = self.values
+        yield '['
+        for start in range(0, values.size, SLICE_VALUES):
+            if start:
+                yield separator
+            yield json.dumps(values[start:start + SLICE_VALUES].tolist(), separators=(separator, ':'))[1:-1]
+        yield ']'
+
+    def to_json(self, separator=','):
+        return ''.join(self.json_parts(separator))
+
+
+def as_column(values, dtype=np.float64):
+    """`values` as a NumericColumn; columns of the right dtype are returned as they are."""
+    if isinstance(values, NumericColumn) and values.dtype == dtype:
+        return values
+    return NumericColumn(np.asarray(values, dtype=dtype))
+
+
+def iter_tokens(text, separator=','):
+    """Split `text` on `separator` a slice at a time, instead of all at once."""
+    start = 0
+    while True:
+        end = text.find(separator, start + SLICE_CHARS)
+        if end == -1:
+            yield from text[start:].split(separator)
+            return
+        yield from text[start:end].split(separator)
+        start = end + len(separator)
+
+
+def dumps(obj, default=None, **kwargs):
+    """json.dumps that writes NumericColumns from their buffers.
+
+    Columns are swapped for a placeholder string while the rest of the
+    structure is encoded, then spliced in from NumericColumn.json_parts
+    with a single join at the end.
+    """
+    columns = []
+    token = secrets.token_hex(8)
+
+    def encode(value):
+        if isinstance(value, NumericColumn):
+            columns.append(value)
+            return f'\x00{token}:{len(columns) - 1}'
+        if default is not None:
+            return default(value)
+        raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+    text = json.dumps(obj, default=encode, **kwargs)
+    if not columns:
+        return text
+    separator = (kwargs.get('separators') or (', ', ': '))[0]
+    if kwargs.get('indent') is not None:
+        separator = ','
+    pieces = text.split(f'"\\u0000{token}:')
+    parts = [pieces[0]]
+    for piece in pieces[1:]:
+        index, rest = piece.split('"', 1)
+        parts.extend(columns[int(index)].json_parts(separator))
+        parts.append(rest)
+    return ''.join(parts)
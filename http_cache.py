@@ -0,0 +1,228 @@
+"""HTTP caching for the calculator.
+
+* Fingerprinted static assets: `build_assets.py` writes content-hashed
+  copies (plus .gz/.br variants) of the files in static/ to static/dist/
+  with a manifest. `asset_url()` resolves logical names through that
+  manifest and `/assets/<name>` serves them with immutable caching,
+  picking a precompressed variant from Accept-Encoding.
+* Analysis results: every analysis response carries a strong ETag derived
+  from a hash of the normalized input. Results are kept in a bounded LRU
+  so repeating the same POST skips the computation, and the result can be
+  re-fetched with GET /api/results/<etag>, which answers 304 when the
+  client already has it. Identical requests that arrive while the first
+  is still computing are coalesced onto it (see single_flight.py).
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, abort, jsonify, make_response, request, send_from_directory, url_for
+from werkzeug.exceptions import HTTPException
+
+from single_flight import FlightResult, LeaderFailed, SingleFlight
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_RESULT_CACHE_BYTES = 64 * 1024 * 1024
+# Larger JSON bodies are hashed as sent: decoding and re-encoding them
+# would cost the request thread more than the rare reformatted repeat saves
+NORMALIZED_JSON_MAX_BYTES = 256 * 1024
+
+# Preferred order when the client accepts several encodings
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def input_fingerprint(req):
+    """Hash of the normalized analysis input (endpoint + payload).
+
+    JSON bodies up to NORMALIZED_JSON_MAX_BYTES are re-serialized with
+    sorted keys so formatting does not matter; larger ones are hashed as
+    raw bytes without being decoded. Multipart uploads hash the form fields
+    and file contents, not the raw body, whose boundary changes on every
+    request.
+    """
+    digest = hashlib.sha256()
+    digest.update(req.path.encode('utf-8'))
+    digest.update(b'\0')
+
+    small = req.content_length is not None and req.content_length <= NORMALIZED_JSON_MAX_BYTES
+    payload = req.get_json(silent=True) if req.is_json and small else None
+    if payload is not None:
+        digest.update(b'json\0')
+        digest.update(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    elif req.files or req.form:
+        digest.update(b'form\0')
+        for key in sorted(req.form):
+            for value in req.form.getlist(key):
+                digest.update(f'{key}={value}\0'.encode('utf-8'))
+        for key in sorted(req.files):
+            for storage in req.files.getlist(key):
+                digest.update(f'{key}:{storage.filename}\0'.encode('utf-8'))
+                for block in iter(lambda: storage.stream.read(1 << 16), b''):
+                    digest.update(block)
+                storage.stream.seek(0)
+    else:
+        digest.update(b'raw\0')
+        digest.update(req.get_data())
+
+    return digest.hexdigest()[:32]
+
+
+class ResultCache:
+    """Thread-safe LRU of serialized responses, bounded by total bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = (body, mimetype)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+result_cache = ResultCache()
+single_flight = SingleFlight()
+
+
+def conditional_response(body, etag, mimetype, cache_control='no-cache'):
+    """Build a response with a strong ETag; GET/HEAD revalidation gets 304."""
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+def cached_analysis(view):
+    """Cache successful analysis responses by input hash and tag them with an ETag."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = input_fingerprint(request)
+        cached = result_cache.get(key)
+        if cached is None:
+            def compute():
+                response = make_response(view(*args, **kwargs))
+                return FlightResult(response.status_code, response.get_data(), response.mimetype)
+
+            try:
+                result = single_flight.do(key, compute)
+            except LeaderFailed as failure:
+                if isinstance(failure.error, HTTPException):
+                    raise failure.error  # e.g. 429 from admission control: answer it as such
+                if failure.result is None:
+                    return jsonify({'error': f'Unexpected error: {failure.error}'}), 500
+                result = failure.result
+            if result.status != 200:
+                return Response(result.body, status=result.status, mimetype=result.mimetype)
+            cached = (result.body, result.mimetype)
+            result_cache.put(key, *cached)
+
+        response = conditional_response(cached[0], key, cached[1], cache_control='private, no-cache')
+        response.headers['Content-Location'] = url_for('cached_result', key=key)
+        return response
+    return wrapper
+
+
+class AssetManifest:
+    """Maps logical static filenames to their fingerprinted build output."""
+
+    def __init__(self, static_folder):
+        self.dist_folder = os.path.join(static_folder, DIST_DIR)
+        self.entries = {}
+        self.reload()
+
+    def reload(self):
+        path = os.path.join(self.dist_folder, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @property
+    def version(self):
+        """Short hash of the manifest, used to key pre-rendered pages."""
+        encoded = json.dumps(self.entries, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def url(self, filename):
+        """URL for a static file: fingerprinted when built, plain otherwise."""
+        entry = self.entries.get(filename)
+        if entry is None:
+            return url_for('static', filename=filename)
+        return url_for('fingerprinted_asset', filename=entry['file'])
+
+    def precompressed(self, filename):
+        """Pick the best precompressed variant the client accepts."""
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding in request.accept_encodings and \
+                    os.path.isfile(os.path.join(self.dist_folder, filename + suffix)):
+                return encoding, filename + suffix
+        return None, filename
+
+
+def init_app(app):
+    """Register the asset route, the result route and the asset_url helper."""
+    manifest = AssetManifest(app.static_folder)
+    app.extensions['asset_manifest'] = manifest
+    result_cache.max_bytes = app.config.get('RESULT_CACHE_BYTES', DEFAULT_RESULT_CACHE_BYTES)
+    single_flight.directory = app.config.get('SINGLE_FLIGHT_DIR', single_flight.directory)
+    single_flight.max_bytes = app.config.get('SINGLE_FLIGHT_MAX_BYTES', single_flight.max_bytes)
+
+    @app.route('/assets/<path:filename>')
+    def fingerprinted_asset(filename):
+        if os.path.basename(filename) == MANIFEST_NAME:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding, served = manifest.precompressed(filename)
+        response = send_from_directory(manifest.dist_folder, served, mimetype=mimetype,
+                                       max_age=31536000)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @app.route('/api/results/<key>', methods=['GET'])
+    def cached_result(key):
+        cached = result_cache.get(key)
+        if cached is None:
+            return {'error': 'Result not found or expired; POST the input again'}, 404
+        return conditional_response(cached[0], key, cached[1], cache_control='private, no-cache')
+
+    @app.route('/api/metrics/single-flight', methods=['GET'])
+    def single_flight_metrics():
+        return jsonify(single_flight.metrics())
+
+    app.add_template_global(manifest.url, name='asset_url')
+    return manifest
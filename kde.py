@@ -0,0 +1,110 @@
+"""Gaussian kernel density curves by linear binning and FFT convolution.
+
+Evaluating n kernels at each of m grid points costs O(n m). Here the
+values are first spread over an evenly spaced grid of m points by linear
+binning: each value splits its unit weight between the two grid points
+either side of it, in proportion to how close it is to each. This is one
+np.bincount per chunk of BINNING_CHUNK values, O(n) with bounded
+temporaries. The density on the grid is then the binned weights convolved
+with the kernel sampled at the grid spacing, an FFT convolution
+(scipy.signal.fftconvolve) costing O(m log m). Binning moves each value by
+less than one grid step, so the curve differs from the exact KDE by
+O((step / bandwidth)^2), well below plotting resolution for the default
+grid.
+
+* bandwidth  Silverman's rule of thumb as in R's bw.nrd0:
+             0.9 min(stdev, IQR / 1.34) n^(-1/5), falling back to the
+             stdev, then |x_1|, then 1 when the spread is 0
+* grid       gridSize points from min - GRID_PADDING h to max + GRID_PADDING h
+* kernel     cut off KERNEL_REACH bandwidths from its centre
+
+The curve is computed in float64 whatever the precision mode; the stdev
+and quartiles come from the column (its cached moments and sorted view,
+or a selection when it has no sorted view). Non-finite values are left
+out.
+"""
+import math
+
+import numpy as np
+from scipy import signal
+
+from column import NumericColumn, as_column
+from precision import FLOAT64
+from robust import quartiles
+
+DEFAULT_GRID_SIZE = 512
+MIN_GRID_SIZE = 16
+MAX_GRID_SIZE = 16384
+# Bandwidths beyond the data covered by the grid, and by the kernel
+GRID_PADDING = 3
+KERNEL_REACH = 4
+# Values binned at a time
+BINNING_CHUNK = 1 << 20
+
+
+def bandwidth(n, stdev, iqr, first):
+    """Silverman's rule of thumb with R's bw.nrd0 fallbacks for zero spread"""
+    spread = min(stdev, iqr / 1.34)
+    if not spread > 0:
+        spread = stdev or abs(first) or 1.0
+    return 0.9 * spread * n ** -0.2
+
+
+def linear_binning(values, low, step, grid_size, chunk=BINNING_CHUNK):
+    """Weights of the values on the grid low, low + step, ... (grid_size points)"""
+    weights = np.zeros(grid_size)
+    for start in range(0, values.size, chunk):
+        position = np.array(values[start:start + chunk], dtype=np.float64)
+        position -= low
+        position /= step
+        index = np.floor(position).astype(np.intp)
+        np.clip(index, 0, grid_size - 2, out=index)
+        position -= index  # share of the weight that goes to the point above
+        weights += np.bincount(index, weights=1 - position, minlength=grid_size)
+        weights += np.bincount(index + 1, weights=position, minlength=grid_size)
+    return weights
+
+
+def density_curve(values, precision=FLOAT64, grid_size=DEFAULT_GRID_SIZE):
+    """Gaussian KDE on an evenly spaced grid.
+
+    Returns {'kernel', 'bandwidth', 'gridSize', 'n', 'x', 'density'} with
+    x and density as NumericColumns. Raises ValueError when no value is
+    finite or grid_size is outside [MIN_GRID_SIZE, MAX_GRID_SIZE].
+    """
+    if not MIN_GRID_SIZE <= grid_size <= MAX_GRID_SIZE:
+        raise ValueError(f'grid_size must be between {MIN_GRID_SIZE} and {MAX_GRID_SIZE}')
+    column = as_column(values, precision.dtype)
+    if len(column) == 0:
+        raise ValueError('a density curve needs at least one finite value')
+    moments = precision.moments(column)
+    if not (math.isfinite(moments.min) and math.isfinite(moments.max)):
+        column = NumericColumn(column.values[np.isfinite(column.values)])
+        if len(column) == 0:
+            raise ValueError('a density curve needs at least one finite value')
+        moments = precision.moments(column)
+    n = len(column)
+    stdev = math.sqrt(moments.variance()) if n > 1 else 0.0
+    q1, q3 = quartiles(column)
+    h = bandwidth(n, stdev, q3 - q1, column[0])
+
+    low = moments.min - GRID_PADDING * h
+    high = moments.max + GRID_PADDING * h
+    grid = np.linspace(low, high, grid_size)
+    step = grid[1] - grid[0]
+    weights = linear_binning(column.values, low, step, grid_size)
+
+    reach = min(math.ceil(KERNEL_REACH * h / step), grid_size - 1)
+    offsets = np.arange(-reach, reach + 1) * (step / h)
+    kernel = np.exp(-0.5 * offsets * offsets) / math.sqrt(2 * math.pi)
+    density = signal.fftconvolve(weights, kernel, mode='same') / (n * h)
+    np.maximum(density, 0, out=density)  # FFT round-off around zero
+
+    return {
+        'kernel': 'gaussian',
+        'bandwidth': h,
+        'gridSize': grid_size,
+        'n': n,
+        'x': NumericColumn(grid),
+        'density': NumericColumn(density),
+    }
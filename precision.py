@@ -0,0 +1,209 @@
+"""Numeric precision modes for the analysis pipeline.
+
+Every analysis endpoint accepts `precision` = `exact` (default), `float64`
+or `float32`. The mode decides how parsed values are stored and how they
+are summed, from parsing through to the final statistics:
+
+* exact    Values are stored as float64 and the statistics module does the
+           arithmetic (mean/variance in exact Fraction arithmetic, sums
+           correctly rounded with math.fsum). Slowest, and the reference
+           the other modes are tested against.
+* float64  Values are stored as float64; sums use numpy's pairwise
+           summation.
+* float32  Values are stored as float32 (half the memory). Sums are
+           pairwise within blocks of FLOAT32_BLOCK values and the block
+           sums are combined with Kahan-Babuska (Neumaier) compensation,
+           all in float32, so the error does not grow with n.
+
+Error bounds, with u the unit roundoff (2**-53 for float64, 2**-24 ~ 6e-8
+for float32) and S1 = sum(|x_i|):
+
+* storage  every parsed value is rounded once: |x' - x| <= u |x|
+           (exact and float64 round exactly as before; float32 gives
+           about 7 significant digits, so 1e6 is stored to within 0.06).
+* sum      exact:   |error| <= u |S|            (correctly rounded)
+           float64: |error| <= (log2 n + 16) u S1
+           float32: |error| <= (log2 B + 19) u S1 + 2u |S|, B = FLOAT32_BLOCK,
+                    i.e. about 1.5e-6 S1 whatever the length of the data
+* mean     the sum bound divided by n, plus u |mean|.
+* variance corrected two-pass: mean, then sum(d**2) - sum(d)**2 / n with
+           d = x - mean, both sums as above. The relative error is about
+           2c u + (c u k)**2 where c is the sum factor above and
+           k = sqrt(1 + mean**2 / variance); it degrades only when the
+           mean is very large compared with the spread (float32 loses all
+           digits once |mean| / stdev approaches 1e3 to 1e4).
+* stdev    the square root of the variance, rounded once more.
+* median, min, max, mode  are selections: only the storage rounding applies.
+
+Every mode stores values in a column.NumericColumn of its dtype. The
+selections come from the column's cached sorted view in every mode, and
+`moments()` (count, sum, mean, min, max, variance) is computed once per
+column and mode.
+
+p-values are computed in float64 from the statistics above in every mode.
+"""
+import math
+import statistics
+
+import numpy as np
+
+from column import Moments, NumericColumn, as_column
+
+PRECISION_MODES = ('exact', 'float64', 'float32')
+DEFAULT_PRECISION = 'exact'
+
+# Values summed pairwise before the compensated combination in float32 mode
+FLOAT32_BLOCK = 4096
+
+
+def compensated_sum(values, dtype=np.float32, block=FLOAT32_BLOCK):
+    """Blocked pairwise sum with Neumaier compensation across blocks.
+
+    All arithmetic happens in `dtype`; the result is returned as a float.
+    """
+    values = np.ascontiguousarray(values, dtype=dtype)
+    full = values.size - values.size % block
+    partials = values[:full].reshape(-1, block).sum(axis=1)
+    if full < values.size:
+        partials = np.append(partials, values[full:].sum())
+
+    total = dtype(0)
+    compensation = dtype(0)
+    for partial in partials:
+        step = total + partial
+        if abs(total) >= abs(partial):
+            compensation += (total - step) + partial
+        else:
+            compensation += (partial - step) + total
+        total = step
+    return float(total + compensation)
+
+
+class Precision:
+    """What every mode shares: column storage and selections from its sorted view."""
+
+    name = None
+    dtype = np.float64
+
+    def __reduce__(self):
+        """Pickle by name, so a compute-pool process gets its own module-level mode."""
+        return get_precision, (self.name,)
+
+    def collect(self, values):
+        """Store an iterable of parsed numbers."""
+        return NumericColumn.from_iterable(values, self.dtype)
+
+    def parse(self, text, separator=','):
+        """Store separator-delimited numbers; blank tokens are skipped."""
+        return NumericColumn.from_text(text, self.dtype, separator)
+
+    def column(self, values):
+        return as_column(values, self.dtype)
+
+    def as_array(self, values):
+        """Array for element-wise arithmetic; a column's own buffer when the dtype matches."""
+        return np.asarray(values, dtype=self.dtype)
+
+    def to_list(self, values):
+        return self.column(values).tolist()
+
+    def moments(self, values):
+        """Moments of the values, computed once per column."""
+        return self.column(values).cached(('moments', self.name), self._moments)
+
+    def median(self, values):
+        return self.column(values).median()
+
+    def mode(self, values):
+        return self.column(values).mode()
+
+    def min(self, values):
+        return self.column(values).min()
+
+    def max(self, values):
+        return self.column(values).max()
+
+
+class ExactPrecision(Precision):
+    """The reference: float64 storage and the statistics module."""
+
+    name = 'exact'
+    dtype = np.float64
+
+    def sum(self, values):
+        try:
+            return math.fsum(values)
+        except (OverflowError, ValueError):
+            # fsum raises on a total past the float range (or inf + -inf);
+            # the plain sum gives the IEEE answer (inf or nan) instead
+            return sum(values, 0.0)
+
+    def mean(self, values):
+        return statistics.mean(values)
+
+    def variance(self, values):
+        try:
+            return statistics.variance(values)
+        except OverflowError:
+            return math.inf  # exact, but past the float range
+
+    def stdev(self, values):
+        return statistics.stdev(values)
+
+    def _moments(self, column):
+        n = len(column)
+        variance = self.variance(column) if n > 1 else 0.0
+        return Moments(n, self.sum(column), self.mean(column), column.min(), column.max(), variance)
+
+
+class FloatPrecision(Precision):
+    """Fixed-width storage with vectorized (optionally compensated) sums."""
+
+    def __init__(self, name, dtype, compensated=False):
+        self.name = name
+        self.dtype = dtype
+        self.compensated = compensated
+
+    def sum(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        if self.compensated:
+            return compensated_sum(values, self.dtype)
+        return float(values.sum())
+
+    def mean(self, values):
+        return self.sum(values) / len(values)
+
+    def variance(self, values, mean=None):
+        """Sample variance by the corrected two-pass algorithm."""
+        values = np.asarray(values, dtype=self.dtype)
+        n = values.size
+        if n < 2:
+            raise statistics.StatisticsError('variance requires at least two data points')
+        deviations = values - self.dtype(self.mean(values) if mean is None else mean)
+        squares = self.sum(deviations * deviations)
+        drift = self.sum(deviations)
+        return max(squares - drift * drift / n, 0.0) / (n - 1)
+
+    def stdev(self, values):
+        return math.sqrt(self.variance(values))
+
+    def _moments(self, column):
+        values = self.as_array(column)
+        n = values.size
+        total = self.sum(values)
+        mean = total / n
+        variance = self.variance(values, mean) if n > 1 else 0.0
+        return Moments(n, total, mean, column.min(), column.max(), variance)
+
+
+EXACT = ExactPrecision()
+FLOAT64 = FloatPrecision('float64', np.float64)
+FLOAT32 = FloatPrecision('float32', np.float32, compensated=True)
+
+PRECISIONS = {mode.name: mode for mode in (EXACT, FLOAT64, FLOAT32)}
+
+
+def get_precision(name):
+    """Look up a precision mode by name (None selects the default); None if unknown."""
+    key = str(name or DEFAULT_PRECISION).strip().lower()
+    return PRECISIONS.get(key)
@@ -0,0 +1,228 @@
+"""Rank correlation (Spearman and Kendall) in O(n log n).
+
+Both coefficients are built on a single ranking pass per variable: one
+stable argsort gives the order, the tie groups and the average ranks.
+Kendall's tau-b is then computed by counting inversions of the y ranks
+in x order with a radix partition over the rank bits, instead of
+comparing all pairs.
+"""
+import math
+
+import numpy as np
+from scipy import stats
+
+# Below this size (and without ties) Kendall p-values use the exact
+# null distribution, matching scipy's 'auto' behaviour.
+KENDALL_EXACT_MAX_N = 33
+
+
+def rank_pass(values):
+    """Rank an array in one argsort pass.
+
+    Returns (order, ranks, dense, tie_sizes) where `order` is the stable
+    argsort, `ranks` are average ranks (1-based, ties share the mean
+    rank), `dense` are 0-based dense ranks and `tie_sizes` holds the size
+    of every tie group with more than one member.
+    """
+    a = np.asarray(values, dtype=np.float64)
+    n = a.size
+    order = np.argsort(a, kind='mergesort')
+    sorted_a = a[order]
+
+    # Start of each run of equal values in sorted order
+    new_group = np.empty(n, dtype=bool)
+    new_group[:1] = True
+    np.not_equal(sorted_a[1:], sorted_a[:-1], out=new_group[1:])
+    starts = np.flatnonzero(new_group)
+    sizes = np.diff(np.append(starts, n))
+
+    # Average rank of a group spanning positions [s, s + t) is s + (t + 1) / 2
+    group_rank = starts + (sizes + 1) / 2.0
+    dense_sorted = np.cumsum(new_group) - 1
+
+    ranks = np.empty(n, dtype=np.float64)
+    ranks[order] = group_rank[dense_sorted]
+    dense = np.empty(n, dtype=np.int64)
+    dense[order] = dense_sorted
+
+    return order, ranks, dense, sizes[sizes > 1]
+
+
+def count_inversions(seq):
+    """Count pairs i < j with seq[i] > seq[j] by an MSD radix partition.
+
+    `seq` must hold non-negative integers smaller than len(seq) (dense
+    ranks), so there are at most log2(n) + 1 bit levels. At each level the
+    values are grouped by their higher bits, in original order within a
+    group; a pair inverts at the first bit where it differs, which is
+    counted as a 1 before a 0 inside a group with one cumulative sum. A
+    stable scatter by that bit then refines the groups, so every level is
+    linear and the total work is O(n log n).
+    """
+    a = np.array(seq, dtype=np.int64)
+    n = a.size
+    if n < 2:
+        return 0
+
+    idx = np.arange(n, dtype=np.int64)
+    inversions = 0
+    for bit in reversed(range(int(a.max()).bit_length())):
+        group = a >> (bit + 1)
+        high = (a >> bit) & 1
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        np.not_equal(group[1:], group[:-1], out=new_group[1:])
+        first = np.maximum.accumulate(np.where(new_group, idx, 0))
+
+        # Ones before each position within its group; every one of them
+        # forms an inversion with a zero at that position
+        ones_before = np.cumsum(high) - high
+        ones_before -= ones_before[first]
+        low = high == 0
+        inversions += int(ones_before[low].sum())
+
+        # Stable partition of each group: zeros first, then ones
+        zeros = np.add.reduceat(1 - high, np.flatnonzero(new_group))
+        zeros_in_group = zeros[np.cumsum(new_group) - 1]
+        target = first + np.where(low, idx - first - ones_before, zeros_in_group + ones_before)
+        merged = np.empty_like(a)
+        merged[target] = a
+        a = merged
+
+    return inversions
+
+
+def _pairs_tied(tie_sizes):
+    t = tie_sizes.astype(np.float64)
+    return float(np.sum(t * (t - 1) / 2.0))
+
+
+def spearman(x, y, x_rank=None, y_rank=None):
+    """Spearman's rho with a t-distribution p-value, as (rho, p_value)."""
+    if x_rank is None:
+        x_rank = rank_pass(x)
+    if y_rank is None:
+        y_rank = rank_pass(y)
+
+    rx = x_rank[1]
+    ry = y_rank[1]
+    n = rx.size
+
+    dx = rx - rx.mean()
+    dy = ry - ry.mean()
+    denom = math.sqrt(float(np.dot(dx, dx)) * float(np.dot(dy, dy)))
+    if denom == 0:
+        return float('nan'), float('nan')
+
+    rho = max(-1.0, min(1.0, float(np.dot(dx, dy)) / denom))
+    return rho, correlation_p_value(rho, n)
+
+
+def correlation_p_value(r, n):
+    """Two-sided p-value for a correlation via t = r * sqrt(df / (1 - r^2))."""
+    df = n - 2
+    if df <= 0:
+        return 1.0
+    if abs(r) >= 1.0:
+        return 0.0
+    t = r * math.sqrt(df / ((1.0 - r) * (1.0 + r)))
+    return float(2 * stats.t.sf(abs(t), df))
+
+
+def kendall_tau(x, y, x_rank=None, y_rank=None):
+    """Kendall's tau-b with tie correction, as (tau, p_value).
+
+    Small untied inputs get an exact p-value; everything else uses the
+    tie-corrected normal approximation.
+    """
+    if x_rank is None:
+        x_rank = rank_pass(x)
+    if y_rank is None:
+        y_rank = rank_pass(y)
+
+    x_dense = x_rank[2]
+    y_dense = y_rank[2]
+    n = x_dense.size
+    total = n * (n - 1) / 2.0
+
+    # Order by x, breaking ties on y, then count discordant pairs as
+    # inversions of y. Pairs tied in x are already ordered by y, so they
+    # never count as inversions.
+    order = np.lexsort((y_dense, x_dense))
+    ys = y_dense[order]
+    xs = x_dense[order]
+
+    joint_new = np.empty(n, dtype=bool)
+    joint_new[:1] = True
+    joint_new[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    joint_sizes = np.diff(np.append(np.flatnonzero(joint_new), n))
+
+    x_ties = _pairs_tied(x_rank[3])
+    y_ties = _pairs_tied(y_rank[3])
+    xy_ties = _pairs_tied(joint_sizes[joint_sizes > 1])
+    discordant = count_inversions(ys)
+
+    concordant_minus_discordant = total - x_ties - y_ties + xy_ties - 2 * discordant
+    denom = math.sqrt((total - x_ties) * (total - y_ties))
+    if denom == 0:
+        return float('nan'), float('nan')
+    tau = max(-1.0, min(1.0, concordant_minus_discordant / denom))
+
+    if x_ties == 0 and y_ties == 0 and n <= KENDALL_EXACT_MAX_N:
+        p_value = _kendall_exact_p(n, discordant)
+    else:
+        p_value = _kendall_asymptotic_p(n, concordant_minus_discordant,
+                                        x_rank[3], y_rank[3])
+    return tau, p_value
+
+
+def _kendall_exact_p(n, discordant):
+    """Two-sided exact p-value from the distribution of inversion counts."""
+    # counts[k] = number of permutations of n items with k inversions
+    counts = [1]
+    for m in range(2, n + 1):
+        nxt = [0] * (len(counts) + m - 1)
+        window = 0
+        for k in range(len(nxt)):
+            if k < len(counts):
+                window += counts[k]
+            if k - m >= 0:
+                window -= counts[k - m]
+            nxt[k] = window
+        counts = nxt
+
+    total_pairs = n * (n - 1) // 2
+    tail = min(discordant, total_pairs - discordant)
+    p = 2 * sum(counts[:tail + 1]) / math.factorial(n)
+    return min(1.0, float(p))
+
+
+def _kendall_asymptotic_p(n, s, x_tie_sizes, y_tie_sizes):
+    """Normal approximation with the tie-corrected variance of S."""
+    def tie_terms(sizes):
+        t = sizes.astype(np.float64)
+        return (float(np.sum(t * (t - 1))),
+                float(np.sum(t * (t - 1) * (t - 2))),
+                float(np.sum(t * (t - 1) * (2 * t + 5))))
+
+    xt, xt2, xt5 = tie_terms(x_tie_sizes)
+    yt, yt2, yt5 = tie_terms(y_tie_sizes)
+    m = n * (n - 1.0)
+    var = (m * (2 * n + 5) - xt5 - yt5) / 18.0 + xt * yt / (2.0 * m)
+    if n > 2:
+        var += xt2 * yt2 / (9.0 * m * (n - 2))
+    if var <= 0:
+        return 1.0
+    z = s / math.sqrt(var)
+    return float(2 * stats.norm.sf(abs(z)))
+
+
+def rank_correlation(x, y, method):
+    """Compute a rank correlation, sharing the ranking pass between methods."""
+    x_rank = rank_pass(x)
+    y_rank = rank_pass(y)
+    if method == 'spearman':
+        return spearman(x, y, x_rank, y_rank)
+    if method == 'kendall':
+        return kendall_tau(x, y, x_rank, y_rank)
+    raise ValueError(f"Unknown rank correlation method '{method}'")
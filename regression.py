@@ -0,0 +1,276 @@
+"""One-pass least-squares regression built on streaming accumulators.
+
+`CoMoments` keeps the running count, means, second moments and co-moment
+of an (x, y) stream. Chunks are folded in with the pairwise update of
+Chan, Golub and LeVeque, so the result does not depend on how the data
+was split and partial accumulators from different workers can be merged.
+Pearson's r, the simple regression line, its standard errors and a
+prediction band all fall out of those five numbers. Chunk sums follow the
+request's precision mode (see precision.py).
+
+`LeastSquares` does the same for several predictors: it accumulates
+X'X, X'y and y'y per chunk and solves the normal equations by Cholesky.
+When X'X is too ill-conditioned for the normal equations to be trusted,
+the fit comes from an R factor instead (TSQR: each chunk is stacked under
+the previous R and re-factored). The chunks are kept, by reference, up to
+`retained_rows` rows, so that R is only computed when it is needed; past
+that limit R is kept current chunk by chunk to bound memory.
+"""
+import math
+
+import numpy as np
+from scipy import stats
+
+from precision import FLOAT64
+from rank_correlation import correlation_p_value
+
+# Above this condition number of X'X the normal equations lose roughly
+# half of the available digits, so the QR factor is used instead.
+GRAM_CONDITION_LIMIT = 1e10
+# Rows of chunks LeastSquares keeps for a QR factor computed only if needed
+DEFAULT_RETAINED_ROWS = 1 << 20
+
+
+class CoMoments:
+    """Streaming count, means, sums of squares and co-moment of (x, y)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+        self.min_x = math.inf
+        self.max_x = -math.inf
+
+    @classmethod
+    def from_arrays(cls, x, y, precision=FLOAT64):
+        acc = cls()
+        acc.update(x, y, precision)
+        return acc
+
+    def update(self, x, y, precision=FLOAT64):
+        """Fold a chunk of paired observations into the accumulator.
+
+        The chunk is stored in `precision.dtype` and its sums use
+        `precision.sum`; merging into the running totals is done in float64.
+        """
+        x = precision.as_array(x)
+        y = precision.as_array(y)
+        if x.shape != y.shape:
+            raise ValueError(f'X ({x.size}) and Y ({y.size}) must have same length')
+        if x.size == 0:
+            return self
+
+        chunk = CoMoments()
+        chunk.n = x.size
+        chunk.mean_x = precision.sum(x) / x.size
+        chunk.mean_y = precision.sum(y) / y.size
+        dx = x - x.dtype.type(chunk.mean_x)
+        dy = y - y.dtype.type(chunk.mean_y)
+        chunk.m2_x = precision.sum(dx * dx)
+        chunk.m2_y = precision.sum(dy * dy)
+        chunk.c_xy = precision.sum(dx * dy)
+        chunk.min_x = float(x.min())
+        chunk.max_x = float(x.max())
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Combine another accumulator into this one (in place)."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        n = self.n + other.n
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+
+        self.m2_x += other.m2_x + dx * dx * weight
+        self.m2_y += other.m2_y + dy * dy * weight
+        self.c_xy += other.c_xy + dx * dy * weight
+        self.mean_x += dx * other.n / n
+        self.mean_y += dy * other.n / n
+        self.min_x = min(self.min_x, other.min_x)
+        self.max_x = max(self.max_x, other.max_x)
+        self.n = n
+        return self
+
+    def pearson(self):
+        """Pearson's r and its two-sided p-value, as (r, p_value)."""
+        denom = math.sqrt(self.m2_x * self.m2_y)
+        if denom == 0:
+            return float('nan'), float('nan')
+        r = max(-1.0, min(1.0, self.c_xy / denom))
+        return r, correlation_p_value(r, self.n)
+
+    def linear_fit(self, band_points=50, confidence=0.95):
+        """Least-squares line y = intercept + slope * x with inference.
+
+        Returns a dict with the coefficients, their standard errors, the
+        residual standard error and a prediction band evaluated on
+        `band_points` evenly spaced x values between min(x) and max(x).
+        """
+        n = self.n
+        if n < 2 or self.m2_x == 0:
+            raise ValueError('Regression needs at least 2 distinct X values')
+
+        slope = self.c_xy / self.m2_x
+        intercept = self.mean_y - slope * self.mean_x
+        df = n - 2
+
+        # Residual sum of squares straight from the co-moments
+        ss_res = max(self.m2_y - slope * self.c_xy, 0.0)
+        if df > 0:
+            residual_se = math.sqrt(ss_res / df)
+            slope_se = residual_se / math.sqrt(self.m2_x)
+            intercept_se = residual_se * math.sqrt(1.0 / n + self.mean_x ** 2 / self.m2_x)
+            t_crit = float(stats.t.ppf(0.5 + confidence / 2.0, df))
+        else:
+            residual_se = slope_se = intercept_se = t_crit = float('nan')
+
+        band_x = np.linspace(self.min_x, self.max_x, max(int(band_points), 2))
+        fit = intercept + slope * band_x
+        half_width = t_crit * residual_se * np.sqrt(
+            1.0 + 1.0 / n + (band_x - self.mean_x) ** 2 / self.m2_x)
+
+        return {
+            'slope': slope,
+            'intercept': intercept,
+            'slopeStdError': slope_se,
+            'interceptStdError': intercept_se,
+            'residualStdError': residual_se,
+            'degreesOfFreedom': df,
+            'confidence': confidence,
+            'predictionBand': {
+                'x': band_x.tolist(),
+                'fit': fit.tolist(),
+                'lower': (fit - half_width).tolist(),
+                'upper': (fit + half_width).tolist(),
+            },
+        }
+
+
+class LeastSquares:
+    """Chunked multiple regression y = b0 + b1*x1 + ... + bp*xp.
+
+    Chunks are kept by reference until solve() (up to retained_rows rows),
+    so they must not be modified in between.
+    """
+
+    def __init__(self, n_predictors, retained_rows=DEFAULT_RETAINED_ROWS):
+        p = n_predictors + 1
+        self.n_predictors = n_predictors
+        self.retained_rows = retained_rows
+        self.n = 0
+        self.xtx = np.zeros((p, p))
+        self.xty = np.zeros(p)
+        self.yty = 0.0
+        self.sum_y = 0.0
+        # (X, y) chunks not yet folded into the QR factor; None once past retained_rows
+        self._chunks = []
+        self._retained = 0
+        # TSQR state: R is (<= p) x p and qty = Q'y for the rows folded in so far
+        self._r = np.zeros((0, p))
+        self._qty = np.zeros(0)
+        self._rss_tail = 0.0
+
+    def update(self, X, y):
+        """Fold a chunk (rows = observations, columns = predictors)."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        if X.shape[1] != self.n_predictors:
+            raise ValueError(f'Expected {self.n_predictors} predictors, got {X.shape[1]}')
+        if X.shape[0] != y.size:
+            raise ValueError(f'X ({X.shape[0]}) and Y ({y.size}) must have same length')
+        if y.size == 0:
+            return self
+
+        design = np.column_stack([np.ones(y.size), X])
+        self.n += y.size
+        self.xtx += design.T @ design
+        self.xty += design.T @ y
+        self.yty += float(np.dot(y, y))
+        self.sum_y += float(y.sum())
+
+        if self._chunks is not None and self._retained + y.size <= self.retained_rows:
+            self._chunks.append((X, y))
+            self._retained += y.size
+            return self
+        # Past the limit: fold everything into R now and keep it current from here on
+        self._fold_chunks()
+        self._chunks = None
+        return self._fold(design, y)
+
+    def _fold_chunks(self):
+        for X, y in self._chunks or ():
+            self._fold(np.column_stack([np.ones(y.size), X]), y)
+        if self._chunks:
+            self._chunks = []
+            self._retained = 0
+
+    def _fold(self, design, y):
+        """One TSQR step: stack the chunk under R and re-factor."""
+        stacked = np.vstack([self._r, design])
+        stacked_y = np.concatenate([self._qty, y])
+        q, r = np.linalg.qr(stacked, mode='reduced')
+        qty = q.T @ stacked_y
+        # Whatever of y lies outside span(Q) is residual and stays residual
+        residual = stacked_y - q @ qty
+        self._rss_tail += float(np.dot(residual, residual))
+        self._r = r
+        self._qty = qty
+        return self
+
+    def solve(self):
+        """Coefficients, standard errors and fit statistics as a dict."""
+        p = self.n_predictors + 1
+        if self.n <= p:
+            raise ValueError(f'Need more than {p} observations for {self.n_predictors} predictor(s)')
+
+        solver = 'cholesky'
+        if np.linalg.cond(self.xtx) > GRAM_CONDITION_LIMIT:
+            solver = 'qr'
+
+        if solver == 'cholesky':
+            try:
+                chol = np.linalg.cholesky(self.xtx)
+            except np.linalg.LinAlgError:
+                solver = 'qr'
+
+        if solver == 'cholesky':
+            beta = np.linalg.solve(chol.T, np.linalg.solve(chol, self.xty))
+            ss_res = max(self.yty - float(beta @ self.xty), 0.0)
+            chol_inv = np.linalg.inv(chol)
+            xtx_inv = chol_inv.T @ chol_inv
+        else:
+            self._fold_chunks()
+            r = self._r[:p]
+            if np.any(np.abs(np.diag(r)) < 1e-12 * np.abs(r).max()):
+                raise ValueError('Predictors are collinear; the regression is not identifiable')
+            beta = np.linalg.solve(r, self._qty[:p])
+            ss_res = self._rss_tail
+            r_inv = np.linalg.inv(r)
+            xtx_inv = r_inv @ r_inv.T
+
+        df = self.n - p
+        residual_se = math.sqrt(ss_res / df)
+        std_errors = residual_se * np.sqrt(np.clip(np.diag(xtx_inv), 0.0, None))
+        ss_tot = self.yty - self.sum_y ** 2 / self.n
+        r_squared = 1.0 - ss_res / ss_tot if ss_tot > 0 else float('nan')
+
+        return {
+            'intercept': float(beta[0]),
+            'coefficients': beta[1:].tolist(),
+            'interceptStdError': float(std_errors[0]),
+            'standardErrors': std_errors[1:].tolist(),
+            'residualStdError': residual_se,
+            'rSquared': r_squared,
+            'degreesOfFreedom': df,
+            'solver': solver,
+        }
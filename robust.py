@@ -0,0 +1,181 @@
+"""Robust statistics and outlier flags from linear-time selection.
+
+Order statistics come from in-place partitioning (introselect, O(n) on
+average) instead of a sort. Every rank one summary needs (the median, the
+values either side of each quartile and the two trim bounds) is selected
+on one working copy by select_ranks: one partition at the middle rank,
+then the ranks below and above it are selected within the two segments
+that partition left, and so on, so each selection reuses the earlier
+ones. (np.partition with a list of ranks does the same but without its
+fast single-rank path, about 3x slower at 1e7 values.) Because the trim
+bounds are among the selected ranks, the values between them are exactly
+the trimmed sample, so the trimmed and winsorized means are one sum over
+that block. The MAD is one more selection, of the absolute deviations
+written over the same working copy.
+When the column already has its sorted view (descriptive() sorts once for
+the median and mode) the order statistics are read from it instead.
+
+* quartiles  linear interpolation between order statistics (numpy's
+             default, statistics.quantiles(method='inclusive')); IQR = Q3 - Q1
+* MAD        median(|x - median|), unscaled; 1.4826 MAD estimates the
+             standard deviation of normal data
+* trimmed    mean of the values left after cutting int(trim n) from each
+             end (as scipy.stats.trim_mean); winsorized replaces them with
+             the nearest kept value instead (as scipy.stats.mstats.winsorize)
+* Tukey      outliers lie outside [Q1 - k IQR, Q3 + k IQR], k = TUKEY_K
+* MAD rule   outliers have a modified z-score 0.6745 |x - median| / MAD
+             above MAD_THRESHOLD (Iglewicz and Hoaglin); none when MAD = 0
+
+Outlier indices are positions in the column's present values and are
+capped at OUTLIER_INDEX_LIMIT per rule; the counts are always complete.
+"""
+import math
+
+import numpy as np
+
+from column import NumericColumn, as_column
+from precision import FLOAT64
+
+DEFAULT_TRIM = 0.1
+TUKEY_K = 1.5
+MAD_THRESHOLD = 3.5
+# 0.6745 = Phi^-1(3/4): MAD / 0.6745 estimates sigma for normal data
+MAD_NORMAL_QUANTILE = 0.6745
+OUTLIER_INDEX_LIMIT = 1000
+
+
+def quantile_position(n, q):
+    """(lower rank, fraction) of the interpolated q-quantile of n values"""
+    position = (n - 1) * q
+    lower = math.floor(position)
+    return lower, position - lower
+
+
+def interpolated(ordered, lower, fraction):
+    """Quantile from an array in which ranks lower and lower + 1 are in place"""
+    value = float(ordered[lower])
+    if fraction:
+        value += fraction * (float(ordered[lower + 1]) - value)
+    return value
+
+
+def middle(ordered):
+    """Median of an array in which its middle rank(s) are in place"""
+    n = ordered.size
+    if n % 2:
+        return float(ordered[n // 2])
+    return (float(ordered[n // 2 - 1]) + float(ordered[n // 2])) / 2
+
+
+def middle_ranks(n):
+    return [(n - 1) // 2, n // 2]
+
+
+def select_ranks(work, ranks, offset=0):
+    """Partition `work` in place so every rank in the ascending list is in its sorted position.
+
+    Values between two selected ranks end up between them, in no
+    particular order. `offset` is the rank of work[0] (for segments).
+    """
+    if not ranks:
+        return
+    split = len(ranks) // 2
+    rank = ranks[split] - offset
+    work.partition(rank)
+    select_ranks(work[:rank], ranks[:split], offset)
+    select_ranks(work[rank + 1:], ranks[split + 1:], offset + rank + 1)
+
+
+def quartile_ranks(n, positions):
+    return [rank for lower, _ in positions for rank in (lower, min(lower + 1, n - 1))]
+
+
+def order_statistics(column, ranks):
+    """Array in which the given ranks of the column's values are in place.
+
+    The column's sorted view if it has one (do not modify it), else a
+    partitioned copy of the values. Returns (array, is_copy).
+    """
+    ordered = column.peek('sorted')
+    if ordered is not None:
+        return ordered, False
+    ordered = column.values.copy()
+    select_ranks(ordered, sorted(set(ranks)))
+    return ordered, True
+
+
+def quartiles(column):
+    """(Q1, Q3) of a non-empty column, interpolated as in robust_statistics"""
+    positions = [quantile_position(len(column), q) for q in (0.25, 0.75)]
+    ordered, _ = order_statistics(column, quartile_ranks(len(column), positions))
+    return tuple(interpolated(ordered, lower, fraction) for lower, fraction in positions)
+
+
+def outliers(values, lower, upper, index_limit):
+    """Count and first indices of the values outside [lower, upper]"""
+    flagged = values < lower
+    flagged |= values > upper
+    count = int(np.count_nonzero(flagged))
+    indices = np.flatnonzero(flagged)[:index_limit] if count else np.empty(0, dtype=np.intp)
+    return {'lower': lower, 'upper': upper, 'count': count, 'indices': indices.tolist()}
+
+
+def robust_statistics(values, precision=FLOAT64, trim=DEFAULT_TRIM, tukey_k=TUKEY_K,
+                      mad_threshold=MAD_THRESHOLD, index_limit=OUTLIER_INDEX_LIMIT):
+    """Median, quartiles, IQR, MAD, trimmed/winsorized means and outliers.
+
+    `values` is a NumericColumn (or anything as_column accepts) of at
+    least one value; `trim` is the proportion cut from each end, in
+    [0, 0.5). The trimmed sums use the precision mode's summation.
+    """
+    if not 0 <= trim < 0.5:
+        raise ValueError('trim must be at least 0 and less than 0.5')
+    column = as_column(values, precision.dtype)
+    present = column.values
+    n = present.size
+    if n == 0:
+        raise ValueError('robust statistics need at least one value')
+
+    positions = [quantile_position(n, q) for q in (0.25, 0.75)]
+    cut = int(trim * n)
+    ordered, is_copy = order_statistics(column, [cut, n - cut - 1, *middle_ranks(n), *quartile_ranks(n, positions)])
+    scratch = ordered if is_copy else None
+
+    median = middle(ordered)
+    q1, q3 = (interpolated(ordered, lower, fraction) for lower, fraction in positions)
+    iqr = q3 - q1
+    kept = ordered[cut:n - cut]
+    kept_sum = precision.sum(NumericColumn(kept))
+    low, high = float(ordered[cut]), float(ordered[n - cut - 1])
+    trimmed_mean = kept_sum / kept.size
+    winsorized_mean = (kept_sum + cut * (low + high)) / n
+
+    # Absolute deviations, written over the partitioned copy now that it is no longer needed
+    if scratch is None:
+        scratch = np.empty_like(ordered)
+    np.subtract(ordered, ordered.dtype.type(median), out=scratch)
+    np.abs(scratch, out=scratch)
+    select_ranks(scratch, sorted(set(middle_ranks(n))))
+    mad = middle(scratch)
+
+    tukey = outliers(present, q1 - tukey_k * iqr, q3 + tukey_k * iqr, index_limit)
+    if mad > 0:
+        reach = mad_threshold * mad / MAD_NORMAL_QUANTILE
+        mad_rule = outliers(present, median - reach, median + reach, index_limit)
+    else:
+        mad_rule = {'lower': median, 'upper': median, 'count': 0, 'indices': []}
+
+    return {
+        'n': n,
+        'median': median,
+        'q1': q1,
+        'q3': q3,
+        'iqr': iqr,
+        'mad': mad,
+        'trim': trim,
+        'trimmedCount': 2 * cut,
+        'trimmedMean': trimmed_mean,
+        'winsorizedMean': winsorized_mean,
+        'tukey': {'k': tukey_k, **tukey},
+        'madRule': {'threshold': mad_threshold, **mad_rule},
+    }
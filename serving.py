@@ -0,0 +1,354 @@
+"""Pool serving mode: a bounded compute pool behind cost-based admission.
+
+Under sync gunicorn workers one large analysis occupies a whole worker:
+cheap requests queue behind it and overload shows up as timeouts. In the
+`pool` serving mode the app runs under gunicorn's gthread worker, whose
+event loop accepts and keeps connections alive and hands each request to
+a thread, and the analyses are routed through two lanes:
+
+* interactive  requests whose estimated cost is at most
+               INTERACTIVE_MAX_SECONDS run in the request thread, so they
+               never wait behind large jobs
+* bulk         everything else is parsed and analysed in a
+               ProcessPoolExecutor of POOL_WORKERS processes; the request
+               thread only waits for the result, so the worker keeps
+               serving while large jobs hold the pool's CPUs
+
+Admission happens before the body is read: `estimate_cost` turns the
+Content-Length into estimated CPU seconds, priced at the dearest
+precision mode and correlation method since the options are inside the
+body (a body without Content-Length is priced as a full bulk backlog).
+A lane admits a request only while its backlog (estimated seconds
+admitted and not yet finished, per worker) stays within its limit. Otherwise the request is answered at once with 429 and a
+Retry-After of the time the backlog needs to drain that far. A lane that
+is idle admits any request, so an input larger than the limit still runs
+on its own. Cache lookups and request coalescing come after admission,
+so a repeated request holds its place in its lane while it is answered.
+A pooled job that has not finished after JOB_TIMEOUT_SECONDS is
+answered with 503; the job itself runs on and its process is busy until
+it ends.
+
+Pool processes log through their own copy of the structured_log
+pipeline, configured like the parent's, and their records carry the
+fields of the request that submitted the job.
+
+Backlogs and pools are per gunicorn worker process. The default `inline`
+mode runs everything in the request thread with no admission control.
+
+Configuration (app.config, else the environment):
+    SERVING_MODE                 inline (default) or pool
+    POOL_WORKERS                 bulk-lane processes (default: CPUs - 1)
+    INTERACTIVE_MAX_SECONDS      largest estimated cost of an interactive request (0.05)
+    INTERACTIVE_BACKLOG_SECONDS  interactive-lane backlog limit (1)
+    BULK_BACKLOG_SECONDS         bulk-lane backlog limit per pool process (10)
+    COST_SCALE                   multiplier on the estimates, for slower or faster hosts (1)
+    JOB_TIMEOUT_SECONDS          longest wait for a pooled job's result (120)
+"""
+import math
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
+
+from flask import g, has_request_context, jsonify, request
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+from precision import DEFAULT_PRECISION
+import structured_log
+from structured_log import bind
+
+SERVING_MODES = ('inline', 'pool')
+DEFAULT_SERVING_MODE = 'inline'
+DEFAULT_INTERACTIVE_MAX_SECONDS = 0.05
+DEFAULT_INTERACTIVE_BACKLOG_SECONDS = 1.0
+DEFAULT_BULK_BACKLOG_SECONDS = 10.0
+DEFAULT_JOB_TIMEOUT_SECONDS = 120.0
+
+# Request bytes one process parses and analyses per second (descriptive
+# statistics, end to end), and the relative cost of the other analyses
+BYTES_PER_SECOND = {'exact': 6e6, 'float64': 32e6, 'float32': 32e6}
+ANALYSIS_WEIGHTS = {'descriptive': 1.0, 'ttest': 1.0, 'chisquare': 1.0, 'correlation': 1.0}
+METHOD_WEIGHTS = {'pearson': 1.0, 'spearman': 1.5, 'kendall': 4.0}
+# Requests are priced before their options are read, at the dearest ones
+DEAREST_PRECISION = min(BYTES_PER_SECOND, key=BYTES_PER_SECOND.get)
+DEAREST_METHOD = max(METHOD_WEIGHTS, key=METHOD_WEIGHTS.get)
+
+Ticket = namedtuple('Ticket', ['lane', 'cost'])
+
+
+def estimate_cost(analysis, nbytes, precision=DEFAULT_PRECISION, method=None, scale=1.0):
+    """Estimated CPU seconds of an analysis request with nbytes of input"""
+    rate = BYTES_PER_SECOND.get(precision, BYTES_PER_SECOND['exact'])
+    weight = ANALYSIS_WEIGHTS.get(analysis, 1.0)
+    if analysis == 'correlation':
+        weight *= METHOD_WEIGHTS.get(method or 'pearson', 1.0)
+    return scale * weight * nbytes / rate
+
+
+def default_workers():
+    """One pool process per CPU, leaving one for the request threads"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def pool_context():
+    """forkserver where available: forking a process that runs threads is unsafe"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['analyses'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def call_in_scope(state, fn, args, kwargs):
+    """fn(*args, **kwargs) in a pool process, logging under the submitting request's scope"""
+    if state is None:
+        return fn(*args, **kwargs)
+    token = structured_log.resume_request(state)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        structured_log.end_request(token)
+
+
+class Overloaded(TooManyRequests):
+    """429 for a request its lane has no room for"""
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f'Server busy: the {lane} queue is full. Retry in {retry_after}s.',
+                         retry_after=retry_after)
+        self.lane = lane
+
+
+class JobTimeout(ServiceUnavailable):
+    """503 for a pooled job whose result did not arrive in time"""
+
+    def __init__(self, lane, timeout):
+        retry_after = max(1, math.ceil(timeout))
+        super().__init__(f'The analysis did not finish within {timeout:g}s. Retry in {retry_after}s.',
+                         retry_after=retry_after)
+        self.lane = lane
+
+
+def error_response(error):
+    """JSON body and Retry-After header for an Overloaded or JobTimeout"""
+    return (jsonify({'error': error.description, 'lane': error.lane, 'retryAfter': error.retry_after}),
+            error.code, {'Retry-After': str(error.retry_after)})
+
+
+class Lane:
+    """Backlog limit of one lane, and where its jobs run (inline or in a process pool)."""
+
+    def __init__(self, name, workers, backlog_seconds, pooled=False, job_timeout=DEFAULT_JOB_TIMEOUT_SECONDS):
+        self.name = name
+        self.workers = workers
+        self.backlog_seconds = backlog_seconds
+        self.pooled = pooled
+        self.job_timeout = job_timeout
+        self.outstanding = 0.0  # estimated seconds admitted and not yet finished
+        self.jobs = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._counters = {'admitted': 0, 'rejected': 0, 'completed': 0, 'timeouts': 0, 'poolRestarts': 0}
+
+    def admit(self, cost):
+        """Reserve `cost` seconds of the backlog, or raise Overloaded."""
+        budget = self.backlog_seconds * self.workers
+        with self._lock:
+            if self.jobs and self.outstanding + cost > budget:
+                self._counters['rejected'] += 1
+                wait = (self.outstanding - max(0.0, budget - cost)) / self.workers
+                raise Overloaded(self.name, max(1, math.ceil(wait)))
+            self.outstanding += cost
+            self.jobs += 1
+            self._counters['admitted'] += 1
+        return Ticket(self, cost)
+
+    def release(self, ticket):
+        with self._lock:
+            self.jobs -= 1
+            # Reset when idle so float round-off cannot accumulate
+            self.outstanding = self.outstanding - ticket.cost if self.jobs else 0.0
+            self._counters['completed'] += 1
+
+    def run(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) in this lane; exceptions propagate to the caller.
+
+        A pooled job whose result takes longer than job_timeout raises
+        JobTimeout, so a stuck job cannot hold the request thread forever.
+        """
+        if not self.pooled:
+            return fn(*args, **kwargs)
+        executor = self.executor()
+        future = executor.submit(call_in_scope, structured_log.scope_state(), fn, args, kwargs)
+        try:
+            return future.result(timeout=self.job_timeout)
+        except FutureTimeout:
+            future.cancel()  # still queued: never start it
+            with self._lock:
+                self._counters['timeouts'] += 1
+            raise JobTimeout(self.name, self.job_timeout) from None
+        except BrokenProcessPool:
+            # A pool process died (e.g. out of memory): start a fresh pool next time
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+                    self._counters['poolRestarts'] += 1
+            raise
+
+    def executor(self):
+        """The lane's process pool, started on first use in this process."""
+        with self._lock:
+            # A pool inherited across fork (gunicorn --preload) belongs to the parent
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=pool_context(),
+                                                     initializer=structured_log.configure_process,
+                                                     initargs=(structured_log.pipeline.settings,))
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def metrics(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot.update(jobs=self.jobs, outstandingSeconds=round(self.outstanding, 4))
+        snapshot.update(workers=self.workers, backlogSeconds=self.backlog_seconds, pooled=self.pooled)
+        if self.pooled:
+            snapshot['jobTimeoutSeconds'] = self.job_timeout
+        return snapshot
+
+
+class Admission:
+    """The serving mode, its two lanes and the choice between them."""
+
+    def __init__(self):
+        self.configure()
+
+    def configure(self, mode=DEFAULT_SERVING_MODE, workers=None,
+                  interactive_max_seconds=DEFAULT_INTERACTIVE_MAX_SECONDS,
+                  interactive_backlog_seconds=DEFAULT_INTERACTIVE_BACKLOG_SECONDS,
+                  bulk_backlog_seconds=DEFAULT_BULK_BACKLOG_SECONDS, cost_scale=1.0,
+                  job_timeout=DEFAULT_JOB_TIMEOUT_SECONDS):
+        """(Re)build the lanes; raises ValueError on an unknown mode."""
+        mode = str(mode).strip().lower()
+        if mode not in SERVING_MODES:
+            raise ValueError(f"Unknown serving mode '{mode}'. Use one of: {', '.join(SERVING_MODES)}")
+        self.shutdown()
+        self.mode = mode
+        self.interactive_max_seconds = float(interactive_max_seconds)
+        self.cost_scale = float(cost_scale)
+        # Interactive jobs share the worker's GIL: one worker's worth of backlog
+        self.interactive = Lane('interactive', 1, float(interactive_backlog_seconds))
+        self.bulk = Lane('bulk', int(workers or default_workers()), float(bulk_backlog_seconds), pooled=True,
+                         job_timeout=float(job_timeout))
+
+    @property
+    def enabled(self):
+        return self.mode == 'pool'
+
+    def lane(self, cost):
+        return self.interactive if cost <= self.interactive_max_seconds else self.bulk
+
+    def admit(self, cost):
+        return self.lane(cost).admit(cost)
+
+    def unknown_size_cost(self):
+        """Cost of a request without Content-Length: one bulk worker's full backlog"""
+        return max(self.bulk.backlog_seconds, math.nextafter(self.interactive_max_seconds, math.inf))
+
+    def shutdown(self):
+        """Stop the bulk lane's pool processes, if any were started."""
+        bulk = getattr(self, 'bulk', None)
+        if bulk is not None:
+            bulk.shutdown()
+
+    def metrics(self):
+        return {
+            'mode': self.mode,
+            'interactiveMaxSeconds': self.interactive_max_seconds,
+            'costScale': self.cost_scale,
+            'lanes': {lane.name: lane.metrics() for lane in (self.interactive, self.bulk)},
+        }
+
+
+admission = Admission()
+
+
+def request_cost(analysis):
+    """Estimated cost of the current request from its Content-Length alone (body not read)"""
+    if request.content_length is None:
+        # Streamed body (Transfer-Encoding: chunked): its size is unknown, so it
+        # is priced as a whole bulk worker's backlog and never runs inline
+        return admission.unknown_size_cost()
+    return estimate_cost(analysis, request.content_length, DEAREST_PRECISION, DEAREST_METHOD, admission.cost_scale)
+
+
+def admitted(analysis):
+    """Admit the view's request to a lane by its estimated cost, or answer 429.
+
+    Place it above @cached_analysis: fingerprinting reads the whole body,
+    and a request the lane has no room for is answered before that.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not admission.enabled:
+                return view(*args, **kwargs)
+            cost = request_cost(analysis)
+            try:
+                ticket = admission.admit(cost)
+            except Overloaded as e:
+                bind(lane=e.lane, estimatedMs=round(cost * 1000, 1), retryAfter=e.retry_after)
+                raise
+            bind(lane=ticket.lane.name, estimatedMs=round(cost * 1000, 1))
+            g.serving_ticket = ticket
+            try:
+                return view(*args, **kwargs)
+            finally:
+                g.pop('serving_ticket', None)
+                ticket.lane.release(ticket)
+        return wrapper
+    return decorator
+
+
+def run(fn, *args, **kwargs):
+    """fn(*args, **kwargs) in the current request's lane: inline, or in the compute pool.
+
+    Pooled calls pickle fn by reference, so it must be a module-level function.
+    """
+    ticket = g.get('serving_ticket') if has_request_context() else None
+    if ticket is None:
+        return fn(*args, **kwargs)
+    return ticket.lane.run(fn, *args, **kwargs)
+
+
+def init_app(app):
+    """Configure the serving mode, the 429/503 responses and the lane metrics route."""
+    def setting(name, default):
+        return app.config.get(name, os.environ.get(name, default))
+
+    admission.configure(mode=setting('SERVING_MODE', DEFAULT_SERVING_MODE),
+                        workers=setting('POOL_WORKERS', None),
+                        interactive_max_seconds=setting('INTERACTIVE_MAX_SECONDS', DEFAULT_INTERACTIVE_MAX_SECONDS),
+                        interactive_backlog_seconds=setting('INTERACTIVE_BACKLOG_SECONDS',
+                                                            DEFAULT_INTERACTIVE_BACKLOG_SECONDS),
+                        bulk_backlog_seconds=setting('BULK_BACKLOG_SECONDS', DEFAULT_BULK_BACKLOG_SECONDS),
+                        cost_scale=setting('COST_SCALE', 1.0),
+                        job_timeout=setting('JOB_TIMEOUT_SECONDS', DEFAULT_JOB_TIMEOUT_SECONDS))
+
+    app.register_error_handler(Overloaded, error_response)
+    app.register_error_handler(JobTimeout, error_response)
+
+    @app.route('/api/metrics/serving', methods=['GET'])
+    def serving_metrics():
+        return jsonify(admission.metrics())
+
+    return admission
@@ -0,0 +1,338 @@
+"""Single-flight coalescing of identical concurrent computations.
+
+When many identical requests arrive together, only the first one (the
+leader) computes; the others wait and share its result.
+
+* Within a process, waiters block on the leader's in-memory `_Flight`.
+* Across processes (gunicorn workers on one host), the leader of each
+  process takes an exclusive `flock` on <dir>/<key>.lock. Another process
+  that finds the lock held takes a shared `flock` on <key>.wait, waits
+  for the lock and then reads the published result. The leader writes
+  <key>.result only when someone holds <key>.wait; otherwise it removes
+  both lock files, so an uncontended request leaves nothing behind.
+  Published results expire after `result_ttl` seconds, and the oldest are
+  removed once the store exceeds `max_bytes`; a background thread does
+  both, off the request path. Cross-process coalescing needs `fcntl` and
+  is skipped where it is unavailable.
+
+The directory must be private to this user: it is created with mode 0700
+(the default is <tmp>/statcalc-single-flight-<uid>), and one that is a
+symlink or owned by another user is not used, since anything in it would
+be served as a result. Coalescing then stays within the process.
+
+Only results that are deterministic for the input are shared (any status
+below 500). If the leader raises or returns a 5xx, its waiters are woken
+and elect a new leader among themselves; a waiter that has seen
+`max_attempts` failed leaders returns the last failure instead of trying
+again.
+"""
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from structured_log import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within the process only
+    fcntl = None
+
+FlightResult = namedtuple('FlightResult', ['status', 'body', 'mimetype'])
+
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(),
+                           f"statcalc-single-flight-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+LOCK_POLL_SECONDS = 0.005
+
+log = get_logger('single_flight')
+
+
+def is_shareable(result):
+    """Client errors are as deterministic as successes; server errors are not."""
+    return result.status < 500
+
+
+class LeaderFailed(Exception):
+    """Raised to a waiter whose leader failed `max_attempts` times in a row."""
+
+    def __init__(self, result=None, error=None):
+        super().__init__('single-flight leader failed')
+        self.result = result
+        self.error = error
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key."""
+
+    def __init__(self, directory=DEFAULT_DIR, cross_process=True, result_ttl=30.0,
+                 wait_timeout=60.0, max_attempts=2, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.cross_process = cross_process and fcntl is not None
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.max_attempts = max_attempts
+        self.max_bytes = max_bytes
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._checked_directory = None  # (directory, usable) for this process
+        self._sweeper_pid = None
+        self._sweep_now = threading.Event()
+        self._counters = {
+            'calls': 0,
+            'computed': 0,
+            'coalescedLocal': 0,
+            'coalescedRemote': 0,
+            'leaderFailures': 0,
+            'reelections': 0,
+            'timeouts': 0,
+            'published': 0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def metrics(self):
+        """Counters for this process plus the coalescing ratio."""
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot['inFlight'] = len(self._flights)
+        coalesced = snapshot['coalescedLocal'] + snapshot['coalescedRemote']
+        snapshot['coalescingRatio'] = round(coalesced / snapshot['calls'], 4) if snapshot['calls'] else 0.0
+        snapshot['crossProcess'] = self.cross_process
+        snapshot['pid'] = os.getpid()
+        return snapshot
+
+    def reset_metrics(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def do(self, key, compute):
+        """Return compute()'s FlightResult, sharing it with concurrent callers."""
+        self._count('calls')
+        last_failure = None
+        for attempt in range(self.max_attempts):
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+
+            if leader:
+                return self._lead(key, flight, compute)
+
+            if not flight.done.wait(self.wait_timeout):
+                # Leader is stuck; stop waiting and compute independently
+                self._count('timeouts')
+                return self._compute(compute)
+
+            if flight.error is None and is_shareable(flight.result):
+                self._count('coalescedLocal')
+                return flight.result
+
+            last_failure = flight
+            if attempt + 1 < self.max_attempts:
+                self._count('reelections')
+
+        raise LeaderFailed(last_failure.result, last_failure.error)
+
+    def _lead(self, key, flight, compute):
+        try:
+            if self.cross_process and self._private_directory():
+                flight.result = self._lead_across_processes(key, compute)
+            else:
+                flight.result = self._compute(compute)
+            if not is_shareable(flight.result):
+                self._count('leaderFailures')
+            return flight.result
+        except BaseException as error:
+            flight.error = error
+            self._count('leaderFailures')
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _compute(self, compute):
+        self._count('computed')
+        return compute()
+
+    # ===== Cross-process layer =====
+
+    def _private_directory(self):
+        """Create the directory (mode 0700) once per process; False if others could use it"""
+        directory = self.directory
+        checked = self._checked_directory
+        if checked is not None and checked[0] == directory and checked[2] == os.getpid():
+            return checked[1]
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            info = os.lstat(directory)
+            usable = stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid()
+            if usable and stat.S_IMODE(info.st_mode) & 0o077:
+                os.chmod(directory, 0o700)
+        except OSError:
+            usable = False
+        if not usable:
+            log.warning('single-flight directory is not private; coalescing within the process only',
+                        directory=directory)
+        self._checked_directory = (directory, usable, os.getpid())
+        if usable:
+            self._start_sweeper()
+        return usable
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.lock', base + '.wait', base + '.result'
+
+    def _lead_across_processes(self, key, compute):
+        lock_path, wait_path, result_path = self._paths(key)
+
+        with open(wait_path, 'a+b') as wait_file, open(lock_path, 'a+b') as lock_file:
+            # Held while waiting for another process's leader, so it publishes
+            fcntl.flock(wait_file, fcntl.LOCK_SH)
+            waited = not self._try_lock(lock_file)
+            if waited and not self._wait_for_lock(lock_file):
+                fcntl.flock(wait_file, fcntl.LOCK_UN)
+                self._count('timeouts')
+                return self._compute(compute)
+            try:
+                if waited:
+                    published = self._read_result(result_path)
+                    if published is not None:
+                        self._count('coalescedRemote')
+                        return published
+                    # The other process failed (or its result expired): take over
+                fcntl.flock(wait_file, fcntl.LOCK_UN)
+
+                result = self._compute(compute)
+                if not self._try_lock(wait_file):
+                    if is_shareable(result):
+                        self._publish(result_path, result)
+                else:
+                    # Nobody is waiting: leave no files behind. A process that
+                    # opened them just before they are unlinked merely computes
+                    # on its own, like one arriving after this leader finished.
+                    self._remove(lock_path, wait_path)
+                    fcntl.flock(wait_file, fcntl.LOCK_UN)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _try_lock(lock_file):
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    @staticmethod
+    def _remove(*paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _wait_for_lock(self, lock_file):
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            if self._try_lock(lock_file):
+                return True
+        return False
+
+    def _publish(self, result_path, result):
+        if len(result.body) > self.max_bytes:
+            return
+        header = json.dumps({'status': result.status, 'mimetype': result.mimetype}).encode('utf-8')
+        tmp_path = f'{result_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header + b'\n' + result.body)
+        os.replace(tmp_path, result_path)
+        self._count('published')
+        self._sweep_now.set()
+
+    def _read_result(self, result_path):
+        try:
+            if time.time() - os.path.getmtime(result_path) > self.result_ttl:
+                return None
+            with open(result_path, 'rb') as f:
+                header, body = f.read().split(b'\n', 1)
+        except (OSError, ValueError):
+            return None
+        meta = json.loads(header)
+        return FlightResult(meta['status'], body, meta['mimetype'])
+
+    # ===== Expiry (background thread) =====
+
+    def _start_sweeper(self):
+        """Start this process's sweeper thread, once (again after a fork)"""
+        with self._lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+            self._sweep_now = threading.Event()
+        threading.Thread(target=self._sweep_forever, name='single-flight-sweeper', daemon=True).start()
+
+    def _sweep_forever(self):
+        while True:
+            # Every result_ttl, and soon after a publish so max_bytes holds
+            self._sweep_now.wait(self.result_ttl)
+            self._sweep_now.clear()
+            self._expire_old_results()
+
+    def _expire_old_results(self):
+        """Remove expired results and idle lock files, then the oldest results over max_bytes"""
+        cutoff = time.time() - self.result_ttl
+        results = []
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    info = entry.stat(follow_symlinks=False)
+                    if entry.name.endswith('.result'):
+                        if info.st_mtime < cutoff:
+                            os.remove(entry.path)
+                        else:
+                            results.append((info.st_mtime, info.st_size, entry.path))
+                    elif info.st_mtime >= cutoff:
+                        continue
+                    elif entry.name.endswith(('.lock', '.wait')):
+                        self._remove_idle_lock(entry.path)
+                    elif entry.name.endswith('.tmp'):
+                        os.remove(entry.path)  # left by a process that died mid-publish
+                except OSError:
+                    pass
+
+        total = sum(size for _, size, _ in results)
+        for _, size, path in sorted(results):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove_idle_lock(self, path):
+        # Only unlink lock files nobody holds; losing a race here merely
+        # costs one missed coalescing opportunity, never a wrong result.
+        with open(path, 'a+b') as lock_file:
+            if self._try_lock(lock_file):
+                os.remove(path)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -39,15 +39,198 @@ function displayResult(elementId, data, isError = false) {
     resultDiv.innerHTML = data;
 }
 
+// ===== Stats worker =====
+// Binning, decimation and small client-side analyses run in a Web Worker so
+// the page stays responsive with large inputs. Falls back to running the
+// same StatsCore code inline when Workers are unavailable.
+const MAX_SCATTER_POINTS = 4000;
+const MAX_HISTOGRAM_BINS = 100;
+
+const statsWorker = createStatsWorker();
+const pendingJobs = new Map();
+let nextJobId = 0;
+
+function createStatsWorker() {
+    const workerUrl = document.body.dataset.statsWorker;
+    const coreUrl = document.body.dataset.statsCore;
+    if (!window.Worker || !workerUrl) {
+        return null;
+    }
+    try {
+        const worker = new Worker(`${workerUrl}?core=${encodeURIComponent(coreUrl)}`);
+        worker.onmessage = (event) => {
+            const { id, result, error } = event.data;
+            const job = pendingJobs.get(id);
+            if (!job) {
+                return;
+            }
+            pendingJobs.delete(id);
+            error ? job.reject(new Error(error)) : job.resolve(result);
+        };
+        return worker;
+    } catch (error) {
+        console.warn('Stats worker unavailable, computing on the main thread:', error);
+        return null;
+    }
+}
+
+// Run a StatsCore job; typed arrays listed in `transfer` are moved to the worker
+function runStatsJob(type, payload, transfer = []) {
+    if (!statsWorker) {
+        return Promise.resolve().then(() => StatsCore.handleJob(type, payload).result);
+    }
+    return new Promise((resolve, reject) => {
+        const id = nextJobId++;
+        pendingJobs.set(id, { resolve, reject });
+        statsWorker.postMessage({ id, type, payload }, transfer);
+    });
+}
+
+// Small text inputs are analysed in the browser; null means "ask the server"
+async function analyzeLocally(kind, text) {
+    try {
+        return await runStatsJob('analyze', { kind, text });
+    } catch (error) {
+        return null;
+    }
+}
+
+// Latest chart request per tab, so a slow worker reply never overwrites a newer chart
+const chartRequests = {
+    descriptive: 0,
+    ttest: 0,
+    correlation: 0
+};
+
+function formatBinLabels(min, binWidth, binCount) {
+    const labels = [];
+    for (let i = 0; i < binCount; i++) {
+        const binStart = min + (i * binWidth);
+        const binEnd = binStart + binWidth;
+        labels.push(`${binStart.toFixed(1)}-${binEnd.toFixed(1)}`);
+    }
+    return labels;
+}
+
+// ===== Chunked uploads =====
+// Large descriptive-statistics files are sent in chunks that the server
+// parses as they arrive. The upload id is remembered per file, so after a
+// dropped connection (or a page reload) the upload resumes from the offset
+// the server last acknowledged instead of starting over.
+const CHUNKED_UPLOAD_MIN_BYTES = 8 * 1024 * 1024;
+const UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024;
+const UPLOAD_RETRIES = 5;
+
+function uploadKey(file) {
+    return `statcalc-upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function fetchJson(url, options = {}) {
+    const response = await fetch(url, options);
+    return { response, body: await response.json() };
+}
+
+async function resumeOrCreateUpload(file) {
+    const savedId = localStorage.getItem(uploadKey(file));
+    if (savedId) {
+        try {
+            const { response, body } = await fetchJson(`/api/uploads/${savedId}`);
+            if (response.ok) {
+                return body;
+            }
+        } catch (error) {
+            // Fall through and start a new upload
+        }
+    }
+    const { response, body } = await fetchJson('/api/uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ analysis: 'descriptive', robust: true, density: true })
+    });
+    if (!response.ok) {
+        throw new Error(body.error);
+    }
+    localStorage.setItem(uploadKey(file), body.uploadId);
+    return body;
+}
+
+async function uploadInChunks(file, onProgress) {
+    const upload = await resumeOrCreateUpload(file);
+    const url = `/api/uploads/${upload.uploadId}`;
+    let offset = upload.finalized ? file.size : upload.offset;
+    let failures = 0;
+
+    while (offset < file.size) {
+        onProgress(offset / file.size);
+        try {
+            const { response, body } = await fetchJson(`${url}?offset=${offset}`, {
+                method: 'PUT',
+                body: file.slice(offset, offset + UPLOAD_CHUNK_BYTES)
+            });
+            // 409: the server is elsewhere (e.g. an acknowledgement was lost); continue from its offset
+            if (response.ok || response.status === 409) {
+                offset = body.offset;
+                failures = 0;
+                continue;
+            }
+            if (response.status < 500) {
+                localStorage.removeItem(uploadKey(file));
+                throw Object.assign(new Error(body.error), { fatal: true });
+            }
+        } catch (error) {
+            if (error.fatal || ++failures > UPLOAD_RETRIES) {
+                throw error;
+            }
+        }
+        // Back off, then ask the server how far it got
+        await new Promise(resolve => setTimeout(resolve, 500 * 2 ** failures));
+        try {
+            const { response, body } = await fetchJson(url);
+            if (response.ok) {
+                offset = body.offset;
+            }
+        } catch (error) {
+            // Still offline; the next attempt retries from the same offset
+        }
+    }
+
+    onProgress(1);
+    const { response, body } = await fetchJson(`${url}/finalize`, { method: 'POST' });
+    if (response.ok) {
+        localStorage.removeItem(uploadKey(file));
+    }
+    return { response, result: body };
+}
+
 // Calculate Descriptive Statistics
 async function calculateDescriptive() {
     const input = document.getElementById('descriptive-input').value;
     const fileInput = document.getElementById('descriptive-file');
-    
+
+    // Large files go through the resumable chunked upload
+    if (fileInput.files.length > 0 && fileInput.files[0].size >= CHUNKED_UPLOAD_MIN_BYTES) {
+        try {
+            const { response, result } = await uploadInChunks(fileInput.files[0], (fraction) => {
+                displayResult('descriptive-result', `<p>Uploading… ${Math.floor(fraction * 100)}%</p>`);
+            });
+            if (!response.ok) {
+                displayResult('descriptive-result', result.error, true);
+                return;
+            }
+            displayDescriptiveResult(result);
+        } catch (error) {
+            displayResult('descriptive-result', `Upload failed: ${error.message}`, true);
+        }
+        return;
+    }
+
     // Check if file is uploaded
     if (fileInput.files.length > 0) {
         const formData = new FormData();
         formData.append('file', fileInput.files[0]);
+        formData.append('robust', 'true');
+        formData.append('density', 'true');
+        formData.append('includeData', 'false');
         
         try {
             const response = await fetch('/api/descriptive-stats', {
@@ -75,13 +258,20 @@ async function calculateDescriptive() {
         return;
     }
     
+    // Small inputs skip the server round trip
+    const localResult = await analyzeLocally('descriptive', input);
+    if (localResult) {
+        displayDescriptiveResult(localResult);
+        return;
+    }
+    
     try {
         const response = await fetch('/api/descriptive-stats', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ data: input })
+            body: JSON.stringify({ data: input, robust: true, density: true, includeData: false })
         });
         
         const result = await response.json();
@@ -97,6 +287,40 @@ async function calculateDescriptive() {
     }
 }
 
+// Quartiles, MAD, trimmed means and outlier counts (sent when robust: true)
+function robustStatsHtml(robust) {
+    const trimPercent = Math.round(robust.trim * 100);
+    return `
+        <h4>Robust Statistics</h4>
+        <div class="stats-grid">
+            <div class="stat-card">
+                <div class="stat-label">Q1 / Q3</div>
+                <div class="stat-value">${robust.q1} / ${robust.q3}</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-label">IQR</div>
+                <div class="stat-value">${robust.iqr}</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-label">MAD</div>
+                <div class="stat-value">${robust.mad}</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-label">${trimPercent}% Trimmed Mean</div>
+                <div class="stat-value">${robust.trimmedMean}</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-label">${trimPercent}% Winsorized Mean</div>
+                <div class="stat-value">${robust.winsorizedMean}</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-label">Outliers (Tukey / MAD)</div>
+                <div class="stat-value">${robust.tukey.count} / ${robust.madRule.count}</div>
+            </div>
+        </div>
+    `;
+}
+
 function displayDescriptiveResult(result) {
     const html = `
         <h3>📊 Descriptive Statistics Results</h3>
@@ -142,12 +366,17 @@ function displayDescriptiveResult(result) {
                 <div class="stat-value">${result.range}</div>
             </div>
         </div>
+        ${result.robust ? robustStatsHtml(result.robust) : ''}
     `;
     
     displayResult('descriptive-result', html);
     
-    // Create chart if raw data is available
-    if (result.rawData) {
+    // Server results carry a density curve; local ones the raw data
+    if (result.density) {
+        createDensityChart('descriptive', result.density, {
+            text: `Density (Mean=${result.mean}, Median=${result.median}, StdDev=${result.stdDev})`
+        });
+    } else if (result.rawData) {
         createDescriptiveChart(result, result.rawData);
     }
 }
@@ -161,6 +390,8 @@ async function calculateTTest() {
     if (fileInput.files.length > 0) {
         const formData = new FormData();
         formData.append('file', fileInput.files[0]);
+        formData.append('density', 'true');
+        formData.append('includeData', 'false');
         
         try {
             const response = await fetch('/api/t-test', {
@@ -187,13 +418,20 @@ async function calculateTTest() {
         return;
     }
     
+    // Small inputs skip the server round trip
+    const localResult = await analyzeLocally('ttest', input);
+    if (localResult) {
+        displayTTestResult(localResult);
+        return;
+    }
+    
     try {
         const response = await fetch('/api/t-test', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ data: input })
+            body: JSON.stringify({ data: input, density: true, includeData: false })
         });
         
         const result = await response.json();
@@ -257,8 +495,22 @@ function displayTTestResult(result) {
     
     displayResult('ttest-result', html);
     
-    // Create chart if sample data is available
-    if (result.sampleData && result.popMean !== undefined) {
+    // Server results carry a density curve; local ones the sample data
+    if (result.density) {
+        const peak = Math.max(...result.density.density);
+        createDensityChart('ttest', result.density, {
+            text: `One-Sample T-Test: ${result.significance} ${result.significance === 'Significant' ? '✓' : '✗'} (t=${result.tStatistic}, p=${result.pValue})`,
+            color: result.significance === 'Significant' ? 'rgba(231, 76, 60, 1)' : 'rgba(46, 204, 113, 1)'
+        }, [{
+            label: 'Population Mean',
+            data: [{ x: result.populationMean, y: 0 }, { x: result.populationMean, y: peak }],
+            borderColor: 'rgba(231, 76, 60, 1)',
+            borderWidth: 3,
+            borderDash: [5, 5],
+            pointRadius: 0,
+            fill: false
+        }]);
+    } else if (result.sampleData && result.popMean !== undefined) {
         createTTestChart(result, result.sampleData, result.popMean);
     }
 }
@@ -298,6 +550,13 @@ async function calculateChiSquare() {
         return;
     }
     
+    // Small inputs skip the server round trip
+    const localResult = await analyzeLocally('chisquare', input);
+    if (localResult) {
+        displayChiSquareResult(localResult);
+        return;
+    }
+    
     try {
         const response = await fetch('/api/chi-square', {
             method: 'POST',
@@ -371,11 +630,14 @@ function displayChiSquareResult(result) {
 async function calculateCorrelation() {
     const input = document.getElementById('correlation-input').value;
     const fileInput = document.getElementById('correlation-file');
+    const method = document.getElementById('correlation-method').value;
     
     // Check if file is uploaded
     if (fileInput.files.length > 0) {
         const formData = new FormData();
         formData.append('file', fileInput.files[0]);
+        formData.append('method', method);
+        formData.append('regression', 'true');
         
         try {
             const response = await fetch('/api/correlation', {
@@ -408,7 +670,7 @@ async function calculateCorrelation() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ data: input })
+            body: JSON.stringify({ data: input, method: method, regression: true })
         });
         
         const result = await response.json();
@@ -433,8 +695,12 @@ function displayCorrelationResult(result) {
                     <div class="stat-label">Sample Size (n)</div>
                     <div class="stat-value">${result.n}</div>
                 </div>
+                <div class="stat-card">
+                    <div class="stat-label">Method</div>
+                    <div class="stat-value">${result.methodLabel || 'Pearson'}</div>
+                </div>
                 <div class="stat-card highlight">
-                    <div class="stat-label">Correlation Coefficient (r)</div>
+                    <div class="stat-label">Correlation Coefficient (${result.method === 'spearman' ? 'ρ' : result.method === 'kendall' ? 'τ' : 'r'})</div>
                     <div class="stat-value">${result.correlationCoefficient}</div>
                 </div>
                 <div class="stat-card highlight">
@@ -453,6 +719,19 @@ function displayCorrelationResult(result) {
                     <div class="stat-label">Mean Y</div>
                     <div class="stat-value">${result.meanY}</div>
                 </div>
+                ${result.regression && result.regression.slope !== undefined ? `
+                <div class="stat-card">
+                    <div class="stat-label">Slope (± SE)</div>
+                    <div class="stat-value">${result.regression.slope} ± ${result.regression.slopeStdError}</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-label">Intercept (± SE)</div>
+                    <div class="stat-value">${result.regression.intercept} ± ${result.regression.interceptStdError}</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-label">Residual Std Error</div>
+                    <div class="stat-value">${result.regression.residualStdError}</div>
+                </div>` : ''}
                 <div class="stat-card ${result.significance === 'Significant' ? 'significant' : 'not-significant'}">
                     <div class="stat-label">Result</div>
                     <div class="stat-value">${result.significance}</div>
@@ -513,10 +792,79 @@ let charts = {
     correlation: null
 };
 
+// Line chart of a kernel density curve computed by the server (x and density
+// on an even grid), plus any extra datasets such as a reference line
+function createDensityChart(tab, density, title, extraDatasets = []) {
+    const container = document.getElementById(`${tab}-chart-container`);
+    const ctx = document.getElementById(`${tab}-chart`);
+    ++chartRequests[tab];  // a histogram still being binned must not replace this chart
+    
+    if (charts[tab]) {
+        charts[tab].destroy();
+    }
+    
+    container.style.display = 'block';
+    
+    charts[tab] = new Chart(ctx, {
+        type: 'line',
+        data: {
+            datasets: [{
+                label: `Density (bandwidth ${density.bandwidth})`,
+                data: density.x.map((x, i) => ({ x: x, y: density.density[i] })),
+                backgroundColor: 'rgba(102, 126, 234, 0.3)',
+                borderColor: 'rgba(102, 126, 234, 1)',
+                borderWidth: 2,
+                pointRadius: 0,
+                fill: true
+            }, ...extraDatasets]
+        },
+        options: {
+            responsive: true,
+            plugins: {
+                title: {
+                    display: true,
+                    font: { size: 14, weight: 'bold' },
+                    ...title
+                },
+                legend: {
+                    display: true,
+                    position: 'top'
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    title: {
+                        display: true,
+                        text: 'Density'
+                    }
+                },
+                x: {
+                    type: 'linear',
+                    title: {
+                        display: true,
+                        text: 'Value'
+                    }
+                }
+            }
+        }
+    });
+}
+
 // Create histogram for descriptive statistics with frequency distribution
-function createDescriptiveChart(data, numbers) {
+async function createDescriptiveChart(data, numbers) {
     const container = document.getElementById('descriptive-chart-container');
     const ctx = document.getElementById('descriptive-chart');
+    const request = ++chartRequests.descriptive;
+    
+    // Create bins for histogram (frequency distribution) in the worker
+    const binCount = Math.min(10, Math.max(5, Math.ceil(Math.sqrt(numbers.length))));
+    const values = Float64Array.from(numbers);
+    const histogram = await runStatsJob('histogram',
+        { values, binCount, integerEdges: true }, [values.buffer]);
+    if (request !== chartRequests.descriptive) {
+        return;
+    }
     
     // Destroy existing chart if it exists
     if (charts.descriptive) {
@@ -526,29 +874,7 @@ function createDescriptiveChart(data, numbers) {
     // Show container
     container.style.display = 'block';
     
-    // Create bins for histogram (frequency distribution)
-    const min = Math.floor(data.min);
-    const max = Math.ceil(data.max);
-    const binCount = Math.min(10, Math.max(5, Math.ceil(Math.sqrt(numbers.length))));
-    const binWidth = (max - min) / binCount || 1;
-    
-    // Create bins
-    const bins = new Array(binCount).fill(0);
-    const binLabels = [];
-    
-    for (let i = 0; i < binCount; i++) {
-        const binStart = min + (i * binWidth);
-        const binEnd = binStart + binWidth;
-        binLabels.push(`${binStart.toFixed(1)}-${binEnd.toFixed(1)}`);
-    }
-    
-    // Count frequencies
-    numbers.forEach(num => {
-        const binIndex = Math.floor((num - min) / binWidth);
-        if (binIndex >= 0 && binIndex < binCount) {
-            bins[binIndex]++;
-        }
-    });
+    const binLabels = formatBinLabels(histogram.min, histogram.binWidth, binCount);
     
     // Create histogram
     charts.descriptive = new Chart(ctx, {
@@ -557,7 +883,7 @@ function createDescriptiveChart(data, numbers) {
             labels: binLabels,
             datasets: [{
                 label: 'Frequency',
-                data: bins,
+                data: Array.from(histogram.counts),
                 backgroundColor: 'rgba(102, 126, 234, 0.6)',
                 borderColor: 'rgba(102, 126, 234, 1)',
                 borderWidth: 2
@@ -600,9 +926,19 @@ function createDescriptiveChart(data, numbers) {
 }
 
 // Create comparison chart for T-Test - shows sample distribution vs population mean
-function createTTestChart(result, sampleData, popMean) {
+async function createTTestChart(result, sampleData, popMean) {
     const container = document.getElementById('ttest-chart-container');
     const ctx = document.getElementById('ttest-chart');
+    const request = ++chartRequests.ttest;
+    
+    // Create bins for sample data distribution in the worker
+    const binCount = Math.min(MAX_HISTOGRAM_BINS, Math.max(3, Math.ceil(Math.sqrt(sampleData.length))));
+    const values = Float64Array.from(sampleData);
+    const histogram = await runStatsJob('histogram',
+        { values, binCount, integerEdges: false }, [values.buffer]);
+    if (request !== chartRequests.ttest) {
+        return;
+    }
     
     if (charts.ttest) {
         charts.ttest.destroy();
@@ -610,27 +946,7 @@ function createTTestChart(result, sampleData, popMean) {
     
     container.style.display = 'block';
     
-    // Create bins for sample data distribution
-    const min = Math.min(...sampleData);
-    const max = Math.max(...sampleData);
-    const binCount = Math.max(3, Math.ceil(Math.sqrt(sampleData.length)));
-    const binWidth = (max - min) / binCount || 1;
-    
-    const bins = new Array(binCount).fill(0);
-    const binLabels = [];
-    
-    for (let i = 0; i < binCount; i++) {
-        const binStart = min + (i * binWidth);
-        const binEnd = binStart + binWidth;
-        binLabels.push(`${binStart.toFixed(1)}-${binEnd.toFixed(1)}`);
-    }
-    
-    sampleData.forEach(num => {
-        const binIndex = Math.floor((num - min) / binWidth);
-        if (binIndex >= 0 && binIndex < binCount) {
-            bins[binIndex]++;
-        }
-    });
+    const binLabels = formatBinLabels(histogram.min, histogram.binWidth, binCount);
     
     // Create chart with sample distribution and population mean line
     charts.ttest = new Chart(ctx, {
@@ -639,7 +955,7 @@ function createTTestChart(result, sampleData, popMean) {
             labels: binLabels,
             datasets: [{
                 label: 'Sample Distribution',
-                data: bins,
+                data: Array.from(histogram.counts),
                 backgroundColor: 'rgba(102, 126, 234, 0.6)',
                 borderColor: 'rgba(102, 126, 234, 1)',
                 borderWidth: 2
@@ -745,9 +1061,20 @@ function createChiSquareChart(result, observed, expected) {
 }
 
 // Create scatter plot for Correlation
-function createCorrelationChart(result, xValues, yValues) {
+async function createCorrelationChart(result, xValues, yValues) {
     const container = document.getElementById('correlation-chart-container');
     const ctx = document.getElementById('correlation-chart');
+    const request = ++chartRequests.correlation;
+    
+    // Decimate the scatter in the worker; Chart.js only ever sees a few thousand points
+    const xs = Float64Array.from(xValues);
+    const ys = Float64Array.from(yValues);
+    const points = await runStatsJob('decimate',
+        { x: xs, y: ys, threshold: MAX_SCATTER_POINTS }, [xs.buffer, ys.buffer]);
+    if (request !== chartRequests.correlation) {
+        return;
+    }
+    const decimated = points.x.length < xValues.length;
     
     if (charts.correlation) {
         charts.correlation.destroy();
@@ -756,34 +1083,61 @@ function createCorrelationChart(result, xValues, yValues) {
     container.style.display = 'block';
     
     // Create scatter data
-    const scatterData = xValues.map((x, i) => ({ x: x, y: yValues[i] }));
-    
-    // Calculate regression line
-    const n = xValues.length;
-    const sumX = xValues.reduce((a, b) => a + b, 0);
-    const sumY = yValues.reduce((a, b) => a + b, 0);
-    const sumXY = xValues.reduce((sum, x, i) => sum + x * yValues[i], 0);
-    const sumXX = xValues.reduce((sum, x) => sum + x * x, 0);
+    const scatterData = Array.from(points.x, (x, i) => ({ x: x, y: points.y[i] }));
     
-    const slope = (n * sumXY - sumX * sumY) / (n * sumXX - sumX * sumX);
-    const intercept = (sumY - slope * sumX) / n;
+    // Regression line: use the server fit (with prediction band) when available
+    const fit = result.regression;
+    let regressionLine;
+    let bandDatasets = [];
     
-    const minX = Math.min(...xValues);
-    const maxX = Math.max(...xValues);
-    const regressionLine = [
-        { x: minX, y: slope * minX + intercept },
-        { x: maxX, y: slope * maxX + intercept }
-    ];
+    if (fit && fit.predictionBand) {
+        const band = fit.predictionBand;
+        regressionLine = band.x.map((x, i) => ({ x: x, y: band.fit[i] }));
+        bandDatasets = [{
+            label: `${Math.round(fit.confidence * 100)}% Prediction Band`,
+            data: band.x.map((x, i) => ({ x: x, y: band.upper[i] })),
+            type: 'line',
+            borderColor: 'rgba(231, 76, 60, 0.3)',
+            backgroundColor: 'rgba(231, 76, 60, 0.1)',
+            borderWidth: 1,
+            pointRadius: 0,
+            fill: '+1'
+        }, {
+            label: 'Prediction Band (lower)',
+            data: band.x.map((x, i) => ({ x: x, y: band.lower[i] })),
+            type: 'line',
+            borderColor: 'rgba(231, 76, 60, 0.3)',
+            borderWidth: 1,
+            pointRadius: 0,
+            fill: false
+        }];
+    } else {
+        const n = xValues.length;
+        const sumX = xValues.reduce((a, b) => a + b, 0);
+        const sumY = yValues.reduce((a, b) => a + b, 0);
+        const sumXY = xValues.reduce((sum, x, i) => sum + x * yValues[i], 0);
+        const sumXX = xValues.reduce((sum, x) => sum + x * x, 0);
+        
+        const slope = (n * sumXY - sumX * sumY) / (n * sumXX - sumX * sumX);
+        const intercept = (sumY - slope * sumX) / n;
+        
+        const minX = points.minX;
+        const maxX = points.maxX;
+        regressionLine = [
+            { x: minX, y: slope * minX + intercept },
+            { x: maxX, y: slope * maxX + intercept }
+        ];
+    }
     
     charts.correlation = new Chart(ctx, {
         type: 'scatter',
         data: {
-            datasets: [{
-                label: 'Data Points',
+            datasets: [...bandDatasets, {
+                label: decimated ? `Data Points (${scatterData.length} of ${xValues.length} shown)` : 'Data Points',
                 data: scatterData,
                 backgroundColor: 'rgba(102, 126, 234, 0.6)',
                 borderColor: 'rgba(102, 126, 234, 1)',
-                pointRadius: 6,
+                pointRadius: decimated ? 2 : 6,
                 pointHoverRadius: 8
             }, {
                 label: 'Regression Line',
@@ -797,10 +1151,12 @@ function createCorrelationChart(result, xValues, yValues) {
         },
         options: {
             responsive: true,
+            animation: decimated ? false : undefined,
+            parsing: false,
             plugins: {
                 title: {
                     display: true,
-                    text: `Pearson Correlation: ${result.significance} ${result.significance === 'Significant' ? '✓' : '✗'} (r=${result.correlationCoefficient}, p=${result.pValue}, R²=${result.rSquared})`,
+                    text: `${result.methodLabel || 'Pearson'} Correlation: ${result.significance} ${result.significance === 'Significant' ? '✓' : '✗'} (r=${result.correlationCoefficient}, p=${result.pValue}, R²=${result.rSquared})`,
                     font: { size: 14, weight: 'bold' },
                     color: result.significance === 'Significant' ? 'rgba(231, 76, 60, 1)' : 'rgba(46, 204, 113, 1)'
                 },
@@ -0,0 +1,526 @@
+// Pure numeric helpers shared by the page and the stats Web Worker.
+// Loaded with a plain <script> tag on the page (as a fallback when Workers
+// are unavailable) and with importScripts() inside stats-worker.js.
+(function (root) {
+    'use strict';
+
+    // Inputs up to this many values are analysed in the browser without a
+    // server round trip. Larger inputs go to the API as before.
+    const CLIENT_COMPUTE_LIMIT = 5000;
+    const NUMBER_PATTERN = /^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$/;
+
+    // ===== Parsing =====
+
+    // Parse "1, 2, 3" into a Float64Array. Returns null if any token is not a
+    // number, so the caller can defer to the server for the error message.
+    function parseNumberList(text) {
+        const tokens = text.split(',');
+        const values = new Float64Array(tokens.length);
+        let count = 0;
+        for (const token of tokens) {
+            const trimmed = token.trim();
+            if (!trimmed) {
+                continue;
+            }
+            if (!NUMBER_PATTERN.test(trimmed)) {
+                return null;
+            }
+            values[count++] = Number(trimmed);
+        }
+        return values.subarray(0, count);
+    }
+
+    function parseLines(text) {
+        return text.trim().split('\n').map(line => line.trim()).filter(line => line);
+    }
+
+    // ===== Summary helpers =====
+
+    function minMax(values) {
+        let min = Infinity;
+        let max = -Infinity;
+        for (let i = 0; i < values.length; i++) {
+            const v = values[i];
+            if (v < min) min = v;
+            if (v > max) max = v;
+        }
+        return { min, max };
+    }
+
+    // Pairwise (cascade) summation keeps float error at O(log n) ulps
+    function pairwiseSum(values, start = 0, end = values.length) {
+        if (end - start <= 128) {
+            let s = 0;
+            for (let i = start; i < end; i++) s += values[i];
+            return s;
+        }
+        const mid = (start + end) >>> 1;
+        return pairwiseSum(values, start, mid) + pairwiseSum(values, mid, end);
+    }
+
+    function meanAndVariance(values) {
+        const n = values.length;
+        const mean = pairwiseSum(values) / n;
+        let m2 = 0;
+        for (let i = 0; i < n; i++) {
+            const d = values[i] - mean;
+            m2 += d * d;
+        }
+        return { mean, variance: n > 1 ? m2 / (n - 1) : 0 };
+    }
+
+    function round(value, digits) {
+        const factor = Math.pow(10, digits);
+        return Math.round(value * factor) / factor;
+    }
+
+    // ===== Histogram binning =====
+
+    function binValues(values, min, binWidth, binCount) {
+        const counts = new Uint32Array(binCount);
+        for (let i = 0; i < values.length; i++) {
+            let index = Math.floor((values[i] - min) / binWidth);
+            // The maximum sits exactly on the last bin's upper edge
+            if (index === binCount) index--;
+            if (index >= 0 && index < binCount) {
+                counts[index]++;
+            }
+        }
+        return counts;
+    }
+
+    // ===== Scatter decimation =====
+
+    function isSorted(values) {
+        for (let i = 1; i < values.length; i++) {
+            if (values[i] < values[i - 1]) return false;
+        }
+        return true;
+    }
+
+    // Largest-Triangle-Three-Buckets for x-ordered series
+    function decimateLTTB(xs, ys, threshold) {
+        const n = xs.length;
+        if (threshold >= n || threshold < 3) {
+            return { x: Float64Array.from(xs), y: Float64Array.from(ys) };
+        }
+        const outX = new Float64Array(threshold);
+        const outY = new Float64Array(threshold);
+        const bucketSize = (n - 2) / (threshold - 2);
+        let a = 0;
+        outX[0] = xs[0];
+        outY[0] = ys[0];
+
+        for (let i = 0; i < threshold - 2; i++) {
+            // Average of the next bucket is the third triangle vertex
+            const nextStart = Math.floor((i + 1) * bucketSize) + 1;
+            const nextEnd = Math.min(Math.floor((i + 2) * bucketSize) + 1, n);
+            let avgX = 0;
+            let avgY = 0;
+            for (let j = nextStart; j < nextEnd; j++) {
+                avgX += xs[j];
+                avgY += ys[j];
+            }
+            const span = Math.max(nextEnd - nextStart, 1);
+            avgX /= span;
+            avgY /= span;
+
+            const start = Math.floor(i * bucketSize) + 1;
+            const end = Math.floor((i + 1) * bucketSize) + 1;
+            let maxArea = -1;
+            let chosen = start;
+            for (let j = start; j < end; j++) {
+                const area = Math.abs((xs[a] - avgX) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avgY - ys[a]));
+                if (area > maxArea) {
+                    maxArea = area;
+                    chosen = j;
+                }
+            }
+            outX[i + 1] = xs[chosen];
+            outY[i + 1] = ys[chosen];
+            a = chosen;
+        }
+        outX[threshold - 1] = xs[n - 1];
+        outY[threshold - 1] = ys[n - 1];
+        return { x: outX, y: outY };
+    }
+
+    // Min/max per x-bucket for unordered scatter data: keeps the vertical
+    // envelope of every bucket, so outliers survive decimation.
+    function decimateMinMax(xs, ys, threshold) {
+        const n = xs.length;
+        if (threshold >= n) {
+            return { x: Float64Array.from(xs), y: Float64Array.from(ys) };
+        }
+        const buckets = Math.max(1, Math.floor(threshold / 2));
+        const { min, max } = minMax(xs);
+        const width = (max - min) / buckets || 1;
+        const minIdx = new Int32Array(buckets).fill(-1);
+        const maxIdx = new Int32Array(buckets).fill(-1);
+
+        for (let i = 0; i < n; i++) {
+            const b = Math.min(buckets - 1, Math.floor((xs[i] - min) / width));
+            if (minIdx[b] < 0 || ys[i] < ys[minIdx[b]]) minIdx[b] = i;
+            if (maxIdx[b] < 0 || ys[i] > ys[maxIdx[b]]) maxIdx[b] = i;
+        }
+
+        const outX = new Float64Array(buckets * 2);
+        const outY = new Float64Array(buckets * 2);
+        let count = 0;
+        for (let b = 0; b < buckets; b++) {
+            if (minIdx[b] < 0) continue;
+            outX[count] = xs[minIdx[b]];
+            outY[count++] = ys[minIdx[b]];
+            if (maxIdx[b] !== minIdx[b]) {
+                outX[count] = xs[maxIdx[b]];
+                outY[count++] = ys[maxIdx[b]];
+            }
+        }
+        return { x: outX.slice(0, count), y: outY.slice(0, count) };
+    }
+
+    function decimateScatter(xs, ys, threshold) {
+        return isSorted(xs) ? decimateLTTB(xs, ys, threshold) : decimateMinMax(xs, ys, threshold);
+    }
+
+    // ===== Distribution functions (for client-side p-values) =====
+
+    function logGamma(x) {
+        // Lanczos approximation (g = 7, n = 9)
+        const c = [0.99999999999980993, 676.5203681218851, -1259.1392167224028,
+            771.32342877765313, -176.61502916214059, 12.507343278686905,
+            -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7];
+        if (x < 0.5) {
+            return Math.log(Math.PI / Math.sin(Math.PI * x)) - logGamma(1 - x);
+        }
+        x -= 1;
+        let a = c[0];
+        const t = x + 7.5;
+        for (let i = 1; i < 9; i++) a += c[i] / (x + i);
+        return 0.5 * Math.log(2 * Math.PI) + (x + 0.5) * Math.log(t) - t + Math.log(a);
+    }
+
+    // Continued fraction for the regularized incomplete beta function
+    function betaContinuedFraction(a, b, x) {
+        const tiny = 1e-300;
+        let c = 1;
+        let d = 1 - (a + b) * x / (a + 1);
+        if (Math.abs(d) < tiny) d = tiny;
+        d = 1 / d;
+        let h = d;
+        for (let m = 1; m <= 300; m++) {
+            const m2 = 2 * m;
+            let aa = m * (b - m) * x / ((a + m2 - 1) * (a + m2));
+            d = 1 + aa * d;
+            if (Math.abs(d) < tiny) d = tiny;
+            c = 1 + aa / c;
+            if (Math.abs(c) < tiny) c = tiny;
+            d = 1 / d;
+            h *= d * c;
+            aa = -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1));
+            d = 1 + aa * d;
+            if (Math.abs(d) < tiny) d = tiny;
+            c = 1 + aa / c;
+            if (Math.abs(c) < tiny) c = tiny;
+            d = 1 / d;
+            const delta = d * c;
+            h *= delta;
+            if (Math.abs(delta - 1) < 1e-15) break;
+        }
+        return h;
+    }
+
+    function regularizedBeta(x, a, b) {
+        if (x <= 0) return 0;
+        if (x >= 1) return 1;
+        const front = Math.exp(logGamma(a + b) - logGamma(a) - logGamma(b) + a * Math.log(x) + b * Math.log(1 - x));
+        if (x < (a + 1) / (a + b + 2)) {
+            return front * betaContinuedFraction(a, b, x) / a;
+        }
+        return 1 - front * betaContinuedFraction(b, a, 1 - x) / b;
+    }
+
+    // Upper regularized incomplete gamma Q(a, x)
+    function regularizedGammaQ(a, x) {
+        if (x <= 0) return 1;
+        const logFront = -x + a * Math.log(x) - logGamma(a);
+        if (x < a + 1) {
+            let sum = 1 / a;
+            let term = sum;
+            for (let n = 1; n < 1000; n++) {
+                term *= x / (a + n);
+                sum += term;
+                if (Math.abs(term) < Math.abs(sum) * 1e-15) break;
+            }
+            return 1 - sum * Math.exp(logFront);
+        }
+        // Lentz continued fraction
+        const tiny = 1e-300;
+        let b = x + 1 - a;
+        let c = 1 / tiny;
+        let d = 1 / b;
+        let h = d;
+        for (let i = 1; i < 1000; i++) {
+            const an = -i * (i - a);
+            b += 2;
+            d = an * d + b;
+            if (Math.abs(d) < tiny) d = tiny;
+            c = b + an / c;
+            if (Math.abs(c) < tiny) c = tiny;
+            d = 1 / d;
+            const delta = d * c;
+            h *= delta;
+            if (Math.abs(delta - 1) < 1e-15) break;
+        }
+        return Math.exp(logFront) * h;
+    }
+
+    function studentTTwoSided(t, df) {
+        return regularizedBeta(df / (df + t * t), df / 2, 0.5);
+    }
+
+    // ===== Client-side analyses (mirror app.py for small inputs) =====
+
+    function significanceOf(pValue) {
+        return pValue < 0.05 ? 'Significant' : 'Not Significant';
+    }
+
+    // ===== Robust statistics (as robust.py, from the sorted copy) =====
+
+    const DEFAULT_TRIM = 0.1;
+    const TUKEY_K = 1.5;
+    const MAD_THRESHOLD = 3.5;
+    // 0.6745 = Phi^-1(3/4): MAD / 0.6745 estimates sigma for normal data
+    const MAD_NORMAL_QUANTILE = 0.6745;
+    const OUTLIER_INDEX_LIMIT = 1000;
+
+    function middleOf(sorted) {
+        const n = sorted.length;
+        return n % 2 ? sorted[(n - 1) / 2] : (sorted[n / 2 - 1] + sorted[n / 2]) / 2;
+    }
+
+    // Linear interpolation between order statistics (numpy's default)
+    function quantile(sorted, q) {
+        const position = (sorted.length - 1) * q;
+        const lower = Math.floor(position);
+        const fraction = position - lower;
+        let value = sorted[lower];
+        if (fraction) value += fraction * (sorted[lower + 1] - value);
+        return value;
+    }
+
+    // Count and first indices of the values outside [lower, upper]
+    function outliers(values, lower, upper) {
+        const indices = [];
+        let count = 0;
+        for (let i = 0; i < values.length; i++) {
+            if (values[i] < lower || values[i] > upper) {
+                count++;
+                if (indices.length < OUTLIER_INDEX_LIMIT) indices.push(i);
+            }
+        }
+        return { lower: round(lower, 4), upper: round(upper, 4), count, indices };
+    }
+
+    // The `robust` block of the descriptive endpoint, rounded like robust_summary()
+    function robustStatistics(values, sorted, trim = DEFAULT_TRIM) {
+        const n = values.length;
+        const median = middleOf(sorted);
+        const q1 = quantile(sorted, 0.25);
+        const q3 = quantile(sorted, 0.75);
+        const iqr = q3 - q1;
+        const cut = Math.floor(trim * n);
+        const keptSum = pairwiseSum(sorted, cut, n - cut);
+        const deviations = Float64Array.from(values, value => Math.abs(value - median)).sort();
+        const mad = middleOf(deviations);
+        const reach = MAD_THRESHOLD * mad / MAD_NORMAL_QUANTILE;
+        return {
+            n,
+            median: round(median, 4),
+            q1: round(q1, 4),
+            q3: round(q3, 4),
+            iqr: round(iqr, 4),
+            mad: round(mad, 4),
+            trim,
+            trimmedCount: 2 * cut,
+            trimmedMean: round(keptSum / (n - 2 * cut), 4),
+            winsorizedMean: round((keptSum + cut * (sorted[cut] + sorted[n - cut - 1])) / n, 4),
+            tukey: { k: TUKEY_K, ...outliers(values, q1 - TUKEY_K * iqr, q3 + TUKEY_K * iqr) },
+            // No spread around the median: the MAD rule flags nothing
+            madRule: mad > 0
+                ? { threshold: MAD_THRESHOLD, ...outliers(values, median - reach, median + reach) }
+                : { threshold: MAD_THRESHOLD, lower: round(median, 4), upper: round(median, 4), count: 0, indices: [] }
+        };
+    }
+
+    function describe(values) {
+        const n = values.length;
+        const sorted = Float64Array.from(values).sort();
+        const { mean, variance } = meanAndVariance(values);
+        const median = middleOf(sorted);
+
+        // statistics.mode semantics: first value (in input order) with the top count
+        const counts = new Map();
+        let mode = values[0];
+        let best = 0;
+        for (let i = 0; i < n; i++) {
+            const c = (counts.get(values[i]) || 0) + 1;
+            counts.set(values[i], c);
+            if (c > best) {
+                best = c;
+            }
+        }
+        for (let i = 0; i < n; i++) {
+            if (counts.get(values[i]) === best) {
+                mode = values[i];
+                break;
+            }
+        }
+
+        return {
+            count: n,
+            sum: round(pairwiseSum(values), 4),
+            mean: round(mean, 4),
+            median: round(median, 4),
+            mode: round(mode, 4),
+            variance: round(variance, 4),
+            stdDev: round(Math.sqrt(variance), 4),
+            min: round(sorted[0], 4),
+            max: round(sorted[n - 1], 4),
+            range: round(sorted[n - 1] - sorted[0], 4),
+            // Same cards as a server result (which is requested with robust: true)
+            robust: robustStatistics(values, sorted),
+            rawData: Array.from(values),
+            computedLocally: true
+        };
+    }
+
+    function tTest(sample, populationMean) {
+        const n = sample.length;
+        const { mean, variance } = meanAndVariance(sample);
+        const std = Math.sqrt(variance);
+        const stdError = std / Math.sqrt(n);
+        const t = (mean - populationMean) / stdError;
+        const df = n - 1;
+        const pValue = studentTTwoSided(t, df);
+        const significance = significanceOf(pValue);
+        return {
+            sampleSize: n,
+            sampleMean: round(mean, 4),
+            populationMean: round(populationMean, 4),
+            sampleStdDev: round(std, 4),
+            standardError: round(stdError, 4),
+            tStatistic: round(t, 4),
+            pValue: round(pValue, 6),
+            degreesOfFreedom: df,
+            significance: significance,
+            interpretation: `At α=0.05: ${significance} (p=${round(pValue, 4)})`,
+            sampleData: Array.from(sample),
+            popMean: populationMean,
+            computedLocally: true
+        };
+    }
+
+    function chiSquare(observed, expected) {
+        const sumObs = pairwiseSum(observed);
+        const sumExp = pairwiseSum(expected);
+        let scaled = Array.from(expected);
+        if (Math.abs(sumObs - sumExp) > 1e-6) {
+            scaled = scaled.map(e => e * sumObs / sumExp);
+        }
+        let statistic = 0;
+        for (let i = 0; i < observed.length; i++) {
+            const d = observed[i] - scaled[i];
+            statistic += d * d / scaled[i];
+        }
+        const df = observed.length - 1;
+        const pValue = regularizedGammaQ(df / 2, statistic / 2);
+        const significance = significanceOf(pValue);
+        return {
+            chiSquareStatistic: round(statistic, 4),
+            pValue: round(pValue, 6),
+            degreesOfFreedom: df,
+            categories: observed.length,
+            significance: significance,
+            observedSum: round(sumObs, 2),
+            expectedSum: round(pairwiseSum(scaled), 2),
+            interpretation: `At α=0.05: ${significance} (p=${round(pValue, 4)})`,
+            observed: Array.from(observed),
+            expected: scaled,
+            computedLocally: true
+        };
+    }
+
+    // Analyse small text inputs in the browser. Returns null whenever the
+    // input is large, malformed or an edge case, in which case the caller
+    // sends it to the server, which owns the validation messages.
+    function analyzeLocally(kind, text) {
+        if (kind === 'descriptive') {
+            const values = parseNumberList(text);
+            if (!values || values.length === 0 || values.length > CLIENT_COMPUTE_LIMIT) return null;
+            return describe(values);
+        }
+
+        const lines = parseLines(text);
+        if (lines.length < 2) return null;
+        const first = parseNumberList(lines[0]);
+        if (!first || first.length > CLIENT_COMPUTE_LIMIT) return null;
+
+        if (kind === 'ttest') {
+            const populationMean = Number(lines[1]);
+            if (first.length < 2 || !Number.isFinite(populationMean)) return null;
+            return tTest(first, populationMean);
+        }
+        if (kind === 'chisquare') {
+            const second = parseNumberList(lines[1]);
+            if (!second || first.length < 2 || first.length !== second.length) return null;
+            if (second.some(e => e <= 0)) return null;
+            return chiSquare(first, second);
+        }
+        return null;
+    }
+
+    // Job dispatch shared by the worker and the inline fallback. Returns the
+    // result plus the buffers that can be transferred instead of copied.
+    function handleJob(type, payload) {
+        if (type === 'histogram') {
+            const values = payload.values;
+            let { min, max } = minMax(values);
+            if (payload.integerEdges) {
+                min = Math.floor(min);
+                max = Math.ceil(max);
+            }
+            const binCount = payload.binCount;
+            const binWidth = (max - min) / binCount || 1;
+            const counts = binValues(values, min, binWidth, binCount);
+            return { result: { min, max, binWidth, counts }, transfer: [counts.buffer] };
+        }
+        if (type === 'decimate') {
+            const points = decimateScatter(payload.x, payload.y, payload.threshold);
+            const range = minMax(payload.x);
+            return {
+                result: { x: points.x, y: points.y, minX: range.min, maxX: range.max },
+                transfer: [points.x.buffer, points.y.buffer]
+            };
+        }
+        if (type === 'analyze') {
+            return { result: analyzeLocally(payload.kind, payload.text), transfer: [] };
+        }
+        throw new Error(`Unknown stats job '${type}'`);
+    }
+
+    root.StatsCore = {
+        handleJob,
+        CLIENT_COMPUTE_LIMIT,
+        parseNumberList,
+        minMax,
+        binValues,
+        decimateScatter,
+        decimateLTTB,
+        decimateMinMax,
+        analyzeLocally,
+        robustStatistics,
+        studentTTwoSided,
+        regularizedGammaQ
+    };
+})(typeof self !== 'undefined' ? self : globalThis);
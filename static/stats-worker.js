@@ -0,0 +1,14 @@
+// Web Worker for CPU-heavy chart preparation: histogram binning, scatter
+// decimation and small client-side analyses. Results come back as
+// transferable typed arrays so large buffers are moved, not copied.
+importScripts(new URLSearchParams(self.location.search).get('core') || 'stats-core.js');
+
+self.onmessage = (event) => {
+    const { id, type, payload } = event.data;
+    try {
+        const { result, transfer } = self.StatsCore.handleJob(type, payload);
+        self.postMessage({ id, result }, transfer);
+    } catch (error) {
+        self.postMessage({ id, error: error.message });
+    }
+};
@@ -0,0 +1,407 @@
+"""Structured, non-blocking logging.
+
+Every record is one JSON line:
+
+    {"ts": "2026-01-05T10:00:00.123Z", "level": "INFO", "logger": "statcalc.app",
+     "event": "request", "requestId": "...", "path": "/api/t-test", "status": 200, ...}
+
+Loggers from get_logger() take the fields as keyword arguments:
+
+    log = get_logger(__name__)
+    log.debug('chi-square expected normalized', expected=expected)
+
+The calling thread only summarizes the fields and puts the record on a
+bounded queue; a QueueListener thread formats and writes it. A record
+that does not fit in the queue is dropped and counted (the next record
+written carries `droppedRecords`) rather than waited for, so a slow log
+sink never stalls a request. Sequences (lists, tuples, numpy arrays,
+NumericColumns) longer than MAX_ARRAY_ITEMS are summarized as n, min,
+max, mean and the first HEAD_ITEMS values; strings are cut at
+MAX_STRING_CHARS.
+
+Request scope: init_app(app) binds requestId, method, path and
+inputBytes when a request starts, handlers add their own with bind(), and
+one `request` record with status and durationMs is written when it ends.
+Every record logged while handling the request carries those fields.
+Requests are sampled as a whole: with LOG_SAMPLE_RATE = 0.1, records
+below WARNING are kept for one request in ten; warnings and errors are
+always kept.
+
+Nothing is written until the pipeline is started: configure_app(app)
+does that with the settings below, and the WSGI entrypoint (wsgi.py) and
+`python app.py` call it. Importing app alone (tests, scripts) leaves
+statcalc records discarded. Compute-pool processes (serving.py) run
+configure_process() with the parent's settings, if it has any, and pooled
+jobs log inside the scope of the request that submitted them.
+
+Configuration (app.config, else the environment), read by configure_app:
+    LOG_LEVEL        INFO, or per logger: "INFO,analyses=DEBUG"
+    LOG_SAMPLE_RATE  1.0
+    LOG_QUEUE_SIZE   10000 records
+    LOG_FILE         append to this file instead of stderr
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from column import NumericColumn
+
+LOGGER_NAME = 'statcalc'
+DEFAULT_LEVEL = 'INFO'
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_QUEUE_SIZE = 10000
+# Longest wait for room for the listener's stop signal in a full queue
+STOP_TIMEOUT_SECONDS = 5.0
+
+# Field values larger than these are summarized
+MAX_ARRAY_ITEMS = 10
+HEAD_ITEMS = 5
+MAX_STRING_CHARS = 500
+
+# Keyword arguments that belong to logging itself rather than the record's fields
+LOGGING_KEYWORDS = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+_scope = contextvars.ContextVar('statcalc_log_scope', default=None)
+
+
+class RequestScope:
+    """Fields shared by every record of one request, and whether it is sampled."""
+
+    def __init__(self, fields, sampled=True):
+        self.fields = fields
+        self.sampled = sampled
+        self.started = time.perf_counter()
+
+
+def summarize(value):
+    """A bounded, JSON-friendly version of a field value."""
+    if isinstance(value, str):
+        if len(value) <= MAX_STRING_CHARS:
+            return value
+        return f'{value[:MAX_STRING_CHARS]}... ({len(value)} chars)'
+    if isinstance(value, float):
+        return value if math.isfinite(value) else str(value)
+    if isinstance(value, np.generic):
+        return summarize(value.item())
+    if isinstance(value, dict):
+        return {str(key): summarize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, NumericColumn)):
+        if isinstance(value, np.ndarray):
+            value = value.ravel()
+        if len(value) <= MAX_ARRAY_ITEMS:
+            return [summarize(item) for item in value]
+        return summarize_sequence(value)
+    return value
+
+
+def summarize_sequence(values):
+    """n, min, max, mean and the first few items of a long sequence."""
+    summary = {'n': len(values)}
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        array = None
+    if array is not None and array.ndim == 1:
+        summary.update(min=float(array.min()), max=float(array.max()), mean=float(array.mean()))
+        head = array[:HEAD_ITEMS].tolist()
+    else:
+        head = list(values[:HEAD_ITEMS])
+    summary['head'] = head
+    return summarize(summary)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """log.info('event', field=value, ...); fields of the current request are added.
+
+    Level and sampling are checked before anything else, so a disabled
+    record costs one comparison and its fields are never summarized.
+    """
+
+    def log(self, level, msg, *args, **kwargs):
+        scope = _scope.get()
+        if scope is not None and not scope.sampled and level < logging.WARNING:
+            return
+        super().log(level, msg, *args, **kwargs)
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in LOGGING_KEYWORDS}
+        scope = _scope.get()
+        if scope is not None:
+            fields = {**scope.fields, **fields}
+        kwargs['extra'] = {**(kwargs.get('extra') or {}), 'fields': summarize(fields)}
+        return msg, kwargs
+
+
+def get_logger(name):
+    """Structured logger under the `statcalc` namespace ('analyses' -> 'statcalc.analyses')."""
+    return StructuredLogger(logging.getLogger(f'{LOGGER_NAME}.{name}'), {})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Puts records on a bounded queue without ever waiting for room."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.reported = 0
+
+    def prepare(self, record):
+        # Runs on the calling thread: leave nothing large or mutable on the
+        # record (StructuredLogger already summarized the fields; tracebacks
+        # are rendered to text), but format the JSON on the listener thread.
+        record.fields = dict(getattr(record, 'fields', None) or {})
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # Handler.handle() holds the handler lock, so the counters need no other
+        unreported = self.dropped - self.reported
+        if unreported:
+            record.fields['droppedRecords'] = unreported
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.reported += unreported
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue instead of raising queue.Full."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=STOP_TIMEOUT_SECONDS)
+
+    def stop(self):
+        try:
+            super().stop()
+        except queue.Full:
+            # The sink is stuck: leave the (daemon) thread and what it has queued
+            self._thread = None
+
+
+class StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is at the time, as logging.lastResort does."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+class LogPipeline:
+    """The queue handler on the `statcalc` logger and the listener thread writing its records."""
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self.sink = None
+        self.queue_size = DEFAULT_QUEUE_SIZE
+        self.sample_rate = DEFAULT_SAMPLE_RATE
+        # Per-logger levels set by the last configure(), cleared by the next
+        self.levels = {}
+        # configure() arguments while started, replayed in compute-pool processes (see configure_process)
+        self.settings = {}
+
+    def configure(self, level=DEFAULT_LEVEL, sample_rate=DEFAULT_SAMPLE_RATE,
+                  queue_size=DEFAULT_QUEUE_SIZE, log_file=None, stream=None):
+        """(Re)start the pipeline; `stream` overrides LOG_FILE and stderr."""
+        self.stop()
+        # A stream cannot cross processes: pool processes fall back to stderr
+        self.settings = {'level': level, 'sample_rate': sample_rate, 'queue_size': queue_size,
+                         'log_file': None if stream is not None else log_file}
+        self.queue_size = int(queue_size)
+        self.sample_rate = float(sample_rate)
+        if stream is not None:
+            self.sink = logging.StreamHandler(stream)
+        elif log_file:
+            self.sink = logging.FileHandler(log_file, encoding='utf-8')
+        else:
+            self.sink = StderrHandler()
+        self.sink.setFormatter(JsonFormatter())
+        self.handler = NonBlockingQueueHandler(queue.Queue(self.queue_size))
+
+        logger = logging.getLogger(LOGGER_NAME)
+        for name in self.levels:
+            logging.getLogger(f'{LOGGER_NAME}.{name}').setLevel(logging.NOTSET)
+        self.levels = parse_levels(level)
+        logger.setLevel(self.levels.pop(''))
+        for name, name_level in self.levels.items():
+            logging.getLogger(f'{LOGGER_NAME}.{name}').setLevel(name_level)
+        logger.addHandler(self.handler)
+        logger.propagate = False
+        self.start()
+
+    def start(self):
+        self.listener = DrainingQueueListener(self.handler.queue, self.sink)
+        self.listener.start()
+
+    def stop(self):
+        """Write out what is queued and detach the handler."""
+        self.settings = {}
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self.handler is not None:
+            logging.getLogger(LOGGER_NAME).removeHandler(self.handler)
+            self.handler = None
+        if self.sink is not None:
+            self.sink.flush()
+            self.sink.close()
+            self.sink = None
+
+    def after_fork(self):
+        # The listener thread does not survive fork (e.g. gunicorn --preload)
+        if self.handler is not None:
+            self.handler.queue = queue.Queue(self.queue_size)
+            self.start()
+
+
+pipeline = LogPipeline()
+atexit.register(pipeline.stop)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=pipeline.after_fork)
+
+
+def parse_levels(spec):
+    """'INFO,analyses=DEBUG' -> {'': 'INFO', 'analyses': 'DEBUG'}"""
+    levels = {'': DEFAULT_LEVEL}
+    for part in str(spec or DEFAULT_LEVEL).split(','):
+        name, separator, level = part.strip().rpartition('=')
+        if not level:
+            continue
+        level = level.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Unknown log level '{level}'")
+        levels[name.strip() if separator else ''] = level
+    return levels
+
+
+def begin_request(**fields):
+    """Open a request scope; returns the token for end_request()."""
+    sampled = pipeline.sample_rate >= 1 or random.random() < pipeline.sample_rate
+    return _scope.set(RequestScope(fields, sampled))
+
+
+def end_request(token):
+    _scope.reset(token)
+
+
+def scope_state():
+    """The current request's (fields, sampled), or None outside one; see resume_request()."""
+    scope = _scope.get()
+    return None if scope is None else (dict(scope.fields), scope.sampled)
+
+
+def resume_request(state):
+    """Continue a request scope from scope_state() (in another process); token for end_request()."""
+    fields, sampled = state
+    return _scope.set(RequestScope(fields, sampled))
+
+
+def configure_process(settings):
+    """Start the pipeline of a multiprocessing child with the parent's pipeline.settings.
+
+    Empty settings (the parent's pipeline is not started) leave the child
+    quiet too. Children skip atexit, so the queue is also flushed by a
+    multiprocessing finalizer when the process exits.
+    """
+    import multiprocessing.util
+
+    if not settings:
+        return
+    pipeline.configure(**settings)
+    multiprocessing.util.Finalize(None, pipeline.stop, exitpriority=10)
+
+
+def bind(**fields):
+    """Add fields to every later record of the current request (no-op outside one)."""
+    scope = _scope.get()
+    if scope is not None:
+        scope.fields.update(fields)
+
+
+def elapsed_ms():
+    """Milliseconds since the current request started, or None outside one."""
+    scope = _scope.get()
+    return None if scope is None else round((time.perf_counter() - scope.started) * 1000, 2)
+
+
+def configure_app(app):
+    """Start the log pipeline with the LOG_* settings of the app (else the environment)."""
+    def setting(name, default):
+        return app.config.get(name, os.environ.get(name, default))
+
+    pipeline.configure(level=setting('LOG_LEVEL', DEFAULT_LEVEL),
+                       sample_rate=setting('LOG_SAMPLE_RATE', DEFAULT_SAMPLE_RATE),
+                       queue_size=setting('LOG_QUEUE_SIZE', DEFAULT_QUEUE_SIZE),
+                       log_file=setting('LOG_FILE', None))
+    return pipeline
+
+
+def init_app(app):
+    """Give every request a log scope and a closing `request` record (see configure_app)."""
+    from flask import g, request
+
+    log = get_logger('http')
+
+    @app.before_request
+    def open_log_scope():
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+        g.log_token = begin_request(requestId=request_id[:64], method=request.method, path=request.path,
+                                    inputBytes=request.content_length or 0)
+
+    @app.after_request
+    def log_request(response):
+        scope = _scope.get()
+        if scope is not None:
+            level = logging.ERROR if response.status_code >= 500 else logging.INFO
+            log.log(level, 'request', status=response.status_code, durationMs=elapsed_ms(),
+                    outputBytes=response.content_length)
+            response.headers['X-Request-ID'] = scope.fields['requestId']
+        return response
+
+    @app.teardown_request
+    def close_log_scope(error=None):
+        token = g.pop('log_token', None)
+        if token is not None:
+            end_request(token)
+
+    return pipeline
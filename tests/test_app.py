@@ -1,12 +1,14 @@
 import unittest
 import json
+import statistics
 import sys
 import os
 
 # Add parent directory to path to import app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app, get_correlation_interpretation
+from analyses import get_correlation_interpretation
+from app import app
 
 
 class TestStatCalculatorApp(unittest.TestCase):
@@ -124,6 +126,54 @@ class TestStatCalculatorApp(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('error', data)
 
+    def test_descriptive_stats_robust(self):
+        """Test the optional robust block from JSON and CSV input"""
+        values = '1, 2, 3, 4, 5, 6, 7, 8, 9, 100'
+        response = self.client.post('/api/descriptive-stats', json={'data': values, 'robust': True})
+        self.assertEqual(response.status_code, 200)
+        robust = response.json['robust']
+        self.assertEqual((robust['q1'], robust['q3'], robust['iqr'], robust['mad']), (3.25, 7.75, 4.5, 2.5))
+        self.assertEqual((robust['trimmedMean'], robust['winsorizedMean']), (5.5, 5.5))
+        self.assertEqual((robust['tukey']['count'], robust['tukey']['indices']), (1, [9]))
+        self.assertEqual(robust['madRule']['indices'], [9])
+
+        csv_content = b'value\n' + values.replace(', ', '\n').encode()
+        response = self.client.post('/api/descriptive-stats',
+                                   data={'file': (self.create_csv_file(csv_content), 'test.csv'),
+                                         'robust': 'true', 'trim': '0'},
+                                   content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['robust']['trimmedMean'], 14.5)
+        self.assertNotIn('robust', self.client.post('/api/descriptive-stats', json={'data': values}).json)
+
+    def test_descriptive_stats_invalid_trim(self):
+        """Test that a trim proportion outside [0, 0.5) is rejected"""
+        for trim in (0.5, -0.1, 'lots'):
+            response = self.client.post('/api/descriptive-stats',
+                                       json={'data': '1, 2, 3', 'robust': True, 'trim': trim})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('trim proportion', response.json['error'])
+
+    def test_descriptive_stats_density_instead_of_raw_data(self):
+        """Test that a density curve can replace the raw data echo"""
+        response = self.client.post('/api/descriptive-stats',
+                                   json={'data': '1, 2, 2, 3, 3, 3, 4, 4, 5', 'density': True,
+                                         'includeData': False, 'gridSize': 64})
+        self.assertEqual(response.status_code, 200)
+        data = response.json
+        self.assertNotIn('rawData', data)
+        density = data['density']
+        self.assertEqual((density['gridSize'], len(density['x']), len(density['density'])), (64, 64, 64))
+        self.assertGreater(density['bandwidth'], 0)
+        peak = density['x'][density['density'].index(max(density['density']))]
+        self.assertAlmostEqual(peak, 3, delta=0.3)
+
+        for grid_size in (4, 'many', 10 ** 6):
+            response = self.client.post('/api/descriptive-stats',
+                                       json={'data': '1, 2, 3', 'density': True, 'gridSize': grid_size})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('grid size', response.json['error'])
+
     def test_descriptive_stats_whitespace_handling(self):
         """Test descriptive stats handles whitespace correctly"""
         response = self.client.post('/api/descriptive-stats',
@@ -306,6 +356,55 @@ class TestStatCalculatorApp(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('error', data)
 
+    def test_chi_square_sparse_mode(self):
+        """Test sparse chi-square counts unlisted categories as zeros"""
+        response = self.client.post('/api/chi-square',
+                                   json={'data': 'a:40, b:10, c:10', 'mode': 'sparse', 'categories': 1000},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+
+        self.assertEqual(data['mode'], 'sparse')
+        self.assertEqual(data['categories'], 1000)
+        self.assertEqual(data['degreesOfFreedom'], 999)
+        self.assertEqual(data['topContributions'][0]['category'], 'a')
+        self.assertLess(data['log10PValue'], -300)
+
+    def test_chi_square_contingency_mode(self):
+        """Test chi-square independence test on a contingency table"""
+        response = self.client.post('/api/chi-square',
+                                   json={'data': '10, 20, 30\n25, 15, 5', 'mode': 'contingency'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+
+        self.assertAlmostEqual(data['chiSquareStatistic'], 23.3333, places=4)
+        self.assertEqual(data['degreesOfFreedom'], 2)
+        self.assertEqual(data['expected'][0], [20.0, 20.0, 20.0])
+
+    def test_chi_square_batch_csv_upload(self):
+        """Test batched chi-square tables from a CSV upload"""
+        csv_content = b'10,20\n30,40\n\n5,5\n5,5\n\n1,2\n0,0'
+        response = self.client.post('/api/chi-square',
+                                   data={'file': (self.create_csv_file(csv_content), 'test.csv'),
+                                         'mode': 'batch'},
+                                   content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+
+        self.assertEqual(data['tableCount'], 3)
+        self.assertEqual(data['failedCount'], 1)
+        self.assertEqual(data['tables'][1]['chiSquareStatistic'], 0)
+        self.assertIn('error', data['tables'][2])
+
+    def test_chi_square_unknown_mode(self):
+        """Test chi-square rejects an unknown mode"""
+        response = self.client.post('/api/chi-square',
+                                   json={'data': '1, 2\n3, 4', 'mode': 'fisher'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown chi-square mode', json.loads(response.data)['error'])
+
     # ===== Test Correlation Endpoint =====
     def test_correlation_perfect_positive(self):
         """Test correlation with perfect positive correlation"""
@@ -554,6 +653,179 @@ class TestStatCalculatorApp(unittest.TestCase):
         self.assertEqual(data['xValues'], [1, 2, 3, 4, 5])
         self.assertEqual(data['yValues'], [2, 4, 6, 8, 10])
 
+    def test_correlation_spearman_method(self):
+        """Test Spearman rank correlation on a monotonic, non-linear relationship"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 3, 4, 5\n1, 8, 27, 64, 125', 'method': 'spearman'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        
+        self.assertEqual(data['method'], 'spearman')
+        self.assertAlmostEqual(data['correlationCoefficient'], 1.0, places=4)
+
+    def test_correlation_kendall_method(self):
+        """Test Kendall tau-b with tied values"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 2, 3, 4\n1, 3, 2, 4, 4', 'method': 'kendall'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        
+        self.assertEqual(data['method'], 'kendall')
+        self.assertAlmostEqual(data['correlationCoefficient'], 0.8889, places=4)
+        self.assertIn('interpretation', data)
+
+    def test_correlation_default_method_is_pearson(self):
+        """Test that correlation defaults to Pearson"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 3, 4, 5\n2, 4, 6, 8, 10'},
+                                   content_type='application/json')
+        data = json.loads(response.data)
+        self.assertEqual(data['method'], 'pearson')
+
+    def test_correlation_unknown_method(self):
+        """Test correlation with an unsupported method"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 3\n1, 2, 3', 'method': 'distance'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        data = json.loads(response.data)
+        self.assertIn('Unknown correlation method', data['error'])
+
+    def test_correlation_csv_upload_with_method(self):
+        """Test correlation CSV upload with a rank method form field"""
+        csv_content = b'1,2,3,4,5\n5,4,3,2,1'
+        response = self.client.post('/api/correlation',
+                                   data={'file': (self.create_csv_file(csv_content), 'test.csv'),
+                                         'method': 'kendall'},
+                                   content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['method'], 'kendall')
+        self.assertAlmostEqual(data['correlationCoefficient'], -1.0, places=4)
+
+    def test_correlation_with_regression(self):
+        """Test that correlation can return the regression fit"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 3, 4, 5\n2.1, 3.9, 6.2, 7.8, 10.1', 'regression': True},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        
+        fit = data['regression']
+        self.assertAlmostEqual(fit['slope'], 1.99, places=4)
+        self.assertAlmostEqual(fit['intercept'], 0.05, places=4)
+        self.assertIn('slopeStdError', fit)
+        self.assertIn('residualStdError', fit)
+        self.assertEqual(len(fit['predictionBand']['x']), 50)
+
+    def test_correlation_without_regression(self):
+        """Test that the regression fit is only returned on request"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 3, 4, 5\n2, 4, 6, 8, 10'},
+                                   content_type='application/json')
+        data = json.loads(response.data)
+        self.assertNotIn('regression', data)
+
+    def test_correlation_multiple_regression(self):
+        """Test that extra lines become additional regression predictors"""
+        response = self.client.post('/api/correlation',
+                                   json={'data': '1, 2, 3, 4, 5, 6\n5, 6, 11, 12, 17, 18\n0, 1, 0, 1, 0, 1',
+                                         'regression': True},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        
+        fit = data['regression']
+        self.assertAlmostEqual(fit['intercept'], 2.0, places=4)
+        self.assertAlmostEqual(fit['coefficients'][0], 3.0, places=4)
+        self.assertAlmostEqual(fit['coefficients'][1], -2.0, places=4)
+
+    def test_correlation_regression_csv_upload(self):
+        """Test correlation CSV upload with the regression form field"""
+        csv_content = b'1,2,3,4,5\n3,5,7,9,11'
+        response = self.client.post('/api/correlation',
+                                   data={'file': (self.create_csv_file(csv_content), 'test.csv'),
+                                         'regression': 'true'},
+                                   content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertAlmostEqual(data['regression']['slope'], 2.0, places=4)
+        self.assertAlmostEqual(data['regression']['intercept'], 1.0, places=4)
+
+    # ===== Test Precision Modes =====
+    def test_precision_defaults_to_exact(self):
+        """Test that requests without a precision option use exact arithmetic"""
+        response = self.client.post('/api/descriptive-stats',
+                                   json={'data': '1, 2, 3'},
+                                   content_type='application/json')
+        data = json.loads(response.data)
+        self.assertEqual(data['precision'], 'exact')
+
+    def test_correlation_exact_means(self):
+        """Test that exact-mode meanX/meanY are statistics.mean, not co-moment sums"""
+        x = [13.9253, 94.75227, 56.07112, 79.55917, 7.6832, 6.53191, 77.71265, 11.58088, 82.07015, 93.44493,
+             43.28311, 11.51309, 71.76222, 44.56862, 50.14113, 88.79866, 53.98563, 13.81967, 37.25114, 84.96615]
+        y = x[::-1]
+        text = ', '.join(map(str, x)) + '\n' + ', '.join(map(str, y))
+        data = json.loads(self.client.post('/api/correlation', json={'data': text}).data)
+        self.assertEqual(data['meanX'], round(statistics.mean(x), 4))
+        self.assertEqual(data['meanY'], round(statistics.mean(y), 4))
+
+    def test_precision_modes_match_exact(self):
+        """Test that float64 and float32 results agree with exact ones on every endpoint"""
+        payloads = {
+            '/api/descriptive-stats': '12.5, 15.25, 18.125, 20.5, 22.75, 25.5, 28.25',
+            '/api/t-test': '12.5, 15.25, 18.125, 20.5, 22.75\n16',
+            '/api/chi-square': '25, 30, 20, 25\n24, 26, 25, 25',
+            '/api/correlation': '1.5, 2.25, 3.5, 4.75, 5.5\n2.25, 4.5, 5.75, 8.5, 10.25',
+        }
+        fields = ['mean', 'variance', 'stdDev', 'median', 'tStatistic', 'pValue',
+                  'chiSquareStatistic', 'correlationCoefficient', 'meanX', 'meanY']
+        for url, text in payloads.items():
+            exact = json.loads(self.client.post(url, json={'data': text, 'precision': 'exact'}).data)
+            for mode in ('float64', 'float32'):
+                with self.subTest(url=url, precision=mode):
+                    response = self.client.post(url, json={'data': text, 'precision': mode})
+                    self.assertEqual(response.status_code, 200)
+                    data = json.loads(response.data)
+                    self.assertEqual(data['precision'], mode)
+                    for field in fields:
+                        if field in exact:
+                            self.assertAlmostEqual(data[field], exact[field], places=3, msg=field)
+
+    def test_precision_csv_form_field(self):
+        """Test that CSV uploads take precision as a form field"""
+        csv_content = b'1,2,3,4,5\n2,4,6,8,10'
+        response = self.client.post('/api/correlation',
+                                   data={'file': (self.create_csv_file(csv_content), 'test.csv'),
+                                         'precision': 'float32'},
+                                   content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['precision'], 'float32')
+        self.assertAlmostEqual(data['correlationCoefficient'], 1.0, places=4)
+
+    def test_exact_sum_past_float_range(self):
+        """Huge finite values are valid input: the exact sum overflows to inf, not a 500"""
+        response = self.client.post('/api/descriptive-stats',
+                                   json={'data': '1e308, 1e308'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['sum'], float('inf'))
+        self.assertEqual(data['mean'], 1e308)
+
+    def test_unknown_precision(self):
+        """Test that an unknown precision mode is rejected"""
+        response = self.client.post('/api/t-test',
+                                   json={'data': '1, 2, 3\n2', 'precision': 'float16'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        data = json.loads(response.data)
+        self.assertIn('Unknown precision', data['error'])
+
     # ===== Test CSV File Upload =====
     def test_descriptive_stats_csv_upload(self):
         """Test descriptive stats with CSV file upload"""
@@ -579,6 +851,23 @@ class TestStatCalculatorApp(unittest.TestCase):
         self.assertIn('sampleData', data)
         self.assertIn('popMean', data)
 
+    def test_ttest_density(self):
+        """Test the t-test sample density curve from JSON and CSV input"""
+        response = self.client.post('/api/t-test', json={'data': '10, 12, 14, 16, 18\n15', 'density': True,
+                                                         'includeData': False})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('sampleData', response.json)
+        self.assertEqual(response.json['density']['n'], 5)
+
+        response = self.client.post('/api/t-test',
+                                   data={'file': (self.create_csv_file(b'10,12,14,16,18,15'), 'test.csv'),
+                                         'density': 'true', 'gridSize': '32'},
+                                   content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['density']['n'], 5)
+        self.assertEqual(len(response.json['density']['x']), 32)
+        self.assertIn('sampleData', response.json)
+
     def test_chisquare_csv_upload(self):
         """Test chi-square with CSV file upload (2 rows)"""
         csv_content = b'25,30,45\n33.3,33.3,33.3'
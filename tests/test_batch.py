@@ -0,0 +1,128 @@
+import unittest
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add parent directory to path to import batch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analyses import AnalysisError, analyze_csv
+from app import app
+from batch import discover_inputs, run_batch
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Test the command-line batch runner"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = os.path.join(self.directory, 'data')
+        os.makedirs(os.path.join(self.data, 'nested'))
+        self.write('a.csv', '1,2,3,4,5\n2,4,6,8,10\n')
+        self.write('b.csv', '1,2,3,4,5\n5,4,3,2,1\n')
+        self.write('nested/c.csv', '1,2,3,4\n1,3,2,4\n')
+        self.write('notes.txt', 'not a csv')
+        self.output = os.path.join(self.directory, 'results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        with open(os.path.join(self.data, name), 'w') as f:
+            f.write(content)
+
+    def run_correlation(self, **kwargs):
+        inputs = discover_inputs([self.data])
+        return run_batch(inputs, 'correlation', self.output, workers=2, log=None, **kwargs)
+
+    def read_records(self):
+        with open(self.output) as f:
+            return {os.path.basename(r['input']): r for r in map(json.loads, f)}
+
+    def test_discovers_csv_files_recursively(self):
+        names = [os.path.basename(path) for path in discover_inputs([self.data])]
+        self.assertEqual(names, ['a.csv', 'b.csv', 'c.csv'])
+        pattern = os.path.join(self.data, '[ab].csv')
+        self.assertEqual(len(discover_inputs([pattern])), 2)
+
+    def test_results_match_the_web_endpoint(self):
+        """Batch results equal the upload endpoint's, minus the charting arrays"""
+        summary = self.run_correlation()
+        self.assertEqual(summary['processed'], 3)
+        self.assertGreater(summary['filesPerSecond'], 0)
+        self.assertGreater(summary['mbPerSecond'], 0)
+
+        with open(os.path.join(self.data, 'b.csv'), 'rb') as f:
+            response = app.test_client().post('/api/correlation', data={'file': (f, 'b.csv')},
+                                              content_type='multipart/form-data')
+        expected = json.loads(response.data)
+        del expected['xValues'], expected['yValues']
+        self.assertEqual(self.read_records()['b.csv']['result'], expected)
+
+    def test_resume_skips_completed_inputs(self):
+        """A second run only analyses new or changed files"""
+        self.run_correlation()
+        self.write('d.csv', '1,2,3\n3,2,1\n')
+        summary = self.run_correlation()
+        self.assertEqual(summary['skipped'], 3)
+        self.assertEqual(summary['processed'], 1)
+        self.assertEqual(len(self.read_records()), 4)
+
+        summary = self.run_correlation(restart=True)
+        self.assertEqual(summary['processed'], 4)
+
+    def test_resume_reruns_inputs_with_other_options(self):
+        """A file done with another method (or analysis) is not skipped"""
+        self.run_correlation()
+        summary = self.run_correlation(options={'method': 'kendall'})
+        self.assertEqual((summary['skipped'], summary['processed']), (0, 3))
+        self.assertEqual(self.read_records()['a.csv']['result']['method'], 'kendall')
+        self.assertEqual(self.run_correlation(options={'method': 'Kendall'})['skipped'], 3)
+
+        inputs = discover_inputs([self.data])
+        summary = run_batch(inputs, 'descriptive', self.output, workers=2, log=None, options={'method': 'kendall'})
+        self.assertEqual(summary['processed'], 3)
+
+    def test_errors_are_recorded(self):
+        """A bad file becomes an error record and does not stop the batch"""
+        self.write('bad.csv', '1,2,3\n')
+        summary = self.run_correlation()
+        self.assertEqual(summary['failed'], 1)
+        record = self.read_records()['bad.csv']
+        self.assertEqual(record['status'], 'error')
+        self.assertIn('X values and Y values', record['error'])
+
+    def test_csv_output_is_flat(self):
+        """The CSV format has one row per file and one column per scalar field"""
+        self.write('bad.csv', '1,2,3\n')
+        self.output = os.path.join(self.directory, 'results.csv')
+        run_batch(discover_inputs([self.data]), 'correlation', self.output, 'csv', workers=1,
+                  options={'regression': True}, log=None)
+        with open(self.output, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 4)
+        self.assertIn('regression.slope', rows[0])
+        slopes = {os.path.basename(r['input']): r['regression.slope'] for r in rows}
+        self.assertEqual(float(slopes['a.csv']), 2.0)
+        self.assertEqual(slopes['bad.csv'], '')
+
+
+class TestAnalyzeCsv(unittest.TestCase):
+    """Test the shared CSV entry point"""
+
+    def test_ttest_takes_last_value_as_population_mean(self):
+        result = analyze_csv('ttest', '10,12,14,16,18,15', include_data=False)
+        self.assertEqual(result['sampleSize'], 5)
+        self.assertEqual(result['populationMean'], 15)
+        self.assertNotIn('sampleData', result)
+
+    def test_unknown_analysis(self):
+        with self.assertRaises(AnalysisError):
+            analyze_csv('anova', '1,2,3')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+from scipy import stats
+
+# Add parent directory to path to import chi_square_engine
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chi_square_engine import (ChiSquareInputError, contingency_test, contingency_tests, p_values,
+                               sparse_goodness_of_fit)
+
+
+class TestSparseGoodnessOfFit(unittest.TestCase):
+    """Test sparse goodness of fit against dense scipy results"""
+
+    def test_unlisted_categories_match_dense_counts(self):
+        """Categories that are not listed count as zeros"""
+        result = sparse_goodness_of_fit(['a', 'c', 'a', 'f'], [5, 9, 2, 4], categories=10)
+        dense = np.zeros(10)
+        dense[[0, 2, 5]] = [7, 9, 4]
+        expected = stats.chisquare(dense)
+        self.assertAlmostEqual(result['statistic'], expected.statistic, places=9)
+        self.assertAlmostEqual(result['pValue'], expected.pvalue, places=12)
+        self.assertEqual(result['df'], 9)
+        self.assertEqual(result['nonzeroCategories'], 3)
+        self.assertEqual(list(result['labels']), ['a', 'c', 'f'])
+
+    def test_million_categories(self):
+        """1e6 categories with a few listed counts match the dense statistic"""
+        labels = np.arange(0, 1_000_000, 50_000).astype(str)
+        counts = np.arange(1, labels.size + 1) * 1000.0
+        result = sparse_goodness_of_fit(labels, counts, categories=1_000_000)
+        dense = np.zeros(1_000_000)
+        dense[:labels.size] = counts
+        self.assertAlmostEqual(result['statistic'] / stats.chisquare(dense).statistic, 1.0, places=12)
+        self.assertEqual(result['pValue'], 0.0)
+        self.assertTrue(np.isfinite(result['logPValue']))
+
+    def test_expected_weights(self):
+        """Relative weights are rescaled to the observed total"""
+        result = sparse_goodness_of_fit(['x', 'y'], [30, 10], ['x', 'y', 'z'], [2, 1, 1])
+        expected = stats.chisquare([30, 10, 0], [20, 10, 10])
+        self.assertAlmostEqual(result['statistic'], expected.statistic, places=9)
+        self.assertEqual(result['categories'], 3)
+
+    def test_invalid_input(self):
+        """Missing weights, negative counts and a single category are rejected"""
+        with self.assertRaisesRegex(ChiSquareInputError, "'w'"):
+            sparse_goodness_of_fit(['x', 'w'], [3, 1], ['x', 'y'], [1, 1])
+        with self.assertRaises(ChiSquareInputError):
+            sparse_goodness_of_fit(['x', 'y'], [3, -1])
+        with self.assertRaises(ChiSquareInputError):
+            sparse_goodness_of_fit(['x'], [3])
+
+
+class TestContingency(unittest.TestCase):
+    """Test stacked contingency tables against scipy"""
+
+    def test_matches_scipy(self):
+        table = [[10, 20, 30], [25, 15, 5]]
+        result = contingency_test(table)
+        statistic, p_value, df, expected = stats.chi2_contingency(table, correction=False)
+        self.assertAlmostEqual(result['statistic'], statistic, places=9)
+        self.assertAlmostEqual(result['pValue'], p_value, places=12)
+        self.assertEqual(result['df'], df)
+        np.testing.assert_allclose(result['expected'], expected)
+
+    def test_batch_of_mixed_shapes(self):
+        """Each table gets the same result as testing it alone; bad tables get errors"""
+        rng = np.random.default_rng(7)
+        tables = [rng.integers(1, 50, (2, 2)), rng.integers(1, 50, (3, 4)), [[1, 2], [0, 0]],
+                  rng.integers(1, 50, (2, 2)), [[1, 2, 3]]]
+        results = contingency_tests(tables)
+        self.assertEqual(len(results), 5)
+        for index in (0, 1, 3):
+            statistic = stats.chi2_contingency(tables[index], correction=False)[0]
+            self.assertAlmostEqual(results[index]['statistic'], statistic, places=9)
+        self.assertIn('error', results[2])
+        self.assertIn('error', results[4])
+
+    def test_zero_margin_raises(self):
+        with self.assertRaises(ChiSquareInputError):
+            contingency_test([[0, 0], [3, 4]])
+
+
+class TestPValues(unittest.TestCase):
+    """Test p-values far in the tail"""
+
+    def test_survival_function_beats_cdf(self):
+        """sf stays positive where 1 - cdf has rounded to 0"""
+        p_value, log_p = p_values(100.0, 2)
+        self.assertEqual(1 - stats.chi2.cdf(100.0, 2), 0.0)
+        self.assertAlmostEqual(float(log_p), -50.0, places=9)
+        self.assertGreater(float(p_value), 0.0)
+
+    def test_log_p_where_logsf_underflows(self):
+        """The continued fraction agrees with logsf and extends past it"""
+        self.assertAlmostEqual(float(p_values(200.0, 10)[1]), stats.chi2.logsf(200.0, 10), places=9)
+        # For df = 2, log Q = -x / 2 exactly
+        log_p = p_values(np.array([3000.0, 5000.0]), 2)[1]
+        np.testing.assert_allclose(log_p, [-1500.0, -2500.0])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
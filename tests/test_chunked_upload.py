@@ -0,0 +1,178 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+from io import BytesIO
+
+import numpy as np
+
+# Add parent directory to path to import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import chunked_upload
+import http_cache
+from app import app
+from chunked_upload import RunningMoments
+from precision import FLOAT32, FLOAT64
+
+CSV = b'value\n' + b'\n'.join(str(round(x, 3)).encode() for x in np.random.default_rng(3).normal(40, 8, 5000))
+
+
+class TestChunkedUpload(unittest.TestCase):
+    """Test the resumable chunked upload protocol"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        chunked_upload.upload_store.directory = self.directory
+        chunked_upload.upload_store.ttl = 60
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create(self, **options):
+        response = self.client.post('/api/uploads', json=options)
+        self.assertEqual(response.status_code, 201)
+        return response.json['uploadId']
+
+    def put(self, upload_id, offset, chunk):
+        return self.client.put(f'/api/uploads/{upload_id}?offset={offset}', data=chunk)
+
+    def upload(self, upload_id, body, chunk_size):
+        for offset in range(0, len(body), chunk_size):
+            response = self.put(upload_id, offset, body[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, 200, response.json)
+        return self.client.post(f'/api/uploads/{upload_id}/finalize')
+
+    def test_matches_single_request_upload(self):
+        """Chunks split mid-number give the same result as a normal upload"""
+        http_cache.result_cache.clear()
+        expected = self.client.post('/api/descriptive-stats',
+                                    data={'file': (BytesIO(CSV), 'data.csv'), 'precision': 'float64'},
+                                    content_type='multipart/form-data').json
+        del expected['rawData']
+
+        response = self.upload(self.create(), CSV, chunk_size=997)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, expected)
+
+    def test_robust_option(self):
+        """The robust block requested at creation matches the single-request upload"""
+        expected = self.client.post('/api/descriptive-stats',
+                                    data={'file': (BytesIO(CSV), 'data.csv'), 'precision': 'float64',
+                                          'robust': 'true', 'trim': '0.2'},
+                                    content_type='multipart/form-data').json
+        response = self.upload(self.create(robust=True, trim=0.2), CSV, chunk_size=4096)
+        self.assertEqual(response.json['robust'], expected['robust'])
+        self.assertEqual(self.client.post('/api/uploads', json={'trim': 0.9}).status_code, 400)
+
+    def test_density_option(self):
+        """The density curve is kept with the stored result for repeated finalizes"""
+        upload_id = self.create(density=True, gridSize=128)
+        response = self.upload(upload_id, CSV, chunk_size=8192)
+        self.assertEqual(len(response.json['density']['x']), 128)
+        self.assertEqual(self.client.post(f'/api/uploads/{upload_id}/finalize').json, response.json)
+
+    def test_exact_precision(self):
+        """Exact uploads recompute with the statistics module at finalize"""
+        response = self.upload(self.create(precision='exact'), b'1,2,3,\n4,5', chunk_size=3)
+        self.assertEqual(response.json['mean'], 3)
+        self.assertEqual(response.json['variance'], 2.5)
+        self.assertEqual(response.json['precision'], 'exact')
+
+    def test_wrong_offset_reports_where_to_resume(self):
+        """A repeated or skipped chunk gets a 409 with the acknowledged offset"""
+        upload_id = self.create()
+        self.put(upload_id, 0, CSV[:100])
+        repeated = self.put(upload_id, 0, CSV[:100])
+        self.assertEqual(repeated.status_code, 409)
+        self.assertEqual(repeated.json['offset'], 100)
+
+        status = self.client.get(f'/api/uploads/{upload_id}').json
+        self.assertEqual(status['offset'], 100)
+        self.assertFalse(status['finalized'])
+
+    def test_interrupted_chunk_leftovers_are_discarded(self):
+        """Values written for a chunk whose state was never saved are dropped"""
+        upload_id = self.create()
+        self.put(upload_id, 0, b'1,2,')
+        with open(os.path.join(self.directory, upload_id, 'values.bin'), 'ab') as f:
+            np.array([1e9, 1e9]).tofile(f)
+        self.put(upload_id, 4, b'3')
+        result = self.client.post(f'/api/uploads/{upload_id}/finalize').json
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['max'], 3)
+
+    def test_finalize_is_repeatable(self):
+        """A retried finalize returns the stored result; further chunks are refused"""
+        upload_id = self.create()
+        first = self.upload(upload_id, b'4,5,6', chunk_size=2).json
+        second = self.client.post(f'/api/uploads/{upload_id}/finalize').json
+        self.assertEqual(first, second)
+        self.assertTrue(self.client.get(f'/api/uploads/{upload_id}').json['finalized'])
+        self.assertEqual(self.put(upload_id, 5, b',7').status_code, 409)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, upload_id, 'values.bin')))
+
+    def test_expired_upload_is_gone(self):
+        upload_id = self.create()
+        chunked_upload.upload_store.ttl = -1
+        response = self.put(upload_id, 0, b'1,2')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, upload_id)))
+
+    def test_errors(self):
+        """Unknown precision, bad ids, missing offsets and empty uploads are rejected"""
+        self.assertEqual(self.client.post('/api/uploads', json={'precision': 'float16'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/uploads/../../etc').status_code, 404)
+        self.assertEqual(self.client.get('/api/uploads/' + '0' * 32).status_code, 404)
+
+        upload_id = self.create()
+        self.assertEqual(self.client.put(f'/api/uploads/{upload_id}', data=b'1').status_code, 400)
+        response = self.upload(upload_id, b'a,b,c', chunk_size=5)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('valid numbers', json.loads(response.data)['error'])
+
+    def test_chunk_without_content_length_is_bounded(self):
+        """A Transfer-Encoding: chunked PUT is cut off at MAX_CHUNK_BYTES with a 413"""
+        upload_id = self.create()
+
+        def put_chunked(body):
+            return self.client.put(f'/api/uploads/{upload_id}?offset=0', input_stream=BytesIO(body),
+                                   headers={'Transfer-Encoding': 'chunked'},
+                                   environ_overrides={'wsgi.input_terminated': True})
+
+        limit = chunked_upload.DEFAULT_MAX_CHUNK_BYTES
+        response = put_chunked(b'1' * (limit + 1))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}').json['offset'], 0)
+
+        response = put_chunked(b'1,2,')
+        self.assertEqual(response.status_code, 200, response.json)
+        self.assertEqual(response.json['offset'], 4)
+
+    def test_delete(self):
+        upload_id = self.create()
+        self.assertEqual(self.client.delete(f'/api/uploads/{upload_id}').status_code, 204)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}').status_code, 404)
+
+
+class TestRunningMoments(unittest.TestCase):
+    """Test merging per-chunk moments"""
+
+    def test_chunked_equals_whole(self):
+        values = np.random.default_rng(5).normal(1000, 3, 10_001)
+        for precision, places in ((FLOAT64, 9), (FLOAT32, 3)):
+            moments = RunningMoments()
+            for chunk in np.array_split(values, 7):
+                moments.update(precision.as_array(chunk), precision)
+            self.assertEqual(moments.n, values.size)
+            self.assertAlmostEqual(moments.mean, values.mean(), places=places)
+            self.assertAlmostEqual(moments.variance() / values.var(ddof=1), 1.0, places=places - 1)
+            self.assertEqual(moments.max, float(precision.as_array(values).max()))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+import unittest
+import json
+import math
+import os
+import statistics
+import sys
+
+import numpy as np
+
+# Add parent directory to path to import column
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import column
+from analyses import parse_csv_data, parse_csv_rows
+from column import NumericColumn, as_column, dumps, iter_tokens
+from precision import EXACT, FLOAT32, FLOAT64
+
+
+class TestNumericColumn(unittest.TestCase):
+    """Test parsing into, and statistics from, a NumericColumn"""
+
+    def setUp(self):
+        self.values = np.round(np.random.default_rng(11).normal(20, 4, 30_001), 1).tolist()
+        self.text = ', '.join(map(str, self.values))
+
+    def test_from_text_matches_float_parsing(self):
+        """Slice-at-a-time tokenizing gives the same values as str.split"""
+        self.assertGreater(len(self.text), 2 * column.SLICE_CHARS)
+        parsed = NumericColumn.from_text(self.text)
+        self.assertEqual(parsed.tolist(), self.values)
+        self.assertEqual(list(iter_tokens(self.text)), self.text.split(','))
+        self.assertEqual(NumericColumn.from_text(' 1, ,2 ,, 3 ').tolist(), [1.0, 2.0, 3.0])
+        with self.assertRaisesRegex(ValueError, "'abc'"):
+            NumericColumn.from_text('1, abc, 3')
+
+    def test_selections_match_statistics_module(self):
+        """Median and mode (first seen wins ties) come from the sorted view"""
+        parsed = EXACT.parse(self.text)
+        self.assertEqual(parsed.median(), statistics.median(self.values))
+        self.assertEqual(parsed.mode(), statistics.mode(self.values))
+        self.assertEqual(parsed[:-1].median(), statistics.median(self.values[:-1]))
+        self.assertEqual(NumericColumn.from_text('3, 1, 1, 3, 2').mode(), 3.0)
+        self.assertEqual((parsed.min(), parsed.max()), (min(self.values), max(self.values)))
+
+    def test_moments_are_cached_per_precision(self):
+        parsed = FLOAT64.parse(self.text)
+        moments = FLOAT64.moments(parsed)
+        self.assertIs(FLOAT64.moments(parsed), moments)
+        self.assertIsNot(EXACT.moments(parsed), moments)
+        self.assertAlmostEqual(moments.mean, statistics.mean(self.values), places=10)
+        self.assertAlmostEqual(moments.variance() / statistics.variance(self.values), 1.0, places=12)
+
+    def test_no_copies(self):
+        """Analyses and same-dtype conversions share the column's buffer"""
+        parsed = FLOAT32.parse(self.text)
+        self.assertIs(np.asarray(parsed, dtype=np.float32), parsed.buffer)
+        self.assertIs(as_column(parsed, np.float32), parsed)
+        self.assertTrue(np.shares_memory(parsed[10:20].buffer, parsed.buffer))
+        self.assertEqual(np.asarray(parsed, dtype=np.float64).dtype, np.float64)
+
+    def test_mask(self):
+        """Masked entries are left out of len, iteration, statistics and JSON"""
+        masked = NumericColumn([1.0, 99.0, 2.0, 3.0], mask=[False, True, False, False])
+        self.assertEqual(len(masked), 3)
+        self.assertEqual(list(masked), [1.0, 2.0, 3.0])
+        self.assertEqual(masked.median(), 2.0)
+        self.assertEqual(FLOAT64.moments(masked).max, 3.0)
+        self.assertEqual(json.loads(dumps({'v': masked})), {'v': [1.0, 2.0, 3.0]})
+
+
+class TestDumps(unittest.TestCase):
+    """Test JSON encoding of columns from their buffers"""
+
+    def test_matches_json_dumps_of_lists(self):
+        values = np.random.default_rng(2).normal(0, 1e6, 40_000)
+        values[5] = math.nan
+        result = {'a': NumericColumn(values), 'nested': [{'b': NumericColumn(values[:3])}], 'label': 'x'}
+        plain = {'a': values.tolist(), 'nested': [{'b': values[:3].tolist()}], 'label': 'x'}
+        for kwargs in ({}, {'separators': (',', ':'), 'sort_keys': True}, {'indent': 2}):
+            self.assertEqual(json.loads(dumps(result, **kwargs)), json.loads(json.dumps(plain)))
+        self.assertEqual(dumps(result, separators=(',', ':')), json.dumps(plain, separators=(',', ':')))
+
+    def test_float32_and_empty(self):
+        self.assertEqual(dumps(NumericColumn(np.array([0.5, 0.1], dtype=np.float32))),
+                         json.dumps([0.5, float(np.float32(0.1))]))
+        self.assertEqual(dumps({'e': NumericColumn([])}), '{"e": []}')
+
+    def test_unknown_types_still_fail(self):
+        with self.assertRaises(TypeError):
+            dumps({'s': {1, 2}})
+
+
+class TestCsvParsing(unittest.TestCase):
+    """Test that the sliced CSV reader agrees with the csv module"""
+
+    def test_unquoted_and_quoted_files_agree(self):
+        body = 'value,other\r\n1,2\r\n\r\n3, 4 ,\r\n5'
+        quoted = body.replace('value', '"value"')
+        for precision in (EXACT, FLOAT32):
+            self.assertEqual(parse_csv_data(body, precision).tolist(), parse_csv_data(quoted, precision).tolist())
+        self.assertEqual(parse_csv_data(body).tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual([row.tolist() for row in parse_csv_rows('1,2\n\n3\r4', FLOAT64)], [[1.0, 2.0], [3.0], [4.0]])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,182 @@
+import unittest
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+
+from flask import Flask, render_template_string
+
+# Add parent directory to path to import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http_cache
+from app import app
+from build_assets import build
+
+
+class TestAnalysisETags(unittest.TestCase):
+    """Test ETags, result caching and conditional GETs on analysis endpoints"""
+
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        http_cache.result_cache.clear()
+
+    def post_descriptive(self, payload):
+        return self.client.post('/api/descriptive-stats', json=payload)
+
+    def test_analysis_response_has_strong_etag(self):
+        """Successful analyses carry a strong ETag and a Content-Location"""
+        response = self.post_descriptive({'data': '1, 2, 3'})
+        self.assertEqual(response.status_code, 200)
+        etag, weak = response.get_etag()
+        self.assertTrue(etag)
+        self.assertFalse(weak)
+        self.assertEqual(response.headers['Content-Location'], f'/api/results/{etag}')
+
+    def test_etag_ignores_json_formatting(self):
+        """The same input in a different key order hashes identically"""
+        first = self.client.post('/api/correlation', data='{"data": "1,2,3\\n2,4,7", "method": "kendall"}',
+                                 content_type='application/json')
+        second = self.client.post('/api/correlation', data='{"method":"kendall","data":"1,2,3\\n2,4,7"}',
+                                  content_type='application/json')
+        self.assertEqual(first.get_etag(), second.get_etag())
+
+    def test_large_json_hashed_as_sent(self):
+        """Bodies over NORMALIZED_JSON_MAX_BYTES are hashed raw, not decoded"""
+        data = ', '.join(['1.5'] * (http_cache.NORMALIZED_JSON_MAX_BYTES // 4))
+        first = self.client.post('/api/descriptive-stats', data='{"data": "%s"}' % data,
+                                 content_type='application/json')
+        again = self.client.post('/api/descriptive-stats', data='{"data": "%s"}' % data,
+                                 content_type='application/json')
+        spaced = self.client.post('/api/descriptive-stats', data='{"data":  "%s"}' % data,
+                                  content_type='application/json')
+        self.assertEqual(first.get_etag(), again.get_etag())
+        self.assertNotEqual(first.get_etag(), spaced.get_etag())
+        self.assertEqual(first.data, spaced.data)
+
+    def test_different_input_different_etag(self):
+        """Different inputs get different ETags"""
+        first = self.post_descriptive({'data': '1, 2, 3'})
+        second = self.post_descriptive({'data': '1, 2, 4'})
+        self.assertNotEqual(first.get_etag()[0], second.get_etag()[0])
+
+    def test_post_then_get_revalidates_with_304(self):
+        """A result can be re-fetched and revalidated without recomputation"""
+        posted = self.post_descriptive({'data': '4, 5, 6'})
+        etag = posted.get_etag()[0]
+
+        fetched = self.client.get(f'/api/results/{etag}')
+        self.assertEqual(fetched.status_code, 200)
+        self.assertEqual(fetched.data, posted.data)
+
+        revalidated = self.client.get(f'/api/results/{etag}', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.data, b'')
+
+    def test_unknown_result_is_404(self):
+        """Evicted or unknown results ask the client to POST again"""
+        response = self.client.get('/api/results/deadbeef')
+        self.assertEqual(response.status_code, 404)
+
+    def test_errors_are_not_cached(self):
+        """Error responses carry no ETag and are not stored"""
+        response = self.post_descriptive({'data': 'a, b'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(response.get_etag()[0])
+        self.assertEqual(len(http_cache.result_cache), 0)
+
+    def test_csv_upload_fingerprint_ignores_boundary(self):
+        """Two uploads of the same file share an ETag"""
+        from io import BytesIO
+        etags = set()
+        for _ in range(2):
+            response = self.client.post('/api/descriptive-stats',
+                                        data={'file': (BytesIO(b'1,2,3'), 'a.csv')},
+                                        content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 200)
+            etags.add(response.get_etag()[0])
+        self.assertEqual(len(etags), 1)
+
+    def test_index_revalidates_with_304(self):
+        """The pre-rendered index page answers conditional GETs with 304"""
+        first = self.client.get('/')
+        etag = first.get_etag()[0]
+        second = self.client.get('/', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(second.status_code, 304)
+
+
+class TestResultCache(unittest.TestCase):
+    """Test the byte-bounded LRU"""
+
+    def test_evicts_least_recently_used(self):
+        cache = http_cache.ResultCache(max_bytes=10)
+        cache.put('a', b'1234', 'application/json')
+        cache.put('b', b'1234', 'application/json')
+        cache.get('a')
+        cache.put('c', b'1234', 'application/json')
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_oversized_entry_is_skipped(self):
+        cache = http_cache.ResultCache(max_bytes=3)
+        cache.put('a', b'1234', 'application/json')
+        self.assertEqual(len(cache), 0)
+
+
+class TestFingerprintedAssets(unittest.TestCase):
+    """Test the asset build and the immutable /assets route"""
+
+    def setUp(self):
+        self.static = tempfile.mkdtemp()
+        with open(os.path.join(self.static, 'site.js'), 'w') as f:
+            f.write('console.log("hello");\n' * 50)
+        with open(os.path.join(self.static, 'notes.txt'), 'w') as f:
+            f.write('not an asset')
+        self.manifest = build(self.static)
+
+        self.app = Flask(__name__, static_folder=self.static, static_url_path='/static')
+        self.app.config['TESTING'] = True
+        http_cache.init_app(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.static)
+
+    def test_manifest_maps_logical_names(self):
+        """Only js/css files are fingerprinted, with a content hash in the name"""
+        self.assertEqual(list(self.manifest), ['site.js'])
+        self.assertRegex(self.manifest['site.js']['file'], r'^site\.[0-9a-f]{12}\.js$')
+
+    def test_asset_url_uses_fingerprint(self):
+        """asset_url() resolves through the manifest"""
+        with self.app.test_request_context():
+            url = render_template_string("{{ asset_url('site.js') }}")
+            fallback = render_template_string("{{ asset_url('other.js') }}")
+        self.assertEqual(url, '/assets/' + self.manifest['site.js']['file'])
+        self.assertEqual(fallback, '/static/other.js')
+
+    def test_assets_are_immutable_and_precompressed(self):
+        """Fingerprinted assets are cached forever and served gzipped when accepted"""
+        url = '/assets/' + self.manifest['site.js']['file']
+        plain = self.client.get(url)
+        self.assertEqual(plain.status_code, 200)
+        self.assertIn('immutable', plain.headers['Cache-Control'])
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+        compressed = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertTrue(compressed.mimetype.endswith('javascript'))
+        self.assertEqual(gzip.decompress(compressed.data), plain.data)
+
+    def test_manifest_is_not_served(self):
+        response = self.client.get('/assets/manifest.json')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,61 @@
+import unittest
+import math
+import os
+import sys
+
+import numpy as np
+from scipy import stats
+
+# Add parent directory to path to import kde
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from column import NumericColumn
+from kde import bandwidth, density_curve, linear_binning
+from precision import EXACT, FLOAT32, FLOAT64
+
+
+class TestBinnedKde(unittest.TestCase):
+    """Test the binned FFT density curve against a direct KDE"""
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.values = np.concatenate([rng.normal(0, 1, 3000), rng.normal(6, 0.5, 1000)])
+
+    def test_matches_direct_kde(self):
+        curve = density_curve(NumericColumn(self.values))
+        grid, density = np.asarray(curve['x']), np.asarray(curve['density'])
+        direct = stats.gaussian_kde(self.values, bw_method=curve['bandwidth'] / self.values.std(ddof=1))(grid)
+        self.assertLess(np.max(np.abs(density - direct)), 1e-3 * direct.max())
+        self.assertAlmostEqual(np.trapezoid(density, grid), 1.0, places=3)
+        self.assertEqual((curve['gridSize'], len(curve['x']), curve['n']), (512, 512, 4000))
+
+    def test_bandwidth_rule(self):
+        """Silverman's rule with R's bw.nrd0 fallbacks"""
+        q1, q3 = np.percentile(self.values, [25, 75])
+        expected = 0.9 * min(self.values.std(ddof=1), (q3 - q1) / 1.34) * 4000 ** -0.2
+        self.assertAlmostEqual(density_curve(self.values)['bandwidth'], expected, places=12)
+        self.assertEqual(bandwidth(1, 0.0, 0.0, -4.0), 3.6)
+        self.assertEqual(bandwidth(1, 0.0, 0.0, 0.0), 0.9)
+        self.assertAlmostEqual(bandwidth(32, 2.0, 0.0, 1.0), 0.9)
+
+    def test_linear_binning(self):
+        """Each value splits its weight between its two neighbouring grid points"""
+        weights = linear_binning(np.array([0.25, 1.0, 3.0]), 0.0, 1.0, 4, chunk=2)
+        self.assertTrue(np.allclose(weights, [0.75, 1.25, 0.0, 1.0]))
+
+    def test_precision_modes_and_edge_cases(self):
+        reference = np.asarray(density_curve(self.values, EXACT)['density'])
+        for precision in (FLOAT64, FLOAT32):
+            density = np.asarray(density_curve(precision.column(self.values), precision)['density'])
+            self.assertLess(np.max(np.abs(density - reference)), 1e-5)
+        self.assertEqual(density_curve([1.0, math.inf, 2.0, math.nan])['n'], 2)
+        constant = density_curve([5.0, 5.0, 5.0], grid_size=17)
+        self.assertEqual(np.asarray(constant['x'])[8], 5.0)
+        self.assertEqual(int(np.argmax(np.asarray(constant['density']))), 8)
+        for grid_size in (8, 20000):
+            with self.assertRaises(ValueError):
+                density_curve(self.values, grid_size=grid_size)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,89 @@
+import unittest
+import os
+import random
+import sys
+
+# Add parent and benchmarks directories to path to import app and loadtest
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import http_cache
+import loadtest
+from app import app
+
+
+class TestLoadTestPayloads(unittest.TestCase):
+    """Test that every load-test scenario produces a request the app accepts"""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        http_cache.result_cache.clear()
+
+    def test_every_scenario_succeeds(self):
+        """JSON and CSV payloads for all four endpoints return 200"""
+        rng = random.Random(0)
+        for analysis in loadtest.ENDPOINTS:
+            for fmt in ('json', 'csv'):
+                with self.subTest(analysis=analysis, fmt=fmt):
+                    rows = loadtest.make_rows(analysis, 30, rng)
+                    path, body, content_type = loadtest.encode_request(analysis, fmt, rows)
+                    response = self.client.post(path, data=body, content_type=content_type)
+                    self.assertEqual(response.status_code, 200, response.data)
+
+    def test_payload_pool_is_distinct(self):
+        """Distinct payloads per scenario keep the result cache from short-circuiting the run"""
+        pool = loadtest.build_payload_pool({'descriptive/json/small': 1}, 5, seed=1)
+        bodies = {body for _, body, _ in pool['descriptive/json/small']}
+        self.assertEqual(len(bodies), 5)
+
+    def test_bad_scenario_rejected(self):
+        with self.assertRaises(ValueError):
+            loadtest.parse_mix('descriptive/xml/small=1')
+
+
+class TestLoadTestReport(unittest.TestCase):
+    """Test percentile, summary and SLO evaluation"""
+
+    def test_nearest_rank_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertEqual(loadtest.percentile([7], 95), 7)
+        self.assertIsNone(loadtest.percentile([], 50))
+
+    def test_summary_and_slo(self):
+        """Error rate and SLO pass/fail come from the overall summary"""
+        samples = [(0.010, True)] * 98 + [(0.500, False)] * 2
+        summary = loadtest.summarize(samples, elapsed=2.0)
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['throughputRps'], 50.0)
+        self.assertAlmostEqual(summary['errorRate'], 0.02)
+        self.assertAlmostEqual(summary['latencyMs']['p50'], 10.0)
+        self.assertEqual(summary['rejected'], 0)
+        rejected = loadtest.summarize([(0.001, False, True), (0.010, True, False)], elapsed=1.0)
+        self.assertEqual((rejected['errors'], rejected['rejected'], rejected['rejectRate']), (1, 1, 0.5))
+
+        slo = loadtest.evaluate_slo(summary, loadtest.parse_slo('p50=20,error_rate=0.01'))
+        self.assertFalse(slo['passed'])
+        self.assertTrue(slo['checks']['p50']['passed'])
+        self.assertFalse(slo['checks']['error_rate']['passed'])
+
+    def test_process_tree(self):
+        """Workers are the master's children; pool processes are found at any depth"""
+        parents = {10: 1, 11: 10, 12: 10, 20: 11, 21: 20, 22: 20, 30: 2}
+        self.assertEqual(loadtest.child_pids(10, parents), [11, 12])
+        self.assertEqual(loadtest.descendant_pids(11, parents), [20, 21, 22])
+        self.assertEqual(loadtest.descendant_pids(12, parents), [])
+
+    def test_compare_reports(self):
+        baseline = {'overall': loadtest.summarize([(0.010, True)] * 10, 1.0)}
+        current = {'overall': loadtest.summarize([(0.020, True)] * 20, 1.0)}
+        comparison = loadtest.compare_reports(current, baseline)
+        self.assertEqual(comparison['throughputRpsChangePct'], 100.0)
+        self.assertEqual(comparison['p50ChangePct'], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
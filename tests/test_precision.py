@@ -0,0 +1,121 @@
+import unittest
+import math
+import os
+import statistics
+import sys
+from fractions import Fraction
+
+import numpy as np
+
+# Add parent directory to path to import precision
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from precision import EXACT, FLOAT32, FLOAT32_BLOCK, FLOAT64, compensated_sum, get_precision
+
+U64 = 2.0 ** -53
+U32 = 2.0 ** -24
+
+
+class TestCompensatedSum(unittest.TestCase):
+    """Test the float32 blocked pairwise + Neumaier summation"""
+
+    def assert_within_bound(self, values):
+        """Error against the exact sum of the stored float32 values stays under the documented bound"""
+        stored = np.asarray(values, dtype=np.float32)
+        exact = math.fsum(stored.astype(np.float64))
+        s1 = float(np.abs(stored.astype(np.float64)).sum())
+        bound = (math.log2(FLOAT32_BLOCK) + 19) * U32 * s1 + 2 * U32 * abs(exact)
+        self.assertLessEqual(abs(compensated_sum(stored) - exact), bound)
+
+    def test_many_small_values(self):
+        """A naive float32 running sum of 2e6 x 0.1 is off by percent; this is not"""
+        values = np.full(2_000_000, 0.1, dtype=np.float32)
+        self.assert_within_bound(values)
+        self.assertAlmostEqual(compensated_sum(values), 2_000_000 * float(np.float32(0.1)), delta=1.0)
+
+    def test_cancellation_across_blocks(self):
+        """Large values that cancel between blocks do not swamp small ones"""
+        values = np.concatenate([np.full(FLOAT32_BLOCK, 1e6), np.ones(FLOAT32_BLOCK), np.full(FLOAT32_BLOCK, -1e6)])
+        self.assertEqual(compensated_sum(values), FLOAT32_BLOCK)
+
+    def test_random_data_and_partial_block(self):
+        rng = np.random.default_rng(0)
+        for size in (1, FLOAT32_BLOCK - 1, 3 * FLOAT32_BLOCK + 17):
+            self.assert_within_bound(rng.normal(50, 20, size))
+
+    def test_empty(self):
+        self.assertEqual(compensated_sum(np.array([], dtype=np.float32)), 0.0)
+
+
+class TestPrecisionModes(unittest.TestCase):
+    """Compare float64 and float32 statistics with the exact ones"""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.data = np.round(rng.normal(100, 15, 20_000), 3).tolist()
+
+    def stored(self, precision):
+        return precision.collect(iter(self.data))
+
+    def test_exact_mode_is_statistics_module(self):
+        """Exact mode keeps today's Fraction-based results"""
+        stored = self.stored(EXACT)
+        self.assertEqual(stored.dtype, np.float64)
+        self.assertEqual(EXACT.mean(stored), statistics.mean(self.data))
+        self.assertEqual(EXACT.median(stored), statistics.median(self.data))
+        self.assertEqual(EXACT.mean(self.data), statistics.mean(self.data))
+        self.assertEqual(EXACT.variance(self.data), statistics.variance(self.data))
+        self.assertEqual(EXACT.sum(self.data), float(sum(map(Fraction, self.data))))
+
+    def test_exact_mode_overflows_to_inf(self):
+        """Totals past the float range give inf/nan as a plain float sum would, never an error"""
+        self.assertEqual(EXACT.sum([1e308, 1e308]), math.inf)
+        self.assertTrue(math.isnan(EXACT.sum([math.inf, -math.inf, 1.0])))
+        self.assertEqual(EXACT.variance([1e308, -1e308, 1e308]), math.inf)
+        self.assertEqual(EXACT.mean([1e308, 1e308]), 1e308)
+
+    def test_storage_dtype(self):
+        self.assertEqual(self.stored(FLOAT64).dtype, np.float64)
+        self.assertEqual(self.stored(FLOAT32).dtype, np.float32)
+
+    def test_float64_matches_exact(self):
+        """float64 agrees with exact to within the pairwise summation bound"""
+        values = self.stored(FLOAT64)
+        n = len(self.data)
+        s1 = math.fsum(abs(x) for x in self.data)
+        bound = (math.log2(n) + 16) * U64 * s1
+        self.assertLessEqual(abs(FLOAT64.sum(values) - EXACT.sum(self.data)), bound)
+        self.assertLessEqual(abs(FLOAT64.mean(values) - EXACT.mean(self.data)), bound / n + U64 * 100)
+        self.assertAlmostEqual(FLOAT64.variance(values) / EXACT.variance(self.data), 1.0, places=12)
+        self.assertEqual(FLOAT64.median(values), EXACT.median(self.data))
+
+    def test_float32_matches_exact(self):
+        """float32 agrees with exact to within storage rounding plus the compensated-sum bound"""
+        values = self.stored(FLOAT32)
+        n = len(self.data)
+        s1 = math.fsum(abs(x) for x in self.data)
+        # Storage rounding (u per value) plus the summation bound
+        bound = (1 + math.log2(FLOAT32_BLOCK) + 19) * U32 * s1 + 2 * U32 * abs(EXACT.sum(self.data))
+        self.assertLessEqual(abs(FLOAT32.sum(values) - EXACT.sum(self.data)), bound)
+        self.assertLessEqual(abs(FLOAT32.mean(values) - EXACT.mean(self.data)), bound / n)
+        # mean / stdev ~ 7 here, so the variance keeps about 6 digits
+        self.assertLess(abs(FLOAT32.variance(values) / EXACT.variance(self.data) - 1.0), 1e-5)
+        self.assertLessEqual(abs(FLOAT32.median(values) - EXACT.median(self.data)), U32 * 200)
+
+    def test_mode_and_extremes(self):
+        """Mode ties go to the first value seen, as in statistics.mode"""
+        data = [3.0, 1.0, 1.0, 3.0, 2.0]
+        for precision in (FLOAT64, FLOAT32):
+            values = precision.collect(iter(data))
+            self.assertEqual(precision.mode(values), EXACT.mode(data))
+            self.assertEqual(precision.min(values), 1.0)
+            self.assertEqual(precision.max(values), 3.0)
+
+    def test_get_precision(self):
+        self.assertIs(get_precision(None), EXACT)
+        self.assertIs(get_precision(' Float32 '), FLOAT32)
+        self.assertIsNone(get_precision('float16'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+from scipy import stats
+
+# Add parent directory to path to import rank_correlation
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rank_correlation import rank_pass, count_inversions, spearman, kendall_tau, rank_correlation
+
+
+class TestRankCorrelation(unittest.TestCase):
+    """Test the O(n log n) rank correlation engine against scipy"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1234)
+
+    def test_rank_pass_average_ranks_with_ties(self):
+        """Tied values share the mean of their ranks"""
+        order, ranks, dense, tie_sizes = rank_pass([10, 20, 20, 5, 20])
+        self.assertEqual(list(ranks), [2.0, 4.0, 4.0, 1.0, 4.0])
+        self.assertEqual(list(dense), [1, 2, 2, 0, 2])
+        self.assertEqual(list(tie_sizes), [3])
+        self.assertEqual(list(order), [3, 0, 1, 2, 4])
+
+    def test_count_inversions_matches_brute_force(self):
+        """Radix inversion count equals the O(n^2) pair count"""
+        for n in [1, 2, 7, 64, 129]:
+            seq = self.rng.integers(0, n, size=n)
+            expected = sum(1 for i in range(n) for j in range(i + 1, n) if seq[i] > seq[j])
+            self.assertEqual(count_inversions(seq), expected)
+
+    def test_spearman_matches_scipy(self):
+        """Spearman rho and p-value agree with scipy.stats.spearmanr"""
+        x = self.rng.normal(size=200)
+        y = x + self.rng.normal(size=200)
+        rho, p = spearman(x, y)
+        expected = stats.spearmanr(x, y)
+        self.assertAlmostEqual(rho, expected.statistic, places=10)
+        self.assertAlmostEqual(p, expected.pvalue, places=10)
+
+    def test_kendall_exact_small_sample(self):
+        """Small untied samples use the exact p-value like scipy"""
+        x = self.rng.normal(size=12)
+        y = x + self.rng.normal(size=12)
+        tau, p = kendall_tau(x, y)
+        expected = stats.kendalltau(x, y)
+        self.assertAlmostEqual(tau, expected.statistic, places=10)
+        self.assertAlmostEqual(p, expected.pvalue, places=10)
+
+    def test_kendall_with_ties_matches_scipy(self):
+        """Tau-b tie correction and asymptotic p-value agree with scipy"""
+        x = np.round(self.rng.normal(size=500), 1)
+        y = np.round(x + self.rng.normal(size=500))
+        tau, p = kendall_tau(x, y)
+        expected = stats.kendalltau(x, y)
+        self.assertAlmostEqual(tau, expected.statistic, places=10)
+        self.assertAlmostEqual(p, expected.pvalue, places=10)
+
+    def test_constant_input_is_nan(self):
+        """A constant variable has no rank correlation"""
+        for method in ['spearman', 'kendall']:
+            coef, p = rank_correlation([1, 2, 3, 4], [5, 5, 5, 5], method)
+            self.assertTrue(np.isnan(coef))
+            self.assertTrue(np.isnan(p))
+
+    def test_unknown_method(self):
+        """Unknown methods raise ValueError"""
+        with self.assertRaises(ValueError):
+            rank_correlation([1, 2, 3], [1, 2, 3], 'pearson')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+from scipy import stats
+
+# Add parent directory to path to import regression
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from regression import CoMoments, LeastSquares
+
+
+class TestRegression(unittest.TestCase):
+    """Test the streaming co-moment and least-squares accumulators"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+        self.x = self.rng.normal(size=1000) * 5 + 100
+        self.y = 3 * self.x + 2 + self.rng.normal(size=1000)
+
+    def test_chunked_comoments_match_single_pass(self):
+        """Folding chunks gives the same moments as one pass"""
+        whole = CoMoments.from_arrays(self.x, self.y)
+        chunked = CoMoments()
+        for start in range(0, 1000, 137):
+            chunked.update(self.x[start:start + 137], self.y[start:start + 137])
+        self.assertEqual(chunked.n, whole.n)
+        self.assertAlmostEqual(chunked.c_xy, whole.c_xy, places=6)
+        self.assertAlmostEqual(chunked.m2_x, whole.m2_x, places=6)
+
+    def test_merge_partial_accumulators(self):
+        """Accumulators built on separate halves merge into the full result"""
+        left = CoMoments.from_arrays(self.x[:400], self.y[:400])
+        right = CoMoments.from_arrays(self.x[400:], self.y[400:])
+        merged = left.merge(right)
+        r, p = merged.pearson()
+        expected = stats.pearsonr(self.x, self.y)
+        self.assertAlmostEqual(r, expected.statistic, places=10)
+
+    def test_linear_fit_matches_linregress(self):
+        """Slope, intercept and standard errors agree with scipy.stats.linregress"""
+        fit = CoMoments.from_arrays(self.x, self.y).linear_fit(band_points=10)
+        expected = stats.linregress(self.x, self.y)
+        self.assertAlmostEqual(fit['slope'], expected.slope, places=8)
+        self.assertAlmostEqual(fit['intercept'], expected.intercept, places=6)
+        self.assertAlmostEqual(fit['slopeStdError'], expected.stderr, places=8)
+        self.assertAlmostEqual(fit['interceptStdError'], expected.intercept_stderr, places=6)
+        self.assertEqual(len(fit['predictionBand']['x']), 10)
+
+    def test_prediction_band_contains_fit(self):
+        """The prediction band brackets the fitted line"""
+        band = CoMoments.from_arrays(self.x, self.y).linear_fit()['predictionBand']
+        for low, mid, high in zip(band['lower'], band['fit'], band['upper']):
+            self.assertLess(low, mid)
+            self.assertLess(mid, high)
+
+    def test_linear_fit_constant_x(self):
+        """A constant X has no regression line"""
+        with self.assertRaises(ValueError):
+            CoMoments.from_arrays([2, 2, 2], [1, 2, 3]).linear_fit()
+
+    def test_multiple_regression_matches_lstsq(self):
+        """Chunked normal equations agree with a dense least-squares solve"""
+        X = np.column_stack([self.x, self.rng.normal(size=1000)])
+        y = X @ [1.5, -2.0] + 4 + self.rng.normal(size=1000)
+        fit = LeastSquares(2)
+        for start in range(0, 1000, 100):
+            fit.update(X[start:start + 100], y[start:start + 100])
+        result = fit.solve()
+
+        design = np.column_stack([np.ones(1000), X])
+        beta = np.linalg.lstsq(design, y, rcond=None)[0]
+        self.assertEqual(result['solver'], 'cholesky')
+        self.assertAlmostEqual(result['intercept'], beta[0], places=6)
+        np.testing.assert_allclose(result['coefficients'], beta[1:], rtol=1e-8)
+
+    def test_ill_conditioned_falls_back_to_qr(self):
+        """Nearly collinear predictors are solved from the QR factor"""
+        x1 = self.rng.normal(size=2000) + 1e4
+        x2 = x1 + self.rng.normal(size=2000) * 1e-5
+        X = np.column_stack([x1, x2])
+        y = X @ [1.0, 2.0] + 3 + self.rng.normal(size=2000) * 0.01
+        fit = LeastSquares(2)
+        for start in range(0, 2000, 300):
+            fit.update(X[start:start + 300], y[start:start + 300])
+        result = fit.solve()
+
+        design = np.column_stack([np.ones(2000), X])
+        beta = np.linalg.lstsq(design, y, rcond=None)[0]
+        self.assertEqual(result['solver'], 'qr')
+        np.testing.assert_allclose(result['coefficients'], beta[1:], rtol=1e-5)
+
+        # Past retained_rows the QR factor is kept chunk by chunk instead: same fit
+        streamed = LeastSquares(2, retained_rows=500)
+        for start in range(0, 2000, 300):
+            streamed.update(X[start:start + 300], y[start:start + 300])
+        self.assertIsNone(streamed._chunks)
+        self.assertEqual(streamed.solve(), result)
+
+    def test_qr_factor_only_when_needed(self):
+        """A well-conditioned fit never computes the QR factor"""
+        fit = LeastSquares(1)
+        fit.update(self.x, 2 * self.x + self.rng.normal(size=1000))
+        self.assertEqual(fit.solve()['solver'], 'cholesky')
+        self.assertEqual(fit._r.shape[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,95 @@
+import unittest
+import os
+import statistics
+import sys
+
+import numpy as np
+from scipy import stats
+
+# Add parent directory to path to import robust
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from column import NumericColumn
+from precision import EXACT, FLOAT32, FLOAT64
+from robust import robust_statistics, select_ranks
+
+
+class TestSelection(unittest.TestCase):
+    """Test in-place selection of several ranks"""
+
+    def test_select_ranks_matches_sort(self):
+        rng = np.random.default_rng(5)
+        for n in (1, 2, 7, 1000):
+            values = np.round(rng.normal(size=n), 1)  # many ties
+            ranks = sorted({0, n // 3, n // 2, n - 1})
+            work = values.copy()
+            select_ranks(work, ranks)
+            ordered = np.sort(values)
+            self.assertTrue(np.array_equal(work[ranks], ordered[ranks]))
+            # Everything between two selected ranks lies between them
+            for low, high in zip(ranks, ranks[1:]):
+                self.assertTrue(np.array_equal(np.sort(work[low:high + 1]), ordered[low:high + 1]))
+
+
+class TestRobustStatistics(unittest.TestCase):
+    """Test robust statistics against numpy, scipy and the statistics module"""
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        self.values = np.round(rng.standard_t(3, 2001), 2)
+
+    def test_matches_reference_implementations(self):
+        values = self.values
+        for n in (1, 2, 3, 4, 10, 11, values.size):
+            sample = values[:n]
+            result = robust_statistics(NumericColumn(sample), trim=0.1)
+            q1, q3 = np.percentile(sample, [25, 75])
+            self.assertEqual(result['median'], statistics.median(sample.tolist()))
+            self.assertAlmostEqual(result['q1'], q1, places=12)
+            self.assertAlmostEqual(result['q3'], q3, places=12)
+            self.assertEqual(result['mad'], stats.median_abs_deviation(sample))
+            self.assertAlmostEqual(result['trimmedMean'], stats.trim_mean(sample, 0.1), places=12)
+            winsorized = np.mean(stats.mstats.winsorize(sample, (0.1, 0.1)))
+            self.assertAlmostEqual(result['winsorizedMean'], winsorized, places=12)
+
+    def test_outliers(self):
+        result = robust_statistics(NumericColumn(self.values))
+        q1, q3 = np.percentile(self.values, [25, 75])
+        tukey = np.flatnonzero((self.values < q1 - 1.5 * (q3 - q1)) | (self.values > q3 + 1.5 * (q3 - q1)))
+        self.assertEqual(result['tukey']['count'], tukey.size)
+        self.assertEqual(result['tukey']['indices'], tukey.tolist())
+        z = 0.6745 * np.abs(self.values - np.median(self.values)) / stats.median_abs_deviation(self.values)
+        self.assertEqual(result['madRule']['indices'], np.flatnonzero(z > 3.5).tolist())
+
+        capped = robust_statistics(NumericColumn(self.values), index_limit=3)
+        self.assertEqual(capped['tukey']['count'], tukey.size)
+        self.assertEqual(capped['tukey']['indices'], tukey[:3].tolist())
+        # No spread around the median: the MAD rule flags nothing
+        self.assertEqual(robust_statistics(NumericColumn([5, 5, 5, 5, 80]))['madRule']['count'], 0)
+
+    def test_sorted_view_and_partition_agree(self):
+        """A cached sorted view is used as it is; the column is never reordered"""
+        column = NumericColumn(self.values.copy())
+        partitioned = robust_statistics(column)
+        self.assertTrue(np.array_equal(column.values, self.values))
+        column.sorted()
+        from_sorted = robust_statistics(column)
+        self.assertTrue(np.array_equal(column.sorted(), np.sort(self.values)))
+        for key in ('median', 'q1', 'q3', 'mad', 'tukey', 'madRule'):
+            self.assertEqual(partitioned[key], from_sorted[key])
+        self.assertAlmostEqual(partitioned['trimmedMean'], from_sorted['trimmedMean'], places=12)
+
+    def test_precision_modes_and_masks(self):
+        reference = robust_statistics(NumericColumn(self.values), EXACT)
+        for precision in (FLOAT64, FLOAT32):
+            result = robust_statistics(precision.column(self.values), precision)
+            self.assertAlmostEqual(result['median'], reference['median'], places=5)
+            self.assertAlmostEqual(result['trimmedMean'], reference['trimmedMean'], places=5)
+        masked = NumericColumn([1.0, 1e9, 2.0, 3.0, 4.0], mask=[False, True, False, False, False])
+        self.assertEqual(robust_statistics(masked)['median'], 2.5)
+        with self.assertRaises(ValueError):
+            robust_statistics(NumericColumn([1.0, 2.0]), trim=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,170 @@
+import unittest
+import io
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path to import serving
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http_cache
+import serving
+from app import app
+from column import NumericColumn
+from precision import FLOAT32
+from serving import JobTimeout, Lane, Overloaded, admission, estimate_cost
+from structured_log import pipeline
+
+
+class TestAdmission(unittest.TestCase):
+    """Test cost estimates and lane backlogs"""
+
+    def test_cost_estimate(self):
+        exact = estimate_cost('descriptive', 6_000_000, 'exact')
+        self.assertAlmostEqual(exact, 1.0)
+        self.assertLess(estimate_cost('descriptive', 6_000_000, 'float64'), exact)
+        self.assertAlmostEqual(estimate_cost('correlation', 6_000_000, 'exact', 'kendall'), 4.0)
+        self.assertAlmostEqual(estimate_cost('descriptive', 6_000_000, 'unknown', scale=2.0), 2.0)
+
+    def test_backlog_limit_and_retry_after(self):
+        lane = Lane('bulk', workers=2, backlog_seconds=1.0)
+        first = lane.admit(1.5)
+        lane.admit(0.5)
+        with self.assertRaises(Overloaded) as raised:
+            lane.admit(1.0)
+        # 2s outstanding must drain to 1s (2 workers): 0.5s, rounded up
+        self.assertEqual(raised.exception.code, 429)
+        self.assertEqual(raised.exception.retry_after, 1)
+        lane.release(first)
+        lane.admit(1.0)
+        self.assertEqual(lane.metrics()['rejected'], 1)
+        self.assertAlmostEqual(lane.metrics()['outstandingSeconds'], 1.5)
+
+    def test_idle_lane_admits_oversized_job(self):
+        lane = Lane('bulk', workers=1, backlog_seconds=1.0)
+        ticket = lane.admit(30.0)
+        with self.assertRaises(Overloaded) as raised:
+            lane.admit(0.1)
+        self.assertEqual(raised.exception.retry_after, 30)
+        lane.release(ticket)
+        self.assertEqual((lane.jobs, lane.outstanding), (0, 0.0))
+
+    def test_pool_arguments_pickle_by_value(self):
+        """Columns drop their caches and precision modes stay the module's own"""
+        column = NumericColumn(np.arange(5.0), mask=[False, True, False, False, False])
+        column.sorted()
+        copy = pickle.loads(pickle.dumps(column))
+        self.assertEqual(copy.tolist(), [0.0, 2.0, 3.0, 4.0])
+        self.assertIsNone(copy.peek('sorted'))
+        self.assertIs(pickle.loads(pickle.dumps(FLOAT32)), FLOAT32)
+
+
+class TestPoolServing(unittest.TestCase):
+    """Test the pool serving mode through the analysis endpoints"""
+
+    def setUp(self):
+        self.client = app.test_client()
+        http_cache.result_cache.clear()
+        admission.configure(mode='pool', workers=1, interactive_max_seconds=1e-4, bulk_backlog_seconds=1.0)
+        self.large = ', '.join(str(value) for value in range(1, 2001))
+
+    def tearDown(self):
+        admission.configure()
+
+    def post(self, data, **options):
+        return self.client.post('/api/descriptive-stats', json={'data': data, **options})
+
+    def test_large_request_runs_in_pool(self):
+        response = self.post(self.large, robust=True)
+        self.assertEqual(response.status_code, 200)
+        admission.configure()
+        http_cache.result_cache.clear()
+        self.assertEqual(response.get_json(), self.post(self.large, robust=True).get_json())
+
+    def test_full_queue_answers_429(self):
+        """A full bulk lane rejects at once, before the body is read; small requests still pass"""
+        self.assertEqual(self.post(self.large).status_code, 200)
+        ticket = admission.bulk.admit(60.0)
+        try:
+            response = self.post(self.large, precision='float64')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers['Retry-After'], '60')
+            self.assertEqual(response.get_json()['lane'], 'bulk')
+            self.assertEqual(self.post('1, 2, 3').status_code, 200)
+            # Priced from Content-Length alone: a body that is not even JSON gets the same answer
+            garbled = self.client.post('/api/descriptive-stats', data='{' * 20000, content_type='application/json')
+            self.assertEqual(garbled.status_code, 429)
+        finally:
+            admission.bulk.release(ticket)
+        lanes = self.client.get('/api/metrics/serving').get_json()['lanes']
+        self.assertEqual(lanes['bulk']['rejected'], 2)
+        self.assertEqual(lanes['bulk']['jobs'], 0)
+        self.assertEqual(lanes['interactive']['admitted'], 1)
+
+    def test_body_without_content_length_is_bulk(self):
+        """A chunked body has no Content-Length: it is priced as bulk work, never run inline"""
+        def post_chunked(data):
+            body = json.dumps({'data': data}).encode('utf-8')
+            return self.client.post('/api/descriptive-stats', input_stream=io.BytesIO(body),
+                                    headers={'Transfer-Encoding': 'chunked', 'Content-Type': 'application/json'},
+                                    environ_overrides={'wsgi.input_terminated': True})
+
+        self.assertEqual(post_chunked('1, 2, 3').get_json()['count'], 3)
+        lanes = admission.metrics()['lanes']
+        self.assertEqual((lanes['interactive']['admitted'], lanes['bulk']['admitted']), (0, 1))
+        ticket = admission.bulk.admit(0.5)
+        try:
+            self.assertEqual(post_chunked('4, 5, 6').status_code, 429)
+        finally:
+            admission.bulk.release(ticket)
+
+    def test_pooled_jobs_log_in_request_scope(self):
+        """Pool processes write records like the parent's, with the request's fields"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'statcalc.log')
+            pipeline.configure(level='INFO,analyses=DEBUG', log_file=path)
+            try:
+                admission.configure(mode='pool', workers=1, interactive_max_seconds=0)
+                response = self.client.post('/api/chi-square', json={'data': '10, 20, 30\n1, 1, 1'},
+                                            headers={'X-Request-ID': 'pooled1'})
+                self.assertEqual(response.status_code, 200)
+                admission.configure()  # pool processes flush their logs on exit
+            finally:
+                pipeline.stop()
+            with open(path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+        normalized = [r for r in records if r['event'] == 'chi-square expected normalized']
+        self.assertEqual(len(normalized), 1)
+        self.assertEqual((normalized[0]['requestId'], normalized[0]['lane']), ('pooled1', 'bulk'))
+
+    def test_stuck_job_times_out(self):
+        """A pooled job that outlives JOB_TIMEOUT_SECONDS answers 503 instead of waiting on"""
+        admission.configure(mode='pool', workers=1, job_timeout=0.2)
+        with self.assertRaises(JobTimeout) as raised:
+            admission.bulk.run(time.sleep, 1.0)
+        self.assertEqual((raised.exception.code, raised.exception.retry_after), (503, 1))
+        self.assertEqual(admission.metrics()['lanes']['bulk']['timeouts'], 1)
+
+    def test_invalid_json_is_a_bad_request(self):
+        """The body is decoded in the job; a malformed one is a 400 like any bad input"""
+        response = self.client.post('/api/t-test', data='{"data": ' + self.large, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_errors_release_the_lane(self):
+        response = self.post(self.large + ', x')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'Invalid input. Please enter numbers only.')
+        self.assertEqual((admission.bulk.jobs, admission.bulk.outstanding), (0, 0.0))
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            serving.admission.configure(mode='async')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
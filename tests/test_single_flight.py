@@ -0,0 +1,212 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import single_flight
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from single_flight import FlightResult, LeaderFailed, SingleFlight, fcntl
+
+OK = FlightResult(200, b'{"ok": true}', 'application/json')
+SERVER_ERROR = FlightResult(500, b'{"error": "boom"}', 'application/json')
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test request coalescing within and across processes"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.flight = SingleFlight(directory=self.directory, cross_process=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_concurrently(self, flight, compute, count=10):
+        """Start `count` callers; the first becomes leader before the rest join"""
+        results = [None] * count
+        errors = [None] * count
+
+        def call(i):
+            try:
+                results[i] = flight.do('key', compute)
+            except Exception as error:
+                errors[i] = error
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+        threads[0].start()
+        time.sleep(0.05)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def slow(self, result, delay=0.2, calls=None):
+        def compute():
+            if calls is not None:
+                calls.append(1)
+            time.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return compute
+
+    def test_concurrent_duplicates_compute_once(self):
+        """Waiters share the leader's result"""
+        calls = []
+        results, errors = self.run_concurrently(self.flight, self.slow(OK, calls=calls))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [OK] * 10)
+        metrics = self.flight.metrics()
+        self.assertEqual(metrics['calls'], 10)
+        self.assertEqual(metrics['coalescedLocal'], 9)
+        self.assertAlmostEqual(metrics['coalescingRatio'], 0.9)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        """Coalescing only applies while a computation is in flight"""
+        calls = []
+        self.flight.do('key', self.slow(OK, 0, calls))
+        self.flight.do('key', self.slow(OK, 0, calls))
+        self.assertEqual(len(calls), 2)
+
+    def test_client_errors_are_shared(self):
+        """4xx results are deterministic and shared like successes"""
+        bad_request = FlightResult(400, b'{"error": "bad"}', 'application/json')
+        calls = []
+        results, _ = self.run_concurrently(self.flight, self.slow(bad_request, calls=calls), count=4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [bad_request] * 4)
+
+    def test_leader_exception_triggers_reelection(self):
+        """When the leader raises, a waiter takes over and the rest share its result"""
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            time.sleep(0.2)
+            if len(attempts) == 1:
+                raise RuntimeError('leader crashed')
+            return OK
+
+        results, errors = self.run_concurrently(self.flight, flaky, count=5)
+        self.assertIsInstance(errors[0], RuntimeError)
+        self.assertEqual(results[1:], [OK] * 4)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(self.flight.metrics()['leaderFailures'], 1)
+
+    def test_server_error_is_not_shared(self):
+        """A 5xx leader result is returned to the leader only"""
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            time.sleep(0.2)
+            return SERVER_ERROR if len(attempts) == 1 else OK
+
+        results, _ = self.run_concurrently(self.flight, flaky, count=3)
+        self.assertEqual(results[0], SERVER_ERROR)
+        self.assertEqual(results[1:], [OK, OK])
+
+    def test_persistent_failure_reaches_waiters(self):
+        """Waiters give up after max_attempts failed leaders"""
+        results, errors = self.run_concurrently(self.flight, self.slow(RuntimeError('down'), 0.1), count=6)
+        self.assertTrue(all(error is not None for error in errors))
+        self.assertTrue(any(isinstance(error, LeaderFailed) for error in errors))
+        self.assertEqual(results, [None] * 6)
+        self.assertEqual(self.flight.metrics()['inFlight'], 0)
+
+    @unittest.skipIf(fcntl is None, 'cross-process coalescing needs fcntl')
+    def test_cross_process_waiter_reads_published_result(self):
+        """A second worker waits on the file lock and reuses the published result"""
+        worker_a = SingleFlight(directory=self.directory)
+        worker_b = SingleFlight(directory=self.directory)
+        calls_a, calls_b = [], []
+        results = {}
+
+        leader = threading.Thread(target=lambda: results.update(a=worker_a.do('key', self.slow(OK, 0.3, calls_a))))
+        leader.start()
+        time.sleep(0.05)
+        results['b'] = worker_b.do('key', self.slow(OK, 0, calls_b))
+        leader.join()
+
+        self.assertEqual(results, {'a': OK, 'b': OK})
+        self.assertEqual(len(calls_a), 1)
+        self.assertEqual(calls_b, [])
+        self.assertEqual(worker_b.metrics()['coalescedRemote'], 1)
+        self.assertEqual(worker_a.metrics()['published'], 1)
+
+    @unittest.skipIf(fcntl is None, 'cross-process coalescing needs fcntl')
+    def test_uncontended_leader_publishes_nothing(self):
+        """Without a waiting process the leader writes no result and removes its lock files"""
+        worker = SingleFlight(directory=self.directory)
+        self.assertEqual(worker.do('key', self.slow(OK, 0)), OK)
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(worker.metrics()['published'], 0)
+
+    @unittest.skipIf(fcntl is None, 'cross-process coalescing needs fcntl')
+    def test_store_is_capped_by_bytes(self):
+        """The sweep removes the oldest results once the store is over max_bytes"""
+        worker = SingleFlight(directory=self.directory, max_bytes=200)
+        body = b'x' * 40
+        now = time.time()
+        for i, key in enumerate(['old', 'mid', 'new']):
+            path = worker._paths(key)[2]
+            worker._publish(path, FlightResult(200, body, 'application/json'))
+            os.utime(path, (now - 3 + i, now - 3 + i))
+        worker._publish(worker._paths('huge')[2], FlightResult(200, b'x' * 201, 'application/json'))
+        worker._expire_old_results()
+        self.assertEqual(sorted(os.listdir(self.directory)), ['mid.result', 'new.result'])
+
+    @unittest.skipIf(fcntl is None, 'cross-process coalescing needs fcntl')
+    def test_directory_must_be_private(self):
+        """The directory is made 0700; a symlinked one is not used at all"""
+        os.chmod(self.directory, 0o777)
+        self.assertTrue(SingleFlight(directory=self.directory)._private_directory())
+        self.assertEqual(os.stat(self.directory).st_mode & 0o777, 0o700)
+
+        link = self.directory + '-link'
+        os.symlink(self.directory, link)
+        try:
+            worker = SingleFlight(directory=link)
+            self.assertFalse(worker._private_directory())
+            self.assertEqual(worker.do('key', self.slow(OK, 0)), OK)
+        finally:
+            os.remove(link)
+
+    @unittest.skipIf(fcntl is None, 'cross-process coalescing needs fcntl')
+    def test_cross_process_failed_leader_is_replaced(self):
+        """If the other worker's leader fails, the waiting worker computes itself"""
+        worker_a = SingleFlight(directory=self.directory)
+        worker_b = SingleFlight(directory=self.directory)
+        calls_b = []
+
+        leader = threading.Thread(target=lambda: worker_a.do('key', self.slow(SERVER_ERROR, 0.3)))
+        leader.start()
+        time.sleep(0.05)
+        result = worker_b.do('key', self.slow(OK, 0, calls_b))
+        leader.join()
+
+        self.assertEqual(result, OK)
+        self.assertEqual(len(calls_b), 1)
+
+
+class TestSingleFlightEndpoint(unittest.TestCase):
+    """Test the metrics endpoint"""
+
+    def test_metrics_endpoint(self):
+        from app import app
+        client = app.test_client()
+        response = client.get('/api/metrics/single-flight')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        for field in ['calls', 'computed', 'coalescedLocal', 'coalescedRemote', 'coalescingRatio']:
+            self.assertIn(field, data)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,141 @@
+import unittest
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from io import StringIO
+
+import numpy as np
+
+# Add parent directory to path to import structured_log
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import structured_log
+from app import app
+from column import NumericColumn
+from structured_log import NonBlockingQueueHandler, get_logger, parse_levels, pipeline, summarize
+
+
+class TestSummarize(unittest.TestCase):
+    """Test that field values are bounded before they are queued"""
+
+    def test_long_sequences_are_summarized(self):
+        values = np.arange(1000, dtype=np.float64)
+        for sequence in (values, NumericColumn(values), values.tolist()):
+            summary = summarize(sequence)
+            self.assertEqual(summary, {'n': 1000, 'min': 0.0, 'max': 999.0, 'mean': 499.5,
+                                       'head': [0.0, 1.0, 2.0, 3.0, 4.0]})
+        self.assertEqual(summarize((1, 2.5, np.float32(3))), [1, 2.5, 3.0])
+        self.assertEqual(summarize(['a'] * 20)['head'], ['a'] * 5)
+
+    def test_strings_and_non_finite_floats(self):
+        text = summarize('x' * 2000)
+        self.assertTrue(text.endswith('... (2000 chars)'))
+        self.assertEqual(len(text), structured_log.MAX_STRING_CHARS + len('... (2000 chars)'))
+        self.assertEqual(summarize({'a': float('nan'), 1: np.inf}), {'a': 'nan', '1': 'inf'})
+
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels('warning, analyses=DEBUG'), {'': 'WARNING', 'analyses': 'DEBUG'})
+        self.assertEqual(parse_levels(None), {'': 'INFO'})
+        with self.assertRaisesRegex(ValueError, 'LOUD'):
+            parse_levels('analyses=loud')
+
+
+class TestNonBlockingQueue(unittest.TestCase):
+    """Test that a full queue drops records instead of blocking the caller"""
+
+    def test_drops_are_counted_and_reported(self):
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        logger = logging.getLogger('statcalc.tests.queue')
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            log = get_logger('tests.queue')
+            for i in range(3):
+                log.warning('burst', i=i)
+            self.assertEqual(handler.dropped, 2)
+            self.assertEqual(handler.queue.get_nowait().fields, {'i': 0})
+            log.warning('after')
+            self.assertEqual(handler.queue.get_nowait().fields, {'droppedRecords': 2})
+        finally:
+            logger.removeHandler(handler)
+
+    def test_stop_with_a_full_queue(self):
+        """Stopping waits for room for the stop signal and writes out what was queued"""
+        class SlowStream(StringIO):
+            def write(self, text):
+                released.wait(5)
+                return super().write(text)
+
+        released = threading.Event()
+        stream = SlowStream()
+        pipeline.configure(queue_size=2, stream=stream)
+        try:
+            log = get_logger('tests.stop')
+            for i in range(4):
+                log.warning('burst', i=i)
+            threading.Timer(0.1, released.set).start()
+            pipeline.stop()
+        finally:
+            released.set()
+            pipeline.stop()
+        written = [json.loads(line)['i'] for line in stream.getvalue().splitlines()]
+        self.assertEqual(written[:2], [0, 1])
+
+
+class TestRequestLogging(unittest.TestCase):
+    """Test request-scoped records written by the app"""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.stream = StringIO()
+
+    def tearDown(self):
+        pipeline.stop()
+
+    def records(self):
+        pipeline.stop()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_request_record_and_scope_fields(self):
+        pipeline.configure(level='INFO,analyses=DEBUG', stream=self.stream)
+        response = self.client.post('/api/chi-square', json={'data': '10, 20, 30\n1, 1, 1'},
+                                    headers={'X-Request-ID': 'abc123'})
+        self.assertEqual(response.headers['X-Request-ID'], 'abc123')
+
+        records = self.records()
+        self.assertEqual([record['event'] for record in records],
+                         ['chi-square sums', 'chi-square expected normalized', 'request'])
+        for record in records:
+            self.assertEqual(record['requestId'], 'abc123')
+            self.assertEqual(record['analysis'], 'chisquare')
+            self.assertEqual(record['source'], 'json')
+        request = records[-1]
+        self.assertEqual((request['logger'], request['level'], request['status']), ('statcalc.http', 'INFO', 200))
+        self.assertGreater(request['inputBytes'], 0)
+        self.assertGreaterEqual(request['durationMs'], 0)
+        self.assertEqual(records[0]['observedSum'], 60.0)
+
+    def test_rejections_and_sampling(self):
+        pipeline.configure(sample_rate=0, stream=self.stream)
+        self.client.post('/api/descriptive-stats', json={'data': '1, 2, 3'})
+        self.assertEqual(self.records(), [])
+
+        pipeline.configure(level='WARNING', stream=self.stream)
+        self.client.post('/api/descriptive-stats', json={'data': '1, 2, 3'})
+        self.client.post('/api/t-test', json={'data': '1, 2, x\n5'})
+        self.assertEqual(self.records(), [])
+
+        pipeline.configure(stream=self.stream)
+        self.client.post('/api/t-test', json={'data': '1, 2, x\n5'})
+        rejected, request = self.records()
+        self.assertEqual(rejected['event'], 'analysis rejected')
+        self.assertIn('x', rejected['error'])
+        self.assertEqual(request['status'], 400)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,11 @@
+"""WSGI entrypoint: the app with its log pipeline started.
+
+    gunicorn --worker-class gthread --threads 16 wsgi:app
+
+Importing app alone (tests, scripts, benchmarks) leaves logging off; see
+structured_log.py.
+"""
+import structured_log
+from app import app
+
+structured_log.configure_app(app)